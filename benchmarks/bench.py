@@ -0,0 +1,257 @@
+"""
+Офлайн бенчмарк FaasRequester и VacancyScrapper на локальной замене FaaS.
+
+Примеры:
+    python -m benchmarks.bench requester --requests 2000 --latency 0.05
+    python -m benchmarks.bench scraper --records 200 --error-rate 0.02 --compare
+
+Каждый запуск дописывает строку в benchmarks/results.jsonl вместе с хэшем коммита,
+чтобы сравнивать результаты между изменениями. Пиковый RSS считается для всего
+процесса, поэтому за один запуск выполняется один сценарий.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_faas import FakeFaas  # noqa: E402
+from metrics import MetricsRegistry  # noqa: E402
+from repositories.faas_requester import FaasRequester  # noqa: E402
+from repositories.vacancy_batch import VacancyBatch  # noqa: E402
+from scrappers.vacancy_scrapper import VacancyScrapper  # noqa: E402
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.jsonl')
+
+BenchRecord = namedtuple('BenchRecord', ['city_vacancyname_key', 'id_av', 'vacancy_name'])
+
+
+class TimingTransport(httpx.AsyncBaseTransport):
+    """Транспорт-обертка, замеряющий длительность каждого HTTP запроса"""
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+        self.latencies: List[float] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started_at = time.perf_counter()
+        try:
+            return await self.inner.handle_async_request(request)
+        finally:
+            self.latencies.append(time.perf_counter() - started_at)
+
+
+class InMemoryDictRepository:
+    def __init__(self, records: List[BenchRecord]):
+        self.records = records
+
+        self.scraped = {}
+
+    def iter_batches(self, batch_size: int = 1000, client=None, scraped_before=None, id_columns=None):
+        for start in range(0, len(self.records), batch_size):
+            yield self.records[start:start + batch_size]
+
+    def mark_scraped(self, keys, scraped_at=None, main_counts=None, main_sources=None):
+        self.scraped.update(dict.fromkeys(keys, scraped_at or time.time()))
+
+
+class InMemoryVacancyRepository:
+    def __init__(self):
+        self.ids = set()
+
+    def copy_upsert(self, vacancies, run_id=None) -> int:
+        if not isinstance(vacancies, VacancyBatch):
+            vacancies = VacancyBatch.from_dicts(vacancies)
+        before = len(self.ids)
+        self.ids.update(vacancies.ids)
+        return len(self.ids) - before
+
+    def bulk_insert(self, vacancies) -> bool:
+        self.copy_upsert(vacancies)
+        return True
+
+    def iter_vacancy_ids(self):
+        return iter(sorted(self.ids))
+
+
+def make_records(count: int) -> List[BenchRecord]:
+    return [BenchRecord(f"city{i % 50}_vacancy{i}", f"city{i % 50}", f"vacancy{i}") for i in range(count)]
+
+
+def make_requester(args, transport: httpx.AsyncBaseTransport) -> FaasRequester:
+    from repositories.rate_control import AdaptiveLimiter
+
+    limiter = AdaptiveLimiter(initial_limit=args.max_concurrent, max_limit=args.max_concurrent * 4) \
+        if args.adaptive else None
+    return FaasRequester(
+        'http://fake-faas',
+        retry=args.retry,
+        max_concurrent=args.max_concurrent,
+        log_level=logging.ERROR,
+        adaptive_limiter=limiter,
+        metrics=MetricsRegistry(),
+        transport=transport
+    )
+
+
+async def bench_requester(args, fake: FakeFaas, transport: TimingTransport) -> Dict:
+    records = make_records(args.requests)
+    requests = [
+        {"json": {"url": url}, "target_url": url}
+        for url in (f"https://www.avito.ru/{r.id_av}/vakansii?cd=1&q={r.vacancy_name}&s=104" for r in records)
+    ]
+    if args.batch_size > 1:
+        requests = [requests[i:i + args.batch_size] for i in range(0, len(requests), args.batch_size)]
+    failed = 0
+    async with make_requester(args, transport) as requester:
+        async for result, _ in requester.iter_concurrently(requests, "POST"):
+            failed += isinstance(result, Exception)
+    return {"requests": args.requests, "failed": failed}
+
+
+async def bench_scraper(args, fake: FakeFaas, transport: TimingTransport) -> Dict:
+    vacancy_repo = InMemoryVacancyRepository()
+    archive = None
+    if args.archive_dir:
+        from repositories.parquet_archive import ParquetVacancyArchive
+        archive = ParquetVacancyArchive(args.archive_dir, run_id='bench')
+    async with make_requester(args, transport) as requester:
+        scrapper = VacancyScrapper(
+            requester,
+            InMemoryDictRepository(make_records(args.records)),
+            vacancy_repo,
+            chunk_size=args.chunk_size,
+            verify_retry=args.retry,
+            workers=args.workers,
+            flush_size=args.flush_size,
+            parse_workers=args.parse_workers,
+            incremental=args.incremental,
+            metrics=MetricsRegistry(),
+            batch_size=args.batch_size,
+            archive=archive
+        )
+        await scrapper.run()
+    details = {"records": args.records, "vacancies": len(vacancy_repo.ids)}
+    if archive is not None:
+        details["archive_rows"] = archive.rows_written
+        details["archive_mb"] = round(sum(os.path.getsize(path) for path in archive.files_written) / 1024 ** 2, 2)
+    return details
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}{'-dirty' if dirty else ''}"
+    except OSError:
+        return 'unknown'
+
+
+def run(args) -> Dict:
+    fake = FakeFaas(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        invalid_rate=args.invalid_rate,
+        page_size_kb=args.page_size_kb
+    )
+    transport = TimingTransport(fake.transport())
+    scenario = bench_requester if args.scenario == 'requester' else bench_scraper
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started_at = time.perf_counter()
+    details = asyncio.run(scenario(args, fake, transport))
+    elapsed = time.perf_counter() - started_at
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    cpu = (usage_after.ru_utime - usage_before.ru_utime + usage_after.ru_stime - usage_before.ru_stime
+           + children.ru_utime + children.ru_stime)
+    latencies = sorted(transport.latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) >= 2 else [0.0] * 99
+
+    return {
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "scenario": args.scenario,
+        "params": {key: value for key, value in vars(args).items() if key not in ('compare', 'no_save')},
+        "elapsed_s": round(elapsed, 3),
+        "http_calls": fake.calls,
+        "pages_per_s": round(fake.pages_served / elapsed, 2),
+        "vacancies_per_s": round(details.get("vacancies", 0) / elapsed, 2),
+        "latency_p50_ms": round(quantiles[49] * 1000, 2),
+        "latency_p99_ms": round(quantiles[98] * 1000, 2),
+        "cpu_ms_per_page": round(cpu * 1000 / max(fake.pages_served, 1), 3),
+        "peak_rss_mb": round(usage_after.ru_maxrss / 1024, 1),
+        **details,
+    }
+
+
+def previous_result(result: Dict):
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH) as file:
+        for line in file:
+            entry = json.loads(line)
+            if entry["scenario"] == result["scenario"] and entry["params"] == result["params"]:
+                previous = entry
+    return previous
+
+
+def print_result(result: Dict, previous: Dict = None):
+    keys = ("elapsed_s", "http_calls", "pages_per_s", "vacancies_per_s",
+            "latency_p50_ms", "latency_p99_ms", "cpu_ms_per_page", "peak_rss_mb")
+    print(f"{result['scenario']} @ {result['commit']}")
+    for key in keys:
+        line = f"  {key:<18} {result[key]:>12}"
+        if previous and previous.get(key):
+            change = (result[key] - previous[key]) / previous[key] * 100
+            line += f"   было {previous[key]} ({previous['commit']}), {change:+.1f}%"
+        print(line)
+    for key in ("archive_rows", "archive_mb"):
+        if key in result:
+            print(f"  {key:<18} {result[key]:>12}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Офлайн бенчмарк скраппера на локальной замене FaaS")
+    parser.add_argument('scenario', choices=['requester', 'scraper'])
+    parser.add_argument('--requests', type=int, default=1000, help="Число запросов в сценарии requester")
+    parser.add_argument('--records', type=int, default=100, help="Число записей словаря в сценарии scraper")
+    parser.add_argument('--latency', type=float, default=0.05, help="Медианная задержка FaaS, сек")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ответов 503")
+    parser.add_argument('--invalid-rate', type=float, default=0.0, help="Доля ответов без data-mfe-state")
+    parser.add_argument('--page-size-kb', type=int, default=200, help="Размер синтетической страницы, КБ")
+    parser.add_argument('--max-concurrent', type=int, default=10)
+    parser.add_argument('--adaptive', action='store_true', help="Адаптивный лимит параллелизма")
+    parser.add_argument('--retry', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=10)
+    parser.add_argument('--flush-size', type=int, default=1000)
+    parser.add_argument('--parse-workers', type=int, default=0)
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--batch-size', type=int, default=1, help="Страниц в одном пакетном запросе к FaaS")
+    parser.add_argument('--archive-dir', default=None, help="Писать вакансии в архив Parquet в этом каталоге")
+    parser.add_argument('--compare', action='store_true', help="Сравнить с прошлым запуском с теми же параметрами")
+    parser.add_argument('--no-save', action='store_true', help="Не дописывать результат в results.jsonl")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    bench_result = run(arguments)
+    print_result(bench_result, previous_result(bench_result) if arguments.compare else None)
+    if not arguments.no_save:
+        with open(RESULTS_PATH, 'a') as results_file:
+            results_file.write(json.dumps(bench_result, ensure_ascii=False) + '\n')
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import random
+import zlib
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+ITEMS_PER_PAGE = 50
+
+
+class FakeFaas:
+    """
+    Локальная замена FaaS для бенчмарков: отдает синтетические страницы выдачи
+    Avito с блоком data-mfe-state, пагинацией и заданным числом вакансий.
+
+    Используется как обработчик httpx.MockTransport, поэтому сеть не нужна.
+    Задержка, доля ошибок 5xx и доля ответов без блока состояния (капча)
+    настраиваются. Поддерживает пакетный контракт: {"urls": [...]} ->
+    {"results": [{"url": ..., "text": ...} | {"url": ..., "error": ..., "status": ...}]}.
+    """
+    def __init__(
+        self,
+        latency: float = 0.05,
+        latency_jitter: float = 0.5,
+        batch_item_latency: float = 0.005,
+        error_rate: float = 0.0,
+        invalid_rate: float = 0.0,
+        max_count: int = 5000,
+        page_size_kb: int = 200,
+        shared_ids_rate: float = 0.2,
+        seed: Optional[int] = 42
+    ):
+        """
+        :param latency: Медианная задержка ответа (сек)
+        :param latency_jitter: Разброс задержки (сигма логнормального распределения)
+        :param batch_item_latency: Дополнительная задержка на каждый URL пакетного запроса (сек)
+        :param error_rate: Доля ответов 503
+        :param invalid_rate: Доля ответов без блока data-mfe-state
+        :param max_count: Максимальное mainCount для запроса (реальное выбирается по хэшу запроса)
+        :param page_size_kb: Примерный размер HTML страницы
+        :param shared_ids_rate: Доля вакансий, повторяющихся между запросами
+        :param seed: Зерно генератора случайных чисел для воспроизводимости
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.batch_item_latency = batch_item_latency
+        self.error_rate = error_rate
+        self.invalid_rate = invalid_rate
+        self.max_count = max_count
+        self.page_size_kb = page_size_kb
+        self.shared_ids_rate = shared_ids_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.pages_served = 0
+        self.batch_calls = 0
+
+    def main_count(self, query: str) -> int:
+        """Число вакансий по запросу (детерминированно по хэшу запроса, много маленьких и немного больших)"""
+        fraction = (zlib.crc32(query.encode()) % 10_000) / 10_000
+        return int(self.max_count * fraction ** 3)
+
+    def _vacancy_id(self, query: str, page: int, index: int) -> int:
+        if (zlib.crc32(f"{query}:{page}:{index}:shared".encode()) % 1000) / 1000 < self.shared_ids_rate:
+            return 1_000_000 + zlib.crc32(f"{page}:{index}".encode()) % 100_000
+        return 10_000_000 + zlib.crc32(f"{query}:{page}:{index}".encode())
+
+    def render_page(self, url: str) -> str:
+        parts = urlsplit(url)
+        params = parse_qs(parts.query)
+        query = params.get('q', [''])[0]
+        page = int(params.get('p', ['1'])[0])
+        area = parts.path.strip('/').split('/')[0]
+        count = self.main_count(f"{area}:{query}")
+        pages_count = max(1, min(100, -(-min(count, 5000) // ITEMS_PER_PAGE)))
+
+        on_page = 0 if page > pages_count else min(ITEMS_PER_PAGE, count - (page - 1) * ITEMS_PER_PAGE)
+        items = [{"id": 0, "type": "banner"}]
+        for index in range(max(on_page, 0)):
+            vacancy_id = self._vacancy_id(f"{area}:{query}", page, index)
+            items.append({
+                "id": vacancy_id,
+                "title": f"{query} #{vacancy_id}",
+                "urlPath": f"/{area}/vakansii/{query}_{vacancy_id}",
+                "priceDetailed": {"value": 40_000 + vacancy_id % 100_000, "postfix": "за месяц"},
+                "location": {"name": area},
+                "sortTimeStamp": 1_700_000_000_000 - page * 1000 - index,
+                "description": "Описание вакансии " * 10,
+            })
+
+        state = {
+            "data": {
+                "mainCount": count,
+                "catalog": {
+                    "items": items,
+                    "pager": {"last": f"/{area}/vakansii?cd=1&amp;p={pages_count}&amp;q={query}&amp;s=104"},
+                },
+            },
+        }
+        blob = json.dumps(state, ensure_ascii=False).replace('"', '&quot;')
+        padding = max(self.page_size_kb * 1024 - len(blob), 0)
+        return (
+            '<!DOCTYPE html><html><head><title>Вакансии</title></head><body>'
+            f'<div class="layout">{"<div class=x></div>" * (padding // 19)}</div>'
+            f'<script type="mime/invalid" data-mfe-state="true">{blob}</script>'
+            '</body></html>'
+        )
+
+    def render_invalid_page(self) -> str:
+        return '<html><body><h1>Доступ ограничен</h1></body></html>'
+
+    def render_response(self, url: str) -> dict:
+        """Ответ FaaS для одного целевого URL"""
+        if self.random.random() < self.invalid_rate:
+            return {"text": self.render_invalid_page()}
+        self.pages_served += 1
+        return {"text": self.render_page(url)}
+
+    async def _sleep(self):
+        if self.latency:
+            await asyncio.sleep(self.latency * self.random.lognormvariate(0, self.latency_jitter))
+
+    def render_batch_item(self, url: str) -> dict:
+        """Результат одного URL пакетного запроса; ошибки элементов не роняют весь пакет"""
+        if self.random.random() < self.error_rate:
+            return {"url": url, "error": "unavailable", "status": 503}
+        return {"url": url, **self.render_response(url)}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        """Обработчик для httpx.MockTransport"""
+        self.calls += 1
+        payload = json.loads(request.content or b'{}')
+        urls = payload.get('urls')
+        await self._sleep()
+        if urls is not None:
+            self.batch_calls += 1
+            await asyncio.sleep(self.batch_item_latency * len(urls))
+        if self.random.random() < self.error_rate:
+            return httpx.Response(503, json={"error": "unavailable"})
+
+        if urls is not None:
+            return httpx.Response(200, json={"results": [self.render_batch_item(url) for url in urls]})
+        return httpx.Response(200, json=self.render_response(payload.get('url', '')))
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
@@ -1,44 +1,512 @@
+"""
+Сбор вакансий Avito (и hh.ru, --sources avito,hh) через FaaS.
+
+Тяжелые модули (SQLAlchemy, httpx, bs4, модели и репозитории) импортируются внутри
+функций, поэтому --help и --dry-run не подключаются к БД и запускаются быстро.
+
+    python main.py --max-concurrent 10 --batch-size 10
+    python main.py --limit 200 --profile run.prof
+    python main.py --limit 200 --profile run.folded --profile-mode async
+    python main.py --sources avito,hh
+    python main.py --migrate-storage
+    python main.py --migrate-storage --dedup-vacancies
+"""
+import argparse
 import asyncio
+import importlib.util
+import json
 import logging
 import os
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from db import DatabaseManager
+    from metrics import MetricsExporter
+    from profiling import AsyncStackSampler
+    from repositories.dead_letter import DeadLetter
+    from repositories.raw_av_vacancy import AvVacancyRepository
+    from scrappers.scheduler import RecordScheduler
+    from scrappers.vacancy_scrapper import VacancyScrapper
+
+logger = logging.getLogger(__name__)
+
+
+def initialize_database(db_manager: Optional['DatabaseManager'] = None) -> 'DatabaseManager':
+    """
+    Инициализация БД: создание недостающих таблиц и секций таблиц вакансий на ближайшие месяцы.
+    Вызывается в начале каждого запуска; перенос таблиц прежней схемы - только migrate_storage
+    """
+    from db import DatabaseManager
+    from repositories.dict_city_vacancy import DictCityVacancyRepository
+    from repositories.raw_av_vacancy import AvVacancyRepository
+    from repositories.raw_hh_vacancy import HhVacancyRepository
+    from repositories.scrape_job import ScrapeJobRepository
+
+    db_manager = db_manager or DatabaseManager()
+    _create_tables(db_manager)
+    AvVacancyRepository(db_manager).ensure_storage_layout()
+    HhVacancyRepository(db_manager).ensure_storage_layout()
+    DictCityVacancyRepository(db_manager).ensure_scrape_state_schema()
+    ScrapeJobRepository(db_manager).ensure_schema()
+    return db_manager
+
+
+def migrate_storage(db_manager: Optional['DatabaseManager'] = None, deduplicate: bool = False) -> 'DatabaseManager':
+    """
+    Перенос таблиц вакансий прежней схемы (без секций) в секционированные (--migrate-storage)
+
+    :param deduplicate: Удалить повторные строки одного vacancy_id (--dedup-vacancies)
+    """
+    from db import DatabaseManager
+    from repositories.raw_av_vacancy import AvVacancyRepository
+    from repositories.raw_hh_vacancy import HhVacancyRepository
+
+    db_manager = db_manager or DatabaseManager()
+    _create_tables(db_manager)
+    for repository in (AvVacancyRepository(db_manager), HhVacancyRepository(db_manager)):
+        table = repository.model.__table__
+        if repository.migrate_legacy_storage():
+            logger.warning(f"Таблица {table.schema}.{table.name} перенесена в секционированную")
+        else:
+            logger.warning(f"Таблица {table.schema}.{table.name} уже секционирована")
+        if deduplicate:
+            removed = repository.deduplicate_vacancies()
+            logger.warning(f"Из {table.schema}.{table.name} удалено {removed} повторных строк vacancy_id")
+    return initialize_database(db_manager)
+
+
+def _create_tables(db_manager: 'DatabaseManager'):
+    from db import Base
+    from models.dead_letter import ScrapeDeadLetter
+    from models.dict_scrape_state import DictScrapeState
+    from models.raw_av_vacancy import RawAvVacancy, RawAvVacancyId
+    from models.raw_hh_vacancy import HhVacancyDailyStats, RawHhVacancy, RawHhVacancyId
+    from models.scrape_job import ScrapeJob
+    from models.vacancy_daily_stats import VacancyDailyStats
+
+    Base.metadata.create_all(
+        bind=db_manager.engine,
+        tables=[
+            RawAvVacancy.__table__,
+            RawAvVacancyId.__table__,
+            VacancyDailyStats.__table__,
+            RawHhVacancy.__table__,
+            RawHhVacancyId.__table__,
+            HhVacancyDailyStats.__table__,
+            DictScrapeState.__table__,
+            ScrapeJob.__table__,
+            ScrapeDeadLetter.__table__,
+        ]
+    )
+
+
+def parse_sources(value: str) -> List[str]:
+    from scrappers.sources import SOURCES
+
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SOURCES]
+    if not names or unknown:
+        raise argparse.ArgumentTypeError(f"доступные источники: {', '.join(SOURCES)}")
+    return list(dict.fromkeys(names))
+
+
+def add_requester_arguments(parser: argparse.ArgumentParser) -> argparse._ArgumentGroup:
+    """Параметры FaasRequester и кэша ответов (для make_requester); возвращает группу FaaS"""
+    requester = parser.add_argument_group("FaaS")
+    requester.add_argument('--faas-url', default=os.getenv('FAAS_URL'),
+                           help="Адрес FaaS (по умолчанию переменная окружения FAAS_URL)")
+    requester.add_argument('--faas-token', default=os.getenv('FAAS_TOKEN'),
+                           help="Токен FaaS (по умолчанию переменная окружения FAAS_TOKEN)")
+    requester.add_argument('--retry', type=int, default=50, help="Попыток на один запрос")
+    requester.add_argument('--timeout', type=int, default=10, help="Таймаут запроса, сек")
+    requester.add_argument('--max-concurrent', type=int, default=5,
+                           help="Одновременных запросов к FaaS (начальный лимит при --adaptive)")
+    requester.add_argument('--adaptive', action='store_true',
+                           help="Адаптивный лимит параллелизма (AIMD) по ошибкам и задержке ответов")
+    requester.add_argument('--adaptive-max', type=int, default=100,
+                           help="Верхняя граница лимита в режиме --adaptive")
+    requester.add_argument('--rate-limit', type=float, default=None,
+                           help="Начальный лимит частоты запросов в режиме --adaptive, запросов/сек")
+    requester.add_argument('--header-pool-size', type=int, default=50,
+                           help="Размер пула браузерных заголовков")
+    requester.add_argument('--header-strategy', choices=['round_robin', 'random'], default='round_robin',
+                           help="Порядок выдачи заголовков из пула")
+    requester.add_argument('--sticky-hosts', action='store_true',
+                           help="Один набор заголовков на все запросы к одному хосту")
+    requester.add_argument('--http2', action='store_true',
+                           help="HTTP/2 к FaaS с мультиплексированием запросов (нужен пакет h2)")
+    requester.add_argument('--json-codec', choices=['json', 'orjson'], default=None,
+                           help="JSON кодек (по умолчанию orjson, если установлен)")
+
+    retries = parser.add_argument_group("Повторы запросов")
+    retries.add_argument('--retry-base-delay', type=float, default=0.5,
+                         help="Задержка перед первым повтором, сек (дальше растет экспоненциально, с jitter)")
+    retries.add_argument('--retry-max-delay', type=float, default=10.0,
+                         help="Верхняя граница задержки между повторами, сек")
+    retries.add_argument('--retry-budget-ratio', type=float, default=0.2,
+                         help="Глобальный бюджет повторов: не больше этой доли от числа запросов "
+                              "(отрицательное значение - без бюджета)")
+    retries.add_argument('--retry-budget-min', type=int, default=10,
+                         help="Повторов, разрешенных сверх доли --retry-budget-ratio")
+    retries.add_argument('--breaker-threshold', type=int, default=20,
+                         help="Ошибок FaaS подряд, после которых запросы временно не отправляются (0 - без размыкателя)")
+    retries.add_argument('--breaker-recovery', type=float, default=30.0,
+                         help="Через сколько секунд после размыкания пропускается пробный запрос")
+
+    cache = parser.add_argument_group("Кэш ответов")
+    cache.add_argument('--cache-dir', default=None,
+                       help="Каталог дискового кэша ответов FaaS (по умолчанию кэш выключен)")
+    cache.add_argument('--cache-ttl', type=float, default=24 * 3600, help="Время жизни записи кэша, сек")
+    cache.add_argument('--cache-max-mb', type=int, default=1024, help="Максимальный размер кэша, МБ")
+
+    return requester
+
+
+def validate_requester_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if not args.faas_url and not getattr(args, 'dry_run', False) and not getattr(args, 'migrate_storage', False):
+        parser.error("не задан адрес FaaS: --faas-url или переменная окружения FAAS_URL")
+    if args.http2 and importlib.util.find_spec('h2') is None:
+        parser.error("--http2: пакет h2 не установлен (pip install httpx[http2])")
+    if args.retry < 1:
+        parser.error("--retry должен быть положительным")
+    if args.retry_base_delay < 0 or args.retry_max_delay < args.retry_base_delay:
+        parser.error("--retry-max-delay должен быть не меньше --retry-base-delay >= 0")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Сбор вакансий Avito и hh.ru через FaaS",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    requester = add_requester_arguments(parser)
+    requester.add_argument('--batch-size', type=int, default=1,
+                           help="Сколько страниц отправлять в FaaS одним пакетным запросом (1 - без пакетов)")
+
+    scraper = parser.add_argument_group("Конвейер")
+    scraper.add_argument('--chunk-size', type=int, default=10,
+                         help="Сколько записей словаря обрабатывается одновременно")
+    scraper.add_argument('--verify-retry', type=int, default=3,
+                         help="Циклов повторных попыток при неудачной валидации ответа")
+    scraper.add_argument('--workers', type=int, default=None,
+                         help="Сколько страниц загружается одновременно (по умолчанию 2 * лимит запросов)")
+    scraper.add_argument('--queue-size', type=int, default=100,
+                         help="Размер очереди между загрузкой и записью в БД")
+    scraper.add_argument('--flush-size', type=int, default=1000,
+                         help="Количество вакансий, после которого буфер сбрасывается в БД")
+    scraper.add_argument('--flush-interval', type=float, default=5.0,
+                         help="Максимальное время между сбросами буфера в БД, сек")
+    scraper.add_argument('--parse-workers', type=int, default=0,
+                         help="Процессов для разбора страниц (0 - разбор в event loop)")
+    scraper.add_argument('--read-batch-size', type=int, default=1000,
+                         help="Размер пачки при потоковом чтении словаря")
+    scraper.add_argument('--limit', type=int, default=None,
+                         help="Обработать не больше указанного числа записей словаря")
+
+    selection = parser.add_argument_group("Отбор записей словаря")
+    selection.add_argument('--sources', type=parse_sources, default=['avito'],
+                           help="Источники вакансий через запятую: avito, hh (запись словаря собирается "
+                                "источником, если заполнен его идентификатор города: id_av, id_hh)")
+    selection.add_argument('--client', default=None,
+                           help="Собирать только записи словаря указанного клиента")
+    selection.add_argument('--rescrape-after-hours', type=float, default=None,
+                           help="Пропускать записи словаря, собранные менее указанного числа часов назад")
+    selection.add_argument('--schedule', action='store_true',
+                           help="Сначала крупные и давно не собиравшиеся запросы, недавно собранные маленькие пропускать")
+    selection.add_argument('--small-query-interval-hours', type=float, default=72,
+                           help="Как часто собирать маленькие (одностраничные) запросы в режиме --schedule")
+    selection.add_argument('--incremental', action='store_true',
+                           help="Прекращать листание выдачи, когда страница состоит из уже известных вакансий")
+    selection.add_argument('--known-threshold', type=float, default=0.8,
+                           help="Доля известных вакансий на странице для остановки в режиме --incremental")
+
+    journal = parser.add_argument_group("Журнал запусков")
+    journal.add_argument('--journal', default='scrape_journal.sqlite3',
+                         help="Путь к SQLite журналу запусков")
+    journal.add_argument('--resume', action='store_true',
+                         help="Продолжить прерванный запуск, запрашивая только несохраненные страницы")
+    journal.add_argument('--run-id', default=None,
+                         help="Идентификатор запуска (с --resume - какой запуск продолжить, "
+                              "по умолчанию последний незавершенный)")
+
+    redrive = parser.add_argument_group("Повторная загрузка неудачных страниц")
+    redrive.add_argument('--redrive', action='store_true',
+                         help="Повторно загрузить только неудачные страницы из таблицы scrape_dead_letter")
+    redrive.add_argument('--redrive-limit', type=int, default=None,
+                         help="Сколько неудачных страниц загрузить за запуск --redrive")
+    redrive.add_argument('--redrive-max-count', type=int, default=None,
+                         help="Пропускать страницы, которые уже повторялись столько раз")
+    redrive.add_argument('--redrive-error-class', default=None,
+                         help="Повторять только страницы с этим классом ошибки (например, HTTPStatusError)")
+    redrive.add_argument('--redrive-max-concurrent', type=int, default=2,
+                         help="Одновременных запросов к FaaS в режиме --redrive")
 
-from dotenv import load_dotenv
+    archive = parser.add_argument_group("Архив Parquet")
+    archive.add_argument('--archive-dir', default=None,
+                         help="Дополнительно писать все вакансии запуска с полями выдачи в архив Parquet "
+                              "в этом каталоге (нужен пакет pyarrow)")
+    archive.add_argument('--archive-row-group-size', type=int, default=50_000,
+                         help="Строк в группе строк Parquet (столько строк архив держит в памяти)")
+    archive.add_argument('--archive-compression', choices=['zstd', 'snappy', 'gzip', 'none'], default='zstd',
+                         help="Сжатие файлов архива")
 
-from db import Base, DatabaseManager
-from models.raw_av_vacancy import RawAvVacancy
-from repositories.dict_city_vacancy import DictCityVacancyRepository
-from repositories.faas_requester import FaasRequester
-from repositories.raw_av_vacancy import AvVacancyRepository
-from scrappers.vacancy_scrapper import AvitoVacancyScrapper
+    metrics = parser.add_argument_group("Метрики")
+    metrics.add_argument('--metrics-file', default=None,
+                         help="Файл, в который периодически пишутся метрики (по умолчанию не пишутся)")
+    metrics.add_argument('--metrics-format', choices=['json', 'prometheus'], default='json',
+                         help="Формат файла метрик")
+    metrics.add_argument('--metrics-interval', type=float, default=15.0, help="Интервал записи метрик, сек")
 
+    runtime = parser.add_argument_group("Запуск")
+    runtime.add_argument('--uvloop', action='store_true', help="Event loop uvloop (нужен пакет uvloop)")
+    runtime.add_argument('--profile', default=None, metavar='PATH',
+                         help="Профилировать запуск и сохранить результат в PATH (для cprofile сводка - в PATH.txt)")
+    runtime.add_argument('--profile-mode', choices=['cprofile', 'async'], default='cprofile',
+                         help="cprofile - pstats основного потока (потоки записи и процессы разбора не входят); "
+                              "async - сэмплы цепочек await задач в формате folded stacks")
+    runtime.add_argument('--profile-interval', type=float, default=0.01,
+                         help="Интервал сэмплирования в режиме --profile-mode async, сек")
+    runtime.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default=None,
+                         help="Уровень логирования (по умолчанию логирование не настраивается)")
+    runtime.add_argument('--dry-run', action='store_true',
+                         help="Вывести итоговую конфигурацию и выйти, не обращаясь к БД и FaaS")
+    runtime.add_argument('--migrate-storage', action='store_true',
+                         help="Перенести таблицы вакансий прежней схемы в секционированные и выйти")
+    runtime.add_argument('--dedup-vacancies', action='store_true',
+                         help="Вместе с --migrate-storage: удалить повторные строки одного vacancy_id "
+                              "(остается самая ранняя)")
 
-def initialize_database():
-    """Инициализация БД и создание таблиц"""
-    db_manager = DatabaseManager()
+    args = parser.parse_args(argv)
+    if args.uvloop and importlib.util.find_spec('uvloop') is None:
+        parser.error("--uvloop: пакет uvloop не установлен")
+    if args.archive_dir and importlib.util.find_spec('pyarrow') is None:
+        parser.error("--archive-dir: пакет pyarrow не установлен")
+    if args.dedup_vacancies and not args.migrate_storage:
+        parser.error("--dedup-vacancies выполняется только вместе с --migrate-storage")
+    validate_requester_arguments(parser, args)
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit должен быть положительным")
+    return args
 
+
+def make_source_repos(db_manager: 'DatabaseManager', sources: List[str]) -> Dict[str, 'AvVacancyRepository']:
+    """Репозитории вакансий выбранных источников, кроме Avito"""
+    from repositories.raw_hh_vacancy import HhVacancyRepository
+
+    return {'hh': HhVacancyRepository(db_manager)} if 'hh' in sources else {}
+
+
+def describe_config(args: argparse.Namespace) -> str:
+    """Итоговая конфигурация запуска в виде JSON (токен скрыт)"""
+    config = vars(args).copy()
+    if config.get('faas_token'):
+        config['faas_token'] = '***'
+    return json.dumps(config, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def make_scheduler(args: argparse.Namespace) -> Optional['RecordScheduler']:
+    if not args.schedule:
+        return None
+    from scrappers.scheduler import RecordScheduler
+    from scrappers.sources import get_sources
+    return RecordScheduler(small_query_interval=timedelta(hours=args.small_query_interval_hours),
+                           sources=get_sources(args.sources))
+
+
+def make_retry_policy(args: argparse.Namespace):
+    """Политика повторов с глобальным бюджетом и размыкателем цепи (включены по умолчанию)"""
+    from repositories.retry_policy import CircuitBreaker, RetryBudget, RetryPolicy
+
+    budget = None
+    if args.retry_budget_ratio >= 0:
+        budget = RetryBudget(ratio=args.retry_budget_ratio, min_retries=args.retry_budget_min)
+    breaker = None
+    if args.breaker_threshold > 0:
+        breaker = CircuitBreaker(failure_threshold=args.breaker_threshold, recovery_timeout=args.breaker_recovery)
+    return RetryPolicy(
+        max_attempts=args.retry,
+        base_delay=args.retry_base_delay,
+        max_delay=args.retry_max_delay,
+        budget=budget,
+        breaker=breaker
+    )
+
+
+def make_requester(args: argparse.Namespace, max_concurrent: int):
+    from repositories.faas_requester import FaasRequester
+    from repositories.header_factory import HeaderFactory
+    from repositories.http_codecs import get_json_codec
+    from repositories.rate_control import AdaptiveLimiter
+    from repositories.response_cache import DiskResponseCache
+
+    adaptive_limiter = None
+    if args.adaptive:
+        adaptive_limiter = AdaptiveLimiter(
+            initial_limit=max_concurrent,
+            max_limit=max(args.adaptive_max, max_concurrent),
+            rate_limit=args.rate_limit
+        )
+
+    response_cache = None
+    if args.cache_dir:
+        response_cache = DiskResponseCache(
+            args.cache_dir,
+            ttl=args.cache_ttl,
+            max_size_bytes=args.cache_max_mb * 1024 ** 2
+        )
+
+    return FaasRequester(
+        args.faas_url,
+        faas_token=args.faas_token,
+        retry=args.retry,
+        timeout=args.timeout,
+        max_concurrent=max_concurrent,
+        header_factory=HeaderFactory(args.header_pool_size, args.header_strategy, args.sticky_hosts),
+        adaptive_limiter=adaptive_limiter,
+        retry_policy=make_retry_policy(args),
+        response_cache=response_cache,
+        http2=args.http2,
+        json_codec=get_json_codec(args.json_codec)
+    )
+
+
+async def run_scrapper(scrapper: 'VacancyScrapper', exporter: Optional['MetricsExporter'] = None,
+                       redrive_entries: Optional[List['DeadLetter']] = None,
+                       sampler: Optional['AsyncStackSampler'] = None):
+    if exporter is not None:
+        exporter.start()
+    if sampler is not None:
+        sampler.start()
     try:
-        Base.metadata.create_all(bind=db_manager.engine, tables=[RawAvVacancy.__table__])
-    except Exception as e:
-        raise
+        if redrive_entries is not None:
+            await scrapper.redrive(redrive_entries)
+        else:
+            await scrapper.run()
+    finally:
+        if sampler is not None:
+            await sampler.stop()
+        if exporter is not None:
+            await exporter.stop()
+        await scrapper.requester.close()
 
-    return db_manager
 
+def run_event_loop(coro, use_uvloop: bool = False):
+    loop_factory = None
+    if use_uvloop:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
 
-if __name__ == "__main__":
-    load_dotenv()
+
+def main(args: argparse.Namespace):
+    from metrics import REGISTRY, MetricsExporter
+    from repositories.dead_letter import DeadLetterRepository
+    from repositories.dict_city_vacancy import DictCityVacancyRepository
+    from repositories.raw_av_vacancy import AvVacancyRepository
+    from repositories.run_journal import RunJournal
+    from scrappers.sources import get_sources
+    from scrappers.vacancy_scrapper import VacancyScrapper
 
     db_manager = initialize_database()
-    raw_av_vacancy_repo = AvVacancyRepository(db_manager)
-    dict_vacancy_repo = DictCityVacancyRepository(db_manager)
-
-    raw_av_vacancy_repo = AvVacancyRepository(db_manager)
-    dict_vacancy_repo = DictCityVacancyRepository(db_manager)
-    avito_scrapper = AvitoVacancyScrapper(
-        FaasRequester(os.getenv('FAAS_URL'), retry=50, max_concurrent=5),
-        dict_vacancy_repo,
-        raw_av_vacancy_repo,
-        chunk_size=10,
-        verify_retry=3
+    dead_letter_repo = DeadLetterRepository(db_manager)
+
+    journal = None
+    run_id = None
+    redrive_entries = None
+    if args.redrive:
+        redrive_entries = dead_letter_repo.get_pending(
+            args.redrive_limit, args.redrive_max_count, args.redrive_error_class
+        )
+        logger.warning(f"Повторная загрузка {len(redrive_entries)} неудачных страниц")
+    else:
+        journal = RunJournal(args.journal)
+        run_id = journal.start_run(resume=args.resume, run_id=args.run_id)
+        logger.warning(f"Запуск {run_id}")
+
+    scraped_before = None
+    if args.rescrape_after_hours is not None:
+        scraped_before = datetime.now() - timedelta(hours=args.rescrape_after_hours)
+
+    archive = None
+    if args.archive_dir:
+        from repositories.parquet_archive import ParquetVacancyArchive
+        archive = ParquetVacancyArchive(
+            args.archive_dir,
+            run_id=run_id,
+            row_group_size=args.archive_row_group_size,
+            compression=None if args.archive_compression == 'none' else args.archive_compression
+        )
+
+    scrapper = VacancyScrapper(
+        make_requester(args, args.redrive_max_concurrent if args.redrive else args.max_concurrent),
+        DictCityVacancyRepository(db_manager),
+        AvVacancyRepository(db_manager),
+        chunk_size=args.chunk_size,
+        verify_retry=args.verify_retry,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        flush_size=args.flush_size,
+        flush_interval=args.flush_interval,
+        parse_workers=args.parse_workers,
+        journal=journal,
+        incremental=args.incremental,
+        known_ratio_threshold=args.known_threshold,
+        client=args.client,
+        scraped_before=scraped_before,
+        read_batch_size=args.read_batch_size,
+        batch_size=args.batch_size,
+        scheduler=make_scheduler(args),
+        dead_letters=dead_letter_repo,
+        limit=args.limit,
+        archive=archive,
+        sources=get_sources(args.sources),
+        source_repos=make_source_repos(db_manager, args.sources)
     )
 
-    asyncio.run(avito_scrapper.run())
+    metrics_exporter = None
+    if args.metrics_file:
+        metrics_exporter = MetricsExporter(REGISTRY, args.metrics_file, args.metrics_interval, args.metrics_format)
+
+    profiler = sampler = None
+    if args.profile and args.profile_mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+    elif args.profile:
+        from profiling import AsyncStackSampler
+        sampler = AsyncStackSampler(args.profile_interval)
+
+    started_at = time.perf_counter()
+    try:
+        coro = run_scrapper(scrapper, metrics_exporter, redrive_entries, sampler)
+        if profiler is not None:
+            profiler.runcall(run_event_loop, coro, args.uvloop)
+        else:
+            run_event_loop(coro, args.uvloop)
+    finally:
+        if journal is not None:
+            journal.close()
+        if profiler is not None:
+            from profiling import write_cprofile
+            logger.warning(f"Сводка профиля по cumulative time сохранена в {write_cprofile(profiler, args.profile)}")
+        if sampler is not None:
+            sampler.write(args.profile)
+        if args.profile:
+            logger.warning(f"Профиль запуска ({time.perf_counter() - started_at:.1f} с) сохранен в {args.profile}")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    arguments = parse_args()
+    if arguments.log_level:
+        logging.basicConfig(level=arguments.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if arguments.dry_run:
+        print(describe_config(arguments))
+    elif arguments.migrate_storage:
+        migrate_storage(deduplicate=arguments.dedup_vacancies)
+    else:
+        main(arguments)
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    """Экранирование значения метки по текстовому формату Prometheus"""
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    """Монотонный счетчик с метками"""
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def to_prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(key)} {value}" for key, value in self.values.items()]
+        return lines
+
+    def snapshot(self) -> dict:
+        return {_format_labels(key) or 'total': value for key, value in self.values.items()}
+
+
+class _HistogramSeries:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин и метками"""
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[LabelKey, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def time(self, **labels) -> '_Timer':
+        """Контекстный менеджер, измеряющий длительность блока"""
+        return _Timer(self, labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Оценка квантиля по верхней границе корзины"""
+        series = self.series.get(_label_key(labels))
+        if series is None or not series.count:
+            return None
+        rank = q * series.count
+        cumulative = 0
+        for index, count in enumerate(series.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def to_prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for key, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series.sum}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series.count}")
+        return lines
+
+    def snapshot(self) -> dict:
+        result = {}
+        for key, series in self.series.items():
+            labels = dict(key)
+            result[_format_labels(key) or 'total'] = {
+                "count": series.count,
+                "sum": series.sum,
+                "mean": series.sum / series.count if series.count else None,
+                "p50": self.quantile(0.5, **labels),
+                "p99": self.quantile(0.99, **labels),
+            }
+        return result
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started_at')
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter() - self.started_at, **self.labels)
+
+
+class MetricsRegistry:
+    """Реестр метрик; повторная регистрация с тем же именем возвращает существующую метрику"""
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, description))
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, description, buckets))
+
+    def to_prometheus(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.to_prometheus())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> dict:
+        return {"timestamp": time.time(), **{name: metric.snapshot() for name, metric in self.metrics.items()}}
+
+
+class MetricsExporter:
+    """
+    Периодически записывает метрики в файл: JSON снимок или текстовый формат
+    Prometheus (например, для textfile collector node_exporter)
+    """
+    def __init__(self, registry: 'MetricsRegistry', path: str, interval: float = 15.0, fmt: str = 'json'):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.fmt = fmt
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self):
+        if self.fmt == 'prometheus':
+            content = self.registry.to_prometheus()
+        else:
+            content = json.dumps(self.registry.snapshot(), ensure_ascii=False, default=str)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(content)
+        os.replace(tmp_path, self.path)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Ошибка записи метрик в {self.path}: {e!r}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает периодическую запись и сохраняет финальный снимок"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.write()
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, BigInteger, Column, Index, Integer, Text
+
+from db import Base
+
+
+class ScrapeDeadLetter(Base):
+    """Страница выдачи, которую не удалось загрузить или разобрать"""
+    __tablename__ = 'scrape_dead_letter'
+    __table_args__ = (
+        Index('uq_scrape_dead_letter_target_url', 'target_url', unique=True),
+        {'schema': 'public'},
+    )
+
+    row_id = Column(BigInteger, autoincrement=True, primary_key=True)
+    target_url = Column(Text, nullable=False)
+    city_vacancyname_key = Column(Text, nullable=False)
+    page = Column(Integer, nullable=False)
+    error_class = Column(Text, nullable=False)
+    error_message = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    redrive_count = Column(Integer, nullable=False, default=0)
+    run_id = Column(Text)
+    created_at = Column(TIMESTAMP(timezone=False), default=datetime.now, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=False), default=datetime.now, nullable=False)
+    resolved_at = Column(TIMESTAMP(timezone=False))
+
+    def __repr__(self):
+        return f"<ScrapeDeadLetter(key='{self.city_vacancyname_key}', page={self.page}, error='{self.error_class}')>"
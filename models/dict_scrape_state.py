@@ -0,0 +1,18 @@
+from sqlalchemy import TIMESTAMP, Column, Integer, Text
+
+from db import Base
+
+
+class DictScrapeState(Base):
+    """Время и результат последнего успешного сбора по записи словаря"""
+    __tablename__ = 'dict_city_vacancy_scrape_state'
+    __table_args__ = {'schema': 'public'}
+
+    city_vacancyname_key = Column(Text, primary_key=True)
+    last_scraped_at = Column(TIMESTAMP(timezone=False), nullable=False)
+    last_main_count = Column(Integer)
+    # Источник, чей mainCount сохранен: от него зависит число страниц для планировщика
+    last_main_source = Column(Text)
+
+    def __repr__(self):
+        return f"<DictScrapeState(key='{self.city_vacancyname_key}', last_scraped_at={self.last_scraped_at})>"
@@ -1,19 +1,46 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, BigInteger, Column, Text
+from sqlalchemy import TIMESTAMP, BigInteger, Column, Index, Text
 
 from db import Base
 
 
 class RawAvVacancy(Base):
+    """
+    Вакансии Avito, по строке на vacancy_id (при первом обнаружении).
+
+    Таблица секционирована по месяцам created_at. Уникальный индекс секционированной
+    таблицы обязан включать ключ секционирования, поэтому уникальность vacancy_id
+    обеспечивает отдельная таблица RawAvVacancyId.
+    """
     __tablename__ = 'raw_scrap_av_vacancy_faas_test'
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        Index('ix_raw_scrap_av_vacancy_faas_test_key_created_at', 'city_vacancyname_key', 'created_at'),
+        Index('ix_raw_scrap_av_vacancy_faas_test_vacancy_id', 'vacancy_id'),
+        Index('ix_raw_scrap_av_vacancy_faas_test_run_id', 'run_id'),
+        Index('ix_raw_scrap_av_vacancy_faas_test_created_at', 'created_at', postgresql_using='brin'),
+        {'schema': 'public', 'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
     row_id = Column(BigInteger, autoincrement=True, primary_key=True)
     vacancy_id = Column(BigInteger)
     vacancy_name = Column(Text, nullable=False)
     vacancy_url = Column(Text, nullable=False)
-    created_at = Column(TIMESTAMP(timezone=False), default=datetime.now(), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=False), default=datetime.now, primary_key=True, nullable=False)
+    city_vacancyname_key = Column(Text)
+    run_id = Column(Text)
 
     def __repr__(self):
         return f"<Vacancy(id={self.vacancy_id}, name='{self.vacancy_name}')>"
+
+
+class RawAvVacancyId(Base):
+    """Все когда-либо сохраненные vacancy_id (дедупликация для секционированной RawAvVacancy)"""
+    __tablename__ = 'raw_scrap_av_vacancy_faas_test_ids'
+    __table_args__ = {'schema': 'public'}
+
+    vacancy_id = Column(BigInteger, primary_key=True)
+    first_seen_at = Column(TIMESTAMP(timezone=False), nullable=False)
+
+    def __repr__(self):
+        return f"<VacancyId(id={self.vacancy_id}, first_seen_at={self.first_seen_at})>"
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, BigInteger, Column, Date, Index, Integer, Text
+
+from db import Base
+
+
+class RawHhVacancy(Base):
+    """Вакансии hh.ru, по строке на vacancy_id; схема и секционирование как у RawAvVacancy"""
+    __tablename__ = 'raw_scrap_hh_vacancy_faas'
+    __table_args__ = (
+        Index('ix_raw_scrap_hh_vacancy_faas_key_created_at', 'city_vacancyname_key', 'created_at'),
+        Index('ix_raw_scrap_hh_vacancy_faas_vacancy_id', 'vacancy_id'),
+        Index('ix_raw_scrap_hh_vacancy_faas_run_id', 'run_id'),
+        Index('ix_raw_scrap_hh_vacancy_faas_created_at', 'created_at', postgresql_using='brin'),
+        {'schema': 'public', 'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
+    row_id = Column(BigInteger, autoincrement=True, primary_key=True)
+    vacancy_id = Column(BigInteger)
+    vacancy_name = Column(Text, nullable=False)
+    vacancy_url = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=False), default=datetime.now, primary_key=True, nullable=False)
+    city_vacancyname_key = Column(Text)
+    run_id = Column(Text)
+
+    def __repr__(self):
+        return f"<HhVacancy(id={self.vacancy_id}, name='{self.vacancy_name}')>"
+
+
+class RawHhVacancyId(Base):
+    """Все когда-либо сохраненные vacancy_id hh.ru (дедупликация для RawHhVacancy)"""
+    __tablename__ = 'raw_scrap_hh_vacancy_faas_ids'
+    __table_args__ = {'schema': 'public'}
+
+    vacancy_id = Column(BigInteger, primary_key=True)
+    first_seen_at = Column(TIMESTAMP(timezone=False), nullable=False)
+
+    def __repr__(self):
+        return f"<HhVacancyId(id={self.vacancy_id}, first_seen_at={self.first_seen_at})>"
+
+
+class HhVacancyDailyStats(Base):
+    """Количество новых (впервые увиденных) вакансий hh.ru по записи словаря за день (как VacancyDailyStats)"""
+    __tablename__ = 'raw_hh_vacancy_daily_stats'
+    __table_args__ = (
+        Index('ix_raw_hh_vacancy_daily_stats_day', 'day'),
+        Index('ix_raw_hh_vacancy_daily_stats_id_hh_day', 'id_hh', 'day'),
+        {'schema': 'public'},
+    )
+
+    city_vacancyname_key = Column(Text, primary_key=True)
+    day = Column(Date, primary_key=True)
+    id_hh = Column(BigInteger)
+    vacancy_name = Column(Text)
+    new_vacancies_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP(timezone=False), nullable=False)
+
+    def __repr__(self):
+        return f"<HhVacancyDailyStats(key='{self.city_vacancyname_key}', day={self.day}, new={self.new_vacancies_count})>"
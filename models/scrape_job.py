@@ -0,0 +1,27 @@
+from sqlalchemy import TIMESTAMP, BigInteger, Column, Index, Integer, Text
+
+from db import Base
+
+
+class ScrapeJob(Base):
+    """Задание на сбор одной записи словаря в рамках прохода с арендой (lease) воркером"""
+    __tablename__ = 'dict_city_vacancy_scrape_job'
+    __table_args__ = (
+        Index('ix_dict_city_vacancy_scrape_job_claim', 'pass_id', 'status', 'lease_expires_at'),
+        {'schema': 'public'},
+    )
+
+    pass_id = Column(Text, primary_key=True)
+    city_vacancyname_key = Column(Text, primary_key=True)
+    id_av = Column(Text, nullable=False)
+    vacancy_name = Column(Text, nullable=False)
+    id_hh = Column(BigInteger)
+    status = Column(Text, nullable=False, default='pending')
+    worker_id = Column(Text)
+    lease_expires_at = Column(TIMESTAMP(timezone=False))
+    attempts = Column(Integer, nullable=False, default=0)
+    priority = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP(timezone=False))
+
+    def __repr__(self):
+        return f"<ScrapeJob(pass='{self.pass_id}', key='{self.city_vacancyname_key}', status='{self.status}')>"
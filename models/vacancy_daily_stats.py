@@ -0,0 +1,31 @@
+from sqlalchemy import TIMESTAMP, Column, Date, Index, Integer, Text
+
+from db import Base
+
+
+class VacancyDailyStats(Base):
+    """
+    Количество новых вакансий по записи словаря (город + вакансия) за день.
+
+    Вакансия считается один раз - в день и в записи словаря, где ее vacancy_id встретился
+    впервые (см. RawAvVacancyId); повторные появления в выдаче, в том числе по другим
+    запросам, не учитываются. Это не число собранных за день вакансий.
+    Пополняется при каждой записи пачки вакансий в RawAvVacancy,
+    чтобы отчеты не считали сырые строки.
+    """
+    __tablename__ = 'raw_av_vacancy_daily_stats'
+    __table_args__ = (
+        Index('ix_raw_av_vacancy_daily_stats_day', 'day'),
+        Index('ix_raw_av_vacancy_daily_stats_id_av_day', 'id_av', 'day'),
+        {'schema': 'public'},
+    )
+
+    city_vacancyname_key = Column(Text, primary_key=True)
+    day = Column(Date, primary_key=True)
+    id_av = Column(Text)
+    vacancy_name = Column(Text)
+    new_vacancies_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP(timezone=False), nullable=False)
+
+    def __repr__(self):
+        return f"<VacancyDailyStats(key='{self.city_vacancyname_key}', day={self.day}, new={self.new_vacancies_count})>"
@@ -0,0 +1,81 @@
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+from collections import Counter
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _coroutine_chain(coro) -> List[str]:
+    """Цепочка await корутины от внешней к внутренней в виде "функция (файл:строка)" """
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'ag_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        coro = (getattr(coro, 'cr_await', None) or getattr(coro, 'ag_await', None)
+                or getattr(coro, 'gi_yieldfrom', None))
+    return frames
+
+
+class AsyncStackSampler:
+    """
+    Сэмплирующий профайлер asyncio: с заданным интервалом снимает цепочки await
+    всех задач и считает, сколько раз каждая встретилась.
+
+    Показывает, где задачи проводят время в ожидании (семафоры, очереди, сеть),
+    чего не видно в cProfile. Результат - folded stacks ("задача;внешняя;...;внутренняя N"),
+    формат flamegraph.pl и speedscope.
+    """
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        current = asyncio.current_task()
+        while True:
+            await asyncio.sleep(self.interval)
+            self.sample_count += 1
+            for task in asyncio.all_tasks():
+                if task is current or task.done():
+                    continue
+                chain = _coroutine_chain(task.get_coro())
+                if chain:
+                    # Автоматические имена Task-N объединяются, иначе каждая задача - отдельный стек
+                    name = 'Task' if task.get_name().startswith('Task-') else task.get_name()
+                    self.samples[';'.join([name] + chain)] += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name='async-stack-sampler')
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def write(self, path: str):
+        with open(path, 'w') as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def write_cprofile(profiler: cProfile.Profile, path: str, top: int = 30) -> str:
+    """
+    Сохраняет статистику cProfile (pstats) в path, а текстовую сводку по cumulative time -
+    рядом, в path.txt. Возвращает путь к сводке
+    """
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(top)
+    summary_path = f"{path}.txt"
+    with open(summary_path, 'w') as file:
+        file.write(summary.getvalue())
+    return summary_path
@@ -0,0 +1,136 @@
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from db import DatabaseManager
+from models.dead_letter import ScrapeDeadLetter
+from repositories.retry_policy import RetryExhaustedError
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetter(NamedTuple):
+    """Неудачная страница выдачи"""
+    target_url: str
+    city_vacancyname_key: str
+    page: int
+    error_class: str
+    error_message: str
+    attempts: int
+
+    @classmethod
+    def from_error(cls, target_url: str, record_key: str, page: int, error: BaseException) -> 'DeadLetter':
+        """Запись по ошибке запроса; для RetryExhaustedError сохраняется класс последней ошибки"""
+        attempts = 1
+        if isinstance(error, RetryExhaustedError):
+            attempts = error.attempts
+            error = error.last_error
+        return cls(target_url, record_key, page, type(error).__name__, str(error)[:1000], attempts)
+
+
+class DeadLetterRepository:
+    """
+    Хранилище неудачных страниц для точечной повторной загрузки (re-drive).
+
+    Одна строка на target_url: повторная ошибка обновляет класс ошибки, суммирует
+    попытки и снимает отметку о решении; успешная повторная загрузка ставит resolved_at.
+    """
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+
+    def add_many(self, entries: Iterable[DeadLetter], run_id: Optional[str] = None, redrive: bool = False):
+        """
+        Сохраняет неудачные страницы
+
+        :param redrive: Ошибки получены при повторной загрузке (увеличивает redrive_count)
+        """
+        rows = self._merge_rows(entries, run_id)
+        if not rows:
+            return
+        statement = insert(ScrapeDeadLetter)
+        session: Session = self.db_manager.get_session()
+        try:
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=['target_url'],
+                    set_={
+                        "city_vacancyname_key": statement.excluded.city_vacancyname_key,
+                        "page": statement.excluded.page,
+                        "error_class": statement.excluded.error_class,
+                        "error_message": statement.excluded.error_message,
+                        "attempts": ScrapeDeadLetter.attempts + statement.excluded.attempts,
+                        "redrive_count": ScrapeDeadLetter.redrive_count + (1 if redrive else 0),
+                        "run_id": statement.excluded.run_id,
+                        "updated_at": statement.excluded.updated_at,
+                        "resolved_at": None,
+                    }
+                ),
+                rows
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Ошибка сохранения {len(rows)} неудачных страниц: {e!r}")
+        finally:
+            session.close()
+
+    @staticmethod
+    def _merge_rows(entries: Iterable[DeadLetter], run_id: Optional[str]) -> List[dict]:
+        """
+        Одна строка на target_url: INSERT ... ON CONFLICT не может обновить строку дважды за запрос.
+        Для повторов страницы остается последняя ошибка, попытки суммируются
+        """
+        now = datetime.now()
+        rows: Dict[str, dict] = {}
+        for entry in entries:
+            previous = rows.get(entry.target_url)
+            attempts = entry.attempts + (previous["attempts"] if previous else 0)
+            rows[entry.target_url] = {**entry._asdict(), "attempts": attempts, "run_id": run_id,
+                                      "created_at": now, "updated_at": now}
+        return list(rows.values())
+
+    def get_pending(self, limit: Optional[int] = None, max_redrives: Optional[int] = None,
+                    error_class: Optional[str] = None) -> List[DeadLetter]:
+        """
+        Нерешенные записи, сгруппированные по записи словаря
+
+        :param max_redrives: Пропускать записи, которые повторялись уже столько раз
+        :param error_class: Только записи с этим классом ошибки
+        """
+        query = select(
+            ScrapeDeadLetter.target_url, ScrapeDeadLetter.city_vacancyname_key, ScrapeDeadLetter.page,
+            ScrapeDeadLetter.error_class, ScrapeDeadLetter.error_message, ScrapeDeadLetter.attempts
+        ).where(ScrapeDeadLetter.resolved_at.is_(None))
+        if max_redrives is not None:
+            query = query.where(ScrapeDeadLetter.redrive_count < max_redrives)
+        if error_class is not None:
+            query = query.where(ScrapeDeadLetter.error_class == error_class)
+        query = query.order_by(ScrapeDeadLetter.city_vacancyname_key, ScrapeDeadLetter.page).limit(limit)
+
+        session: Session = self.db_manager.get_session()
+        try:
+            return [DeadLetter(*row) for row in session.execute(query)]
+        finally:
+            session.close()
+
+    def mark_resolved(self, target_urls: Iterable[str]):
+        target_urls = list(target_urls)
+        if not target_urls:
+            return
+        session: Session = self.db_manager.get_session()
+        try:
+            session.execute(
+                update(ScrapeDeadLetter)
+                .where(ScrapeDeadLetter.target_url.in_(target_urls), ScrapeDeadLetter.resolved_at.is_(None))
+                .values(resolved_at=func.now(), updated_at=func.now())
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Ошибка отметки {len(target_urls)} страниц как загруженных: {e!r}")
+        finally:
+            session.close()
@@ -1,9 +1,32 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
 
+from sqlalchemy import Select, Text, func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from db import DatabaseManager
 from models.dict_city_vacancy import DictCityVacancy
+from models.dict_scrape_state import DictScrapeState
+
+
+class DictCityVacancyRow(NamedTuple):
+    """Легковесная запись словаря: только поля, нужные скрапперу"""
+    city_vacancyname_key: str
+    id_av: str
+    vacancy_name: str
+    id_hh: Optional[int] = None
+
+
+class DictCityVacancyState(NamedTuple):
+    """Запись словаря с результатом последнего сбора (для планировщика)"""
+    city_vacancyname_key: str
+    id_av: str
+    vacancy_name: str
+    last_main_count: Optional[int]
+    last_scraped_at: Optional[datetime]
+    id_hh: Optional[int] = None
+    last_main_source: Optional[str] = None
 
 
 class DictCityVacancyRepository:
@@ -36,6 +59,146 @@ class DictCityVacancyRepository:
         finally:
             session.close()
 
+    @staticmethod
+    def records_query(client: Optional[str] = None, scraped_before: Optional[datetime] = None,
+                      with_state: bool = False, id_columns: Sequence[str] = ('id_av',)) -> Select:
+        """
+        Запрос (city_vacancyname_key, id_av, vacancy_name[, last_main_count, last_scraped_at], id_hh
+        [, last_main_source]) записей, у которых заполнен хотя бы один идентификатор из id_columns, с фильтрами
+
+        :param with_state: Добавить колонки last_main_count, last_scraped_at и last_main_source
+        :param id_columns: Колонки идентификаторов сайтов (dict_id_column источников)
+        """
+        columns = [DictCityVacancy.city_vacancyname_key, DictCityVacancy.id_av, DictCityVacancy.vacancy_name]
+        if with_state:
+            columns += [DictScrapeState.last_main_count, DictScrapeState.last_scraped_at]
+        columns.append(DictCityVacancy.id_hh)
+        if with_state:
+            columns.append(DictScrapeState.last_main_source)
+
+        conditions = []
+        for name in id_columns:
+            column = getattr(DictCityVacancy, name)
+            if isinstance(column.type, Text):
+                conditions.append((column != '') & column.isnot(None))
+            else:
+                conditions.append(column.isnot(None))
+        query = select(*columns).where(or_(*conditions))
+        if client is not None:
+            query = query.where(DictCityVacancy.client == client)
+        if with_state or scraped_before is not None:
+            query = query.outerjoin(
+                DictScrapeState,
+                DictScrapeState.city_vacancyname_key == DictCityVacancy.city_vacancyname_key
+            )
+        if scraped_before is not None:
+            query = query.where(
+                or_(DictScrapeState.last_scraped_at.is_(None), DictScrapeState.last_scraped_at < scraped_before)
+            )
+        return query
+
+    def iter_batches(
+        self,
+        batch_size: int = 1000,
+        client: Optional[str] = None,
+        scraped_before: Optional[datetime] = None,
+        with_state: bool = False,
+        id_columns: Sequence[str] = ('id_av',)
+    ) -> Iterator[List[Union[DictCityVacancyRow, DictCityVacancyState]]]:
+        """
+        Потоково читает записи с непустым идентификатором сайта пачками по batch_size.
+
+        Пагинация по ключу city_vacancyname_key (keyset): каждая пачка читается
+        отдельным коротким запросом по индексу первичного ключа, ORM объекты не создаются.
+
+        :param client: Только записи указанного клиента
+        :param scraped_before: Только записи, которые не собирались с этого момента (или никогда)
+        :param with_state: Отдавать DictCityVacancyState с результатом последнего сбора
+        :param id_columns: Колонки идентификаторов сайтов; достаточно одной заполненной
+        """
+        row_type = DictCityVacancyState if with_state else DictCityVacancyRow
+        query = self.records_query(client, scraped_before, with_state, id_columns)\
+            .order_by(DictCityVacancy.city_vacancyname_key)\
+            .limit(batch_size)
+
+        last_key = None
+        while True:
+            page_query = query if last_key is None else query.where(DictCityVacancy.city_vacancyname_key > last_key)
+            session: Session = self.db_manager.get_session()
+            try:
+                batch = [row_type(*row) for row in session.execute(page_query)]
+            finally:
+                session.close()
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            last_key = batch[-1].city_vacancyname_key
+
+    def iter_records(self, batch_size: int = 1000, client: Optional[str] = None,
+                     scraped_before: Optional[datetime] = None) -> Iterator[DictCityVacancyRow]:
+        """Потоковое чтение записей по одной (см. iter_batches)"""
+        for batch in self.iter_batches(batch_size, client, scraped_before):
+            yield from batch
+
+    def mark_scraped(self, keys: Iterable[str], scraped_at: Optional[datetime] = None,
+                     main_counts: Optional[Dict[str, Optional[int]]] = None,
+                     main_sources: Optional[Dict[str, str]] = None):
+        """
+        Запоминает время сбора для записей словаря
+
+        :param main_counts: mainCount записи при этом сборе (если неизвестен, сохраняется прежний)
+        :param main_sources: Имя источника, чей mainCount передан в main_counts
+        """
+        scraped_at = scraped_at or datetime.now()
+        main_counts = main_counts or {}
+        main_sources = main_sources or {}
+        rows = [
+            {"city_vacancyname_key": key, "last_scraped_at": scraped_at, "last_main_count": main_counts.get(key),
+             "last_main_source": main_sources.get(key)}
+            for key in keys
+        ]
+        if not rows:
+            return
+        session: Session = self.db_manager.get_session()
+        try:
+            statement = insert(DictScrapeState)
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=['city_vacancyname_key'],
+                    set_={
+                        "last_scraped_at": statement.excluded.last_scraped_at,
+                        "last_main_count": func.coalesce(
+                            statement.excluded.last_main_count, DictScrapeState.last_main_count
+                        ),
+                        "last_main_source": func.coalesce(
+                            statement.excluded.last_main_source, DictScrapeState.last_main_source
+                        ),
+                    }
+                ),
+                rows
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def ensure_scrape_state_schema(self):
+        """Добавляет в существующую таблицу состояния колонки, появившиеся позже"""
+        table = f"{DictScrapeState.__table__.schema}.{DictScrapeState.__tablename__}"
+        session: Session = self.db_manager.get_session()
+        try:
+            session.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS last_main_count INTEGER"))
+            session.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS last_main_source TEXT"))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     def add_record(self, record_data: dict) -> DictCityVacancy:
         """Добавление новой записи"""
         session: Session = self.db_manager.get_session()
@@ -1,11 +1,21 @@
 import asyncio
-import json
 import logging
-from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Literal, Optional, Tuple, Union
 
 import httpx
-from fake_useragent import UserAgent
-from ua_parser import user_agent_parser
+
+from metrics import DEFAULT_COUNT_BUCKETS, REGISTRY, MetricsRegistry
+from repositories.header_factory import HeaderFactory
+from repositories.http_codecs import JsonCodec, get_json_codec, supported_content_encodings
+from repositories.rate_control import AdaptiveLimiter
+from repositories.response_cache import DiskResponseCache
+from repositories.retry_policy import CircuitOpenError, ResponseValidationError, RetryExhaustedError, RetryPolicy
+
+# Статусы, которые означают перегрузку FaaS или целевого сайта
+OVERLOAD_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+RequestOrBatch = Union[Dict[str, Any], List[Dict[str, Any]]]
 
 
 class FaasRequester:
@@ -16,24 +26,59 @@ class FaasRequester:
         retry: int = 3,
         timeout: int = 10,
         log_level: int = logging.INFO,
-        max_concurrent: int = 10
+        max_concurrent: int = 10,
+        header_factory: Optional[HeaderFactory] = None,
+        adaptive_limiter: Optional[AdaptiveLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        response_cache: Optional[DiskResponseCache] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        http2: bool = False,
+        json_codec: Optional[JsonCodec] = None,
+        raw_response: bool = False
     ):
+        """
+        :param max_concurrent: Лимит одновременных запросов (начальный лимит в адаптивном режиме)
+        :param header_factory: Пул браузерных заголовков
+        :param adaptive_limiter: Адаптивный лимит параллелизма и частоты; если не задан,
+            используется фиксированный семафор на max_concurrent
+        :param retry_policy: Политика повторов; по умолчанию экспоненциальная задержка
+            с jitter и лимитом в retry попыток
+        :param response_cache: Дисковый кэш успешных (прошедших валидацию) ответов
+        :param metrics: Реестр метрик (по умолчанию общий metrics.REGISTRY)
+        :param transport: HTTP транспорт httpx (например, MockTransport для тестов и бенчмарков)
+        :param http2: Использовать HTTP/2 (запросы мультиплексируются в одном соединении, нужен пакет h2)
+        :param json_codec: Кодек JSON (по умолчанию orjson, если установлен, иначе стандартный json)
+        :param raw_response: Возвращать тело ответа как bytes без декодирования
+        """
         self.faas_url = faas_url.rstrip('/')
         self.faas_token = faas_token
         self.retry = retry
         self.timeout = timeout
         self.max_concurrent = max_concurrent
         self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.adaptive_limiter = adaptive_limiter
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=retry)
+        self.response_cache = response_cache
+        self.header_factory = header_factory or HeaderFactory()
+        self.http2 = http2
+        self.json_codec = json_codec or get_json_codec()
+        self.raw_response = raw_response
+        # Запрашиваем только те сжатия, которые httpx сможет распаковать
+        self.accept_encoding = ', '.join(supported_content_encodings())
 
         self._init_logger(log_level)
+        self._init_metrics(metrics or REGISTRY)
 
-        transport = httpx.AsyncHTTPTransport(retries=0)
+        max_connections = self.max_in_flight
+        transport = transport or httpx.AsyncHTTPTransport(retries=0, http2=http2)
         self.client = httpx.AsyncClient(
             timeout=timeout,
             transport=transport,
+            http2=http2,
             limits=httpx.Limits(
-                max_connections=max_concurrent,
-                max_keepalive_connections=max_concurrent
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
             )
         )
         self.logger.info(f"Инициализация FaasRequester для {self.faas_url}")
@@ -51,6 +96,38 @@ class FaasRequester:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
 
+    def _init_metrics(self, registry: MetricsRegistry):
+        self._requests_total = registry.counter(
+            'faas_http_requests_total', "HTTP запросы к FaaS по статусу ответа или классу ошибки")
+        self._request_seconds = registry.histogram(
+            'faas_http_request_seconds', "Длительность одного HTTP запроса к FaaS")
+        self._slot_wait_seconds = registry.histogram(
+            'faas_slot_wait_seconds', "Ожидание слота семафора или адаптивного лимита")
+        self._attempts = registry.histogram(
+            'faas_attempts_per_request', "Количество попыток на один логический запрос", DEFAULT_COUNT_BUCKETS)
+        self._outcomes_total = registry.counter(
+            'faas_request_outcomes_total', "Итоги логических запросов")
+        self._validation_failures_total = registry.counter(
+            'faas_validation_failures_total', "Ответы, не прошедшие валидацию")
+        self._cache_lookups_total = registry.counter(
+            'faas_cache_lookups_total', "Обращения к кэшу ответов")
+        self._batch_items_total = registry.counter(
+            'faas_batch_items_total', "URL в пакетных запросах по итогу первой попытки")
+
+    @property
+    def current_limit(self) -> int:
+        """Текущий лимит одновременных запросов"""
+        return self.adaptive_limiter.limit if self.adaptive_limiter else self.max_concurrent
+
+    @property
+    def max_in_flight(self) -> int:
+        """Максимально возможное число одновременных запросов"""
+        return max(self.max_concurrent, self.adaptive_limiter.max_limit) if self.adaptive_limiter else self.max_concurrent
+
+    def _report_overload(self):
+        if self.adaptive_limiter:
+            self.adaptive_limiter.on_overload()
+
     async def _make_request(
         self,
         method: str,
@@ -58,27 +135,42 @@ class FaasRequester:
         **kwargs
     ) -> Tuple[bool, Union[Dict[str, Any], str, Exception]]:
         """Выполняет один HTTP запрос"""
+        status = 'error'
+        started_at = None
+        wait_started_at = time.perf_counter()
         try:
-            async with self._semaphore:
+            async with self.adaptive_limiter or self._semaphore:
+                started_at = time.perf_counter()
+                self._slot_wait_seconds.observe(started_at - wait_started_at)
                 response = await self.client.request(method, url, **kwargs)
+                status = response.status_code
                 response.raise_for_status()
-
-                content_type = response.headers.get('content-type', '')
-                content_encoding = response.headers.get('content-encoding', '')
-                if 'application/json' in content_type and content_encoding != 'deflate':
-                    result = response.json()
-                elif 'application/json' in content_type and content_encoding == 'deflate':
-                    result = json.loads(response.content)
+                if self.adaptive_limiter:
+                    self.adaptive_limiter.on_success(time.perf_counter() - started_at)
+
+                # response.content уже распакован httpx (gzip/deflate/br/zstd)
+                if self.raw_response:
+                    result = response.content
+                elif 'application/json' in response.headers.get('content-type', ''):
+                    result = self.json_codec.loads(response.content)
                 else:
                     result = response.text
 
                 return True, result
         except httpx.HTTPStatusError as e:
+            if e.response.status_code in OVERLOAD_STATUS_CODES:
+                self._report_overload()
             return False, e
         except httpx.RequestError as e:
+            status = type(e).__name__
+            self._report_overload()
             return False, e
         except Exception as e:
             return False, e
+        finally:
+            if started_at is not None:
+                self._request_seconds.observe(time.perf_counter() - started_at)
+            self._requests_total.inc(status=status)
 
     async def _request_with_retry_and_validation(
         self,
@@ -90,61 +182,217 @@ class FaasRequester:
         **kwargs
     ) -> Tuple[bool, Union[Dict[str, Any], str, Exception]]:
         """Внутренний метод с повторными попытками и валидацией"""
-        success = False
-        result = None
-
-        for attempt in range(1, self.retry + 1):
+        policy = self.retry_policy
+        policy.on_request()
+        attempt = 0
+        error_attempts = 0
+        validation_attempts = 0
+
+        while True:
+            if not policy.allow_request():
+                self._outcomes_total.inc(outcome='circuit_open')
+                return False, CircuitOpenError(f"FaaS {self.faas_url} недоступен, запрос {target_url} отклонен")
+
+            attempt += 1
             success, result = await self._make_request(method, url, **kwargs)
+            policy.on_result(None if success else result)
 
             if success:
-                self.logger.info(f"Успешный ответ ({method} {target_url}): попытка {attempt}")
-                break
+                try:
+                    if response_validator is None or response_validator(result):
+                        # Логирование отдельных запросов - только на уровне DEBUG, чтобы не тормозить на объемах
+                        self.logger.debug("Успешный ответ (%s %s): попытка %s", method, target_url, attempt)
+                        self._attempts.observe(attempt)
+                        self._outcomes_total.inc(outcome='success')
+                        return True, result
+                    error = ResponseValidationError(f"Ответ не прошел валидацию ({target_url})")
+                except Exception as e:
+                    error = ResponseValidationError(f"Ошибка при валидации ответа ({target_url}): {e}")
+
+                self._report_overload()
+                self._validation_failures_total.inc()
+                validation_attempts += 1
+                self.logger.debug(
+                    "Ответ не прошел валидацию (%s %s): попытка %s/%s",
+                    method, target_url, validation_attempts, retry_validator
+                )
+                wait_time = policy.next_delay(error, validation_attempts, max_attempts=retry_validator)
             else:
-                error_msg = (result.response.status_code if isinstance(result, httpx.HTTPStatusError)
-                             else str(result))
-                self.logger.warning(
-                    f"Ошибка запроса ({method} {target_url}): {error_msg}, "
-                    f"попытка {attempt}/{self.retry}"
+                error = result
+                error_attempts += 1
+                self.logger.debug(
+                    "Ошибка запроса (%s %s): %s, попытка %s/%s",
+                    method, target_url,
+                    result.response.status_code if isinstance(result, httpx.HTTPStatusError) else result,
+                    error_attempts, policy.max_attempts
                 )
+                wait_time = policy.next_delay(error, error_attempts)
 
-                if attempt < self.retry:
-                    wait_time = min(1.0 * (attempt + 1), 5.0)
-                    await asyncio.sleep(wait_time)
+            if wait_time is None:
+                self._attempts.observe(attempt)
+                self._outcomes_total.inc(outcome='exhausted')
+                self.logger.warning(f"Запрос не удался ({method} {target_url}): {error!r}, попыток {attempt}")
+                return False, RetryExhaustedError(error, attempt)
+            await asyncio.sleep(wait_time)
 
-        if not success:
-            return False, result
+    async def execute_one(
+        self,
+        request: Dict[str, Any],
+        request_method: Literal["POST", "GET"],
+        response_validator: callable = None,
+        retry_validator: int = 5,
+        use_cache: bool = True
+    ) -> Tuple[Union[Dict[str, Any], str, Exception], Optional[str]]:
+        """
+        Выполняет один запрос с повторными попытками и валидацией
 
-        if response_validator is None:
-            return True, result
+        :param request: Словарь с параметрами запроса
+        :param request_method: Тип запроса ("POST" или "GET")
+        :param response_validator: Функция для валидации ответа (callable или None) -> bool
+        :param retry_validator: Количество циклов повторных попыток при неудачной валидации
+        :param use_cache: Искать ответ в кэше (False - всегда запрашивать FaaS, свежий ответ обновит кэш)
+        :return: Кортеж (результат или исключение, target_url)
+        """
+        url = f"{self.faas_url}/{request.get('endpoint', '').lstrip('/')}".rstrip('/')
+
+        if request_method == "POST":
+            payload = {"content": self.json_codec.dumps(request.get("json", {}))}
+        elif request_method == "GET":
+            payload = {"params": request.get("params", {})}
+        else:
+            raise ValueError(f"Неподдерживаемый тип запроса: {request_method}")
+
+        cache_key = None
+        if self.response_cache is not None:
+            key_payload = {"json": request.get("json", {})} if request_method == "POST" else payload
+            cache_key = self.response_cache.make_key(request_method, url, key_payload)
+            found, cached = await self._get_cached(cache_key, response_validator) if use_cache else (False, None)
+            if found:
+                return cached, request.get("target_url", None)
+
+        success, result = await self._request_with_retry_and_validation(
+            method=request_method,
+            url=url,
+            target_url=request.get("target_url", None),
+            response_validator=response_validator,
+            retry_validator=retry_validator,
+            headers=self._prepare_headers(request.get("headers"), request.get("target_url")),
+            **payload,
+        )
+        if success and cache_key is not None and not isinstance(result, bytes):
+            await self.response_cache.set(cache_key, result)
+        return result, request.get("target_url", None)
+
+    def _cache_key(self, request: Dict[str, Any], request_method: str) -> str:
+        url = f"{self.faas_url}/{request.get('endpoint', '').lstrip('/')}".rstrip('/')
+        return self.response_cache.make_key(request_method, url, {"json": request.get("json", {})})
+
+    async def _get_cached(self, cache_key: str, response_validator: Optional[callable]) -> Tuple[bool, Any]:
+        """Ответ из кэша проходит ту же валидацию, что и ответ FaaS; непрошедший удаляется из кэша"""
+        found, cached = await self.response_cache.get(cache_key)
+        if found and not self._is_valid_item(cached, response_validator):
+            await self.response_cache.delete(cache_key)
+            self._cache_lookups_total.inc(result='invalid')
+            return False, None
+        self._cache_lookups_total.inc(result='hit' if found else 'miss')
+        return found, cached
+
+    async def evict_cached(self, request: Dict[str, Any]):
+        """
+        Удаляет из кэша ответ на POST-запрос, если он оказался непригодным уже после валидации
+        (например, страница прошла быструю проверку, но не разобралась)
+        """
+        if self.response_cache is not None:
+            await self.response_cache.delete(self._cache_key(request, "POST"))
 
-        for attempt in range(1, retry_validator + 1):
-            try:
-                if response_validator(result):
-                    self.logger.info(f"Успешная валидация ({method} {target_url}): попытка {attempt}")
-                    return True, result
-                else:
-                    self.logger.warning(
-                        f"Ответ не прошел валидацию ({method} {target_url}): "
-                        f"попытка {attempt}/{retry_validator}"
-                    )
-            except Exception as e:
-                self.logger.warning(
-                    f"Ошибка при валидации ответа ({method} {target_url}): "
-                    f"{str(e)}, попытка {attempt}/{retry_validator}"
-                )
+    async def execute_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        response_validator: callable = None,
+        retry_validator: int = 5,
+        endpoint: str = '',
+        timeout: Optional[float] = None,
+        use_cache: bool = True
+    ) -> List[Tuple[Union[Dict[str, Any], str, Exception], Optional[str]]]:
+        """
+        Выполняет несколько запросов одним пакетным POST к FaaS
 
-            success, result = await self._make_request(method, url, **kwargs)
+        Тело запроса - {"urls": [...]} из поля json.url каждого запроса, ответ -
+        {"results": [{"url": ..., "text": ...} | {"url": ..., "error": ..., "status": ...}]}.
+        Элементы с ошибкой или не прошедшие валидацию повторяются по одному через execute_one.
 
+        :param requests: Список словарей с параметрами запросов (json.url и target_url)
+        :param response_validator: Функция для валидации ответа по одному URL (callable или None) -> bool
+        :param retry_validator: Количество циклов повторных попыток при неудачной валидации
+        :param endpoint: Путь пакетного обработчика FaaS
+        :param timeout: Таймаут пакетного запроса (по умолчанию общий timeout)
+        :param use_cache: Искать ответы в кэше (False - всегда запрашивать FaaS)
+        :return: Список кортежей (результат или исключение, target_url) в порядке requests
+        """
+        results: List[Optional[Tuple]] = [None] * len(requests)
+        batch: Dict[str, List[int]] = {}
+        for index, request in enumerate(requests):
+            if self.response_cache is not None and use_cache:
+                found, cached = await self._get_cached(self._cache_key(request, "POST"), response_validator)
+                if found:
+                    results[index] = (cached, request.get("target_url"))
+                    continue
+            batch.setdefault(request.get("json", {}).get("url"), []).append(index)
+
+        retry_indexes: List[int] = []
+        if batch:
+            url = f"{self.faas_url}/{endpoint.lstrip('/')}".rstrip('/')
+            kwargs = {"timeout": timeout} if timeout is not None else {}
+            success, envelope = await self._request_with_retry_and_validation(
+                method="POST",
+                url=url,
+                target_url=f"<batch of {len(batch)}>",
+                response_validator=None,
+                retry_validator=retry_validator,
+                headers=self._prepare_headers(),
+                content=self.json_codec.dumps({"urls": list(batch)}),
+                **kwargs
+            )
             if not success:
-                self.logger.warning(
-                    f"Ошибка при повторном запросе валидации ({method} {target_url}): "
-                    f"попытка {attempt}/{retry_validator}"
-                )
-
-            wait_time = min(1.0 * (attempt + 1), 5.0)
-            await asyncio.sleep(wait_time)
-
-        return False, result
+                for indexes in batch.values():
+                    for index in indexes:
+                        results[index] = (envelope, requests[index].get("target_url"))
+                return results
+
+            items = envelope.get("results", []) if isinstance(envelope, dict) else []
+            for item in items:
+                indexes = batch.pop(item.get("url"), None) if isinstance(item, dict) else None
+                if not indexes:
+                    continue
+                if item.get("error") is not None or not self._is_valid_item(item, response_validator):
+                    retry_indexes.extend(indexes)
+                    continue
+                self._batch_items_total.inc(len(indexes), result='ok')
+                item = {key: value for key, value in item.items() if key != "url"}
+                for index in indexes:
+                    results[index] = (item if len(indexes) == 1 else dict(item), requests[index].get("target_url"))
+                if self.response_cache is not None:
+                    await self.response_cache.set(self._cache_key(requests[indexes[0]], "POST"), item)
+            # URL, которых нет в ответе, тоже повторяются по одному
+            for indexes in batch.values():
+                retry_indexes.extend(indexes)
+
+        if retry_indexes:
+            self._batch_items_total.inc(len(retry_indexes), result='retried')
+            retried = await asyncio.gather(*(
+                self.execute_one(requests[index], "POST", response_validator, retry_validator, use_cache)
+                for index in retry_indexes
+            ))
+            for index, result in zip(retry_indexes, retried):
+                results[index] = result
+        return results
+
+    @staticmethod
+    def _is_valid_item(item: Dict[str, Any], response_validator: Optional[callable]) -> bool:
+        try:
+            return response_validator is None or bool(response_validator(item))
+        except Exception:
+            return False
 
     async def execute_concurrently(
         self,
@@ -152,7 +400,7 @@ class FaasRequester:
         request_method: Literal["POST", "GET"],
         response_validator: callable = None,
         retry_validator: int = 5
-    ) -> List[Union[Dict[str, Any], str, Exception]]:
+    ) -> List[Tuple[Union[Dict[str, Any], str, Exception], Optional[str]]]:
         """
         Выполняет несколько запросов с повторными попытками и валидацией
 
@@ -160,75 +408,118 @@ class FaasRequester:
         :param request_method: Тип запроса ("POST" или "GET")
         :param response_validator: Функция для валидации ответа (callable или None) -> bool
         :param retry_validator: Количество циклов повторных попыток при неудачной валидации
-        :return: Список результатов или исключений
+        :return: Список кортежей (результат или исключение, target_url)
         """
-        tasks = []
-        for req in requests:
-            url = f"{self.faas_url}/{req.get('endpoint', '').lstrip('/')}".rstrip('/')
-
-            if request_method == "POST":
-                task = self._request_with_retry_and_validation(
-                    method=request_method,
-                    url=url,
-                    target_url=req.get("target_url", None),
-                    response_validator=response_validator,
-                    retry_validator=retry_validator,
-                    headers=await self._prepare_headers(req.get("headers")),
-                    json=req.get("json", {}),
-                )
-            elif request_method == "GET":
-                task = self._request_with_retry_and_validation(
-                    method=request_method,
-                    url=url,
-                    target_url=req.get("target_url", None),
-                    response_validator=response_validator,
-                    retry_validator=retry_validator,
-                    headers=await self._prepare_headers(req.get("headers")),
-                    params=req.get("params", {}),
-                )
-            tasks.append(task)
+        tasks = [
+            self.execute_one(req, request_method, response_validator, retry_validator)
+            for req in requests
+        ]
+        return list(await asyncio.gather(*tasks))
+
+    async def iter_concurrently(
+        self,
+        requests: Union[Iterable[RequestOrBatch], AsyncIterable[RequestOrBatch]],
+        request_method: Literal["POST", "GET"],
+        response_validator: callable = None,
+        retry_validator: int = 5,
+        max_in_flight: Optional[int] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Tuple[Union[Dict[str, Any], str, Exception], Optional[str]]]:
+        """
+        Выполняет запросы из (асинхронного) итератора и отдает результаты по мере готовности
 
-        results = await asyncio.gather(*tasks)
-        return [(result[1], req.get("target_url", None)) for result in results]
+        Одновременно выполняется не больше max_in_flight запросов; следующий запрос
+        берется из источника, как только освобождается место. Источник может ожидать
+        новые запросы, пока потребитель обрабатывает уже полученные результаты.
+        Список словарей из источника выполняется одним пакетным запросом (execute_batch),
+        результаты по нему отдаются по одному.
 
-    async def _prepare_headers(self, additional_headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
-        """Подготавливает заголовки запроса"""
-        base_headers = {
+        :param requests: Итерируемый или асинхронно итерируемый источник словарей с параметрами
+            запросов или списков таких словарей (только POST)
+        :param request_method: Тип запроса ("POST" или "GET")
+        :param response_validator: Функция для валидации ответа (callable или None) -> bool
+        :param retry_validator: Количество циклов повторных попыток при неудачной валидации
+        :param max_in_flight: Лимит одновременно выполняемых запросов (по умолчанию 2 * max_in_flight)
+        :param use_cache: Искать ответы в кэше (False - всегда запрашивать FaaS)
+        :return: Асинхронный итератор кортежей (результат или исключение, target_url)
+        """
+        max_in_flight = max_in_flight or self.max_in_flight * 2
+        source = requests.__aiter__() if hasattr(requests, '__aiter__') else self._aiter(requests)
+        next_request: Optional[asyncio.Future] = None
+        exhausted = False
+        pending = set()
+
+        try:
+            while True:
+                if next_request is None and not exhausted and len(pending) < max_in_flight:
+                    next_request = asyncio.ensure_future(source.__anext__())
+
+                waiting = pending | {next_request} if next_request else pending
+                if not waiting:
+                    return
+
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if next_request in done:
+                    done.discard(next_request)
+                    try:
+                        request = next_request.result()
+                        if isinstance(request, list):
+                            task = self.execute_batch(request, response_validator, retry_validator,
+                                                      use_cache=use_cache)
+                        else:
+                            task = self.execute_one(request, request_method, response_validator, retry_validator,
+                                                    use_cache)
+                        pending.add(asyncio.ensure_future(task))
+                    except StopAsyncIteration:
+                        exhausted = True
+                    next_request = None
+
+                for task in done:
+                    pending.discard(task)
+                    result = task.result()
+                    if isinstance(result, list):
+                        for item in result:
+                            yield item
+                    else:
+                        yield result
+        finally:
+            for task in pending | ({next_request} if next_request else set()):
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    async def _aiter(iterable: Iterable):
+        for item in iterable:
+            yield item
+
+    def _prepare_headers(
+        self,
+        additional_headers: Optional[Dict[str, str]] = None,
+        target_url: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Подготавливает заголовки запроса из заранее собранного пула"""
+        headers = {
             "accept": "application/json, text/plain, */*",
             "content-type": "application/json",
-            "accept-encoding": "gzip, deflate, br, zstd",
+            "accept-encoding": self.accept_encoding,
+            **self.header_factory.get(target_url),
         }
 
-        try:
-            ua = UserAgent()
-            user_agent = ua.chrome
-            parsed_ua = user_agent_parser.Parse(user_agent)
-
-            platform = parsed_ua.get("os", {}).get("family", "Windows")
-            version = parsed_ua.get("user_agent", {}).get("major", "120")
-
-            headers = {
-                **base_headers,
-                "User-Agent": user_agent,
-                "Sec-Ch-Ua-Platform": f'"{platform}"',
-                "Sec-Ch-Ua": f'"Google Chrome";v="{version}", "Chromium";v="{version}", "Not/A)Brand";v="24"',
-            }
+        if self.faas_token:
+            headers["Authorization"] = f"Bearer {self.faas_token}"
 
-            if self.faas_token:
-                headers["Authorization"] = f"Bearer {self.faas_token}"
+        if additional_headers:
+            headers.update(additional_headers)
 
-            if additional_headers:
-                headers.update(additional_headers)
-
-            return headers
-
-        except Exception as e:
-            self.logger.error(f"Ошибка при создании заголовков: {str(e)}")
-            return base_headers
+        return headers
 
     async def close(self):
         """Закрывает HTTP клиент."""
         await self.client.aclose()
+        if self.response_cache is not None:
+            self.response_cache.close()
         self.logger.info("HTTP клиент успешно закрыт")
 
     async def __aenter__(self):
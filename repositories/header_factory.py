@@ -0,0 +1,80 @@
+import itertools
+import logging
+import random
+import zlib
+from typing import Dict, List, Literal, Optional
+from urllib.parse import urlsplit
+
+from fake_useragent import UserAgent
+from ua_parser import user_agent_parser
+
+logger = logging.getLogger(__name__)
+
+
+class HeaderFactory:
+    """
+    Пул согласованных наборов заголовков браузера (User-Agent, Sec-Ch-Ua, платформа).
+
+    Данные fake_useragent загружаются и разбираются один раз при первом обращении,
+    дальше наборы выдаются по кругу или случайно. При sticky_hosts каждый хост
+    получает один и тот же набор на все запросы.
+    """
+    def __init__(
+        self,
+        pool_size: int = 50,
+        strategy: Literal["round_robin", "random"] = "round_robin",
+        sticky_hosts: bool = False
+    ):
+        self.pool_size = pool_size
+        self.strategy = strategy
+        self.sticky_hosts = sticky_hosts
+        self._pool: Optional[List[Dict[str, str]]] = None
+        self._cycle = None
+
+    def _build_pool(self) -> List[Dict[str, str]]:
+        pool: Dict[str, Dict[str, str]] = {}
+        try:
+            ua = UserAgent()
+            for _ in range(self.pool_size * 3):
+                if len(pool) >= self.pool_size:
+                    break
+                user_agent = ua.chrome
+                if user_agent in pool:
+                    continue
+                pool[user_agent] = self._make_headers(user_agent)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке User-Agent: {str(e)}")
+        return list(pool.values())
+
+    @staticmethod
+    def _make_headers(user_agent: str) -> Dict[str, str]:
+        parsed_ua = user_agent_parser.Parse(user_agent)
+
+        platform = parsed_ua.get("os", {}).get("family", "Windows")
+        version = parsed_ua.get("user_agent", {}).get("major", "120")
+
+        return {
+            "User-Agent": user_agent,
+            "Sec-Ch-Ua-Platform": f'"{platform}"',
+            "Sec-Ch-Ua": f'"Google Chrome";v="{version}", "Chromium";v="{version}", "Not/A)Brand";v="24"',
+        }
+
+    @property
+    def pool(self) -> List[Dict[str, str]]:
+        if self._pool is None:
+            self._pool = self._build_pool()
+            self._cycle = itertools.cycle(self._pool)
+        return self._pool
+
+    def get(self, target_url: Optional[str] = None) -> Dict[str, str]:
+        """Возвращает набор браузерных заголовков (пустой, если пул не удалось собрать)"""
+        pool = self.pool
+        if not pool:
+            return {}
+
+        if self.sticky_hosts and target_url:
+            host = urlsplit(target_url).hostname or target_url
+            return pool[zlib.crc32(host.encode()) % len(pool)]
+        if self.strategy == "random":
+            return random.choice(pool)
+        return next(self._cycle)
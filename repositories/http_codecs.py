@@ -0,0 +1,66 @@
+import importlib.util
+import json
+from typing import Any, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class StdlibJsonCodec:
+    """JSON через стандартный модуль json"""
+    name = 'json'
+
+    @staticmethod
+    def loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class OrjsonJsonCodec:
+    """JSON через orjson: разбирает bytes без промежуточной строки"""
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("Для OrjsonJsonCodec нужен пакет orjson (pip install orjson)")
+
+    @staticmethod
+    def loads(data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+
+JsonCodec = Union[StdlibJsonCodec, OrjsonJsonCodec]
+
+
+def get_json_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Возвращает JSON кодек по имени ('json' или 'orjson');
+    без имени - orjson, если установлен, иначе стандартный json
+    """
+    if name == 'json' or (name is None and orjson is None):
+        return StdlibJsonCodec()
+    if name in (None, 'orjson'):
+        return OrjsonJsonCodec()
+    raise ValueError(f"Неизвестный JSON кодек: {name}")
+
+
+def supported_content_encodings() -> Tuple[str, ...]:
+    """
+    Сжатия ответа, которые httpx может распаковать в текущем окружении:
+    br - при установленном brotli/brotlicffi, zstd - при установленном zstandard
+    """
+    encodings = ['gzip', 'deflate']
+    if importlib.util.find_spec('brotli') or importlib.util.find_spec('brotlicffi'):
+        encodings.append('br')
+    if importlib.util.find_spec('zstandard'):
+        encodings.append('zstd')
+    return tuple(encodings)
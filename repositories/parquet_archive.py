@@ -0,0 +1,200 @@
+import itertools
+import logging
+import os
+import uuid
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from repositories.vacancy_batch import VacancyBatch
+from scrappers.page_parser import DETAIL_FIELDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+if TYPE_CHECKING:
+    import pandas
+
+logger = logging.getLogger(__name__)
+
+# Каталоги архива: <root>/scraped_date=YYYY-MM-DD/<run_id>-<suffix>.parquet
+PARTITION_COLUMN = 'scraped_date'
+
+_EMPTY_DETAILS = (None,) * len(DETAIL_FIELDS)
+
+
+def _archive_schema():
+    return pa.schema([
+        ('vacancy_id', pa.int64()),
+        ('vacancy_name', pa.string()),
+        ('vacancy_url', pa.string()),
+        ('city_vacancyname_key', pa.string()),
+        ('run_id', pa.string()),
+        ('source', pa.string()),
+        ('scraped_at', pa.timestamp('ms')),
+        ('price_value', pa.int64()),
+        ('price_text', pa.string()),
+        ('location_name', pa.string()),
+        ('sort_timestamp', pa.timestamp('ms')),
+        ('description', pa.string()),
+    ])
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Для архива Parquet нужен пакет pyarrow (pip install pyarrow)")
+
+
+class ParquetVacancyArchive:
+    """
+    Архив вакансий в Parquet, секционированный по дате сбора (scraped_date=YYYY-MM-DD).
+
+    В отличие от AvVacancyRepository сохраняет все вакансии запуска, включая уже известные,
+    вместе с дополнительными полями выдачи (DETAIL_FIELDS). Строки копятся в колонках
+    до row_group_size и дописываются группой строк в открытый файл, поэтому в памяти
+    не больше одной группы. Файл пишется под именем с "_" (такие файлы не читаются
+    read_archive) и получает итоговое имя при закрытии - при смене даты и в close().
+    Методы синхронные, вызываются из потока записи AsyncVacancyWriter.
+    """
+    def __init__(
+        self,
+        root: str,
+        run_id: Optional[str] = None,
+        row_group_size: int = 50_000,
+        compression: Optional[str] = 'zstd'
+    ):
+        """
+        :param root: Корневой каталог архива
+        :param run_id: Идентификатор запуска (сохраняется в колонке run_id и в имени файла)
+        :param row_group_size: Строк в группе строк Parquet и в буфере
+        :param compression: Кодек сжатия (zstd, snappy, gzip или None)
+        """
+        _require_pyarrow()
+        self.root = root
+        self.run_id = run_id
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = _archive_schema()
+        self.rows_written = 0
+        self.files_written: List[str] = []
+        self._columns: Dict[str, list] = {name: [] for name in self.schema.names}
+        self._date: Optional[date] = None
+        self._writer = None
+        self._path: Optional[str] = None
+
+    def write(self, batch: VacancyBatch, scraped_at: Optional[datetime] = None):
+        """Добавляет вакансии пачки; ключи записей словаря берутся из batch.keys"""
+        if not batch:
+            return
+        scraped_at = scraped_at or datetime.now()
+        if scraped_at.date() != self._date:
+            self._close_file()
+            self._date = scraped_at.date()
+
+        columns = self._columns
+        details = batch.details if batch.details is not None else itertools.repeat(None)
+        for (vacancy_id, name, url), key, item_details in zip(batch, batch.keys, details):
+            price_value, price_text, location_name, sort_timestamp, description = item_details or _EMPTY_DETAILS
+            columns['vacancy_id'].append(vacancy_id)
+            columns['vacancy_name'].append(name)
+            columns['vacancy_url'].append(url)
+            columns['city_vacancyname_key'].append(key)
+            columns['run_id'].append(self.run_id)
+            columns['source'].append(batch.source)
+            columns['scraped_at'].append(scraped_at)
+            columns['price_value'].append(_to_int(price_value))
+            columns['price_text'].append(price_text)
+            columns['location_name'].append(location_name)
+            columns['sort_timestamp'].append(_to_int(sort_timestamp))
+            columns['description'].append(description)
+
+        if len(columns['vacancy_id']) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        rows = len(self._columns['vacancy_id'])
+        if not rows:
+            return
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        if self._writer is None:
+            directory = os.path.join(self.root, f"{PARTITION_COLUMN}={self._date.isoformat()}")
+            os.makedirs(directory, exist_ok=True)
+            self._path = os.path.join(directory, f"{self.run_id or 'run'}-{uuid.uuid4().hex[:8]}.parquet")
+            self._writer = pq.ParquetWriter(
+                self._in_progress_path(self._path),
+                self.schema,
+                compression=self.compression,
+                use_dictionary=[
+                    'vacancy_name', 'city_vacancyname_key', 'run_id', 'source', 'price_text', 'location_name'
+                ]
+            )
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows_written += rows
+        self._columns = {name: [] for name in self.schema.names}
+
+    @staticmethod
+    def _in_progress_path(path: str) -> str:
+        directory, name = os.path.split(path)
+        return os.path.join(directory, f"_{name}")
+
+    def _close_file(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._in_progress_path(self._path), self._path)
+            self.files_written.append(self._path)
+            logger.info(f"Архив Parquet: записан {self._path}")
+            self._writer = None
+            self._path = None
+
+    def close(self):
+        """Дописывает буфер и закрывает текущий файл"""
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_archive(
+    root: str,
+    columns: Optional[Sequence[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    filters: Optional[List[Tuple[str, str, object]]] = None
+) -> 'pandas.DataFrame':
+    """
+    Загружает из архива выбранные колонки в pandas.DataFrame
+
+    Читаются только нужные колонки и только каталоги scraped_date из [date_from, date_to].
+
+    :param columns: Колонки (по умолчанию все, включая scraped_date)
+    :param filters: Дополнительные условия (колонка, оператор, значение), например ('price_value', '>=', 50000)
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(
+        root,
+        schema=_archive_schema().append(pa.field(PARTITION_COLUMN, pa.string())),
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive')
+    )
+
+    conditions = list(filters or [])
+    if date_from is not None:
+        conditions.append((PARTITION_COLUMN, '>=', date_from.isoformat()))
+    if date_to is not None:
+        conditions.append((PARTITION_COLUMN, '<=', date_to.isoformat()))
+    expression = pq.filters_to_expression(conditions) if conditions else None
+    return dataset.to_table(columns=list(columns) if columns else None, filter=expression).to_pandas()
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов (token bucket) с изменяемой скоростью"""
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        :param rate: Скорость пополнения, запросов в секунду
+        :param capacity: Максимальный запас токенов (по умолчанию равен rate)
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def set_rate(self, rate: float):
+        self._refill()
+        self.rate = rate
+
+    async def acquire(self):
+        """Ждет появления токена и забирает его"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+    """
+    Адаптивный лимит параллелизма (AIMD) с опциональным token bucket.
+
+    Успешные ответы увеличивают лимит аддитивно (примерно +1 за "окно" из limit запросов),
+    перегрузка (429/5xx, таймауты, непрошедшая валидация) и рост задержки выше
+    latency_tolerance * базовая задержка уменьшают его мультипликативно.
+    Скорость token bucket, если задана, меняется по тем же правилам.
+    """
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        cooldown: float = 1.0,
+        rate_limit: Optional[float] = None,
+        min_rate: float = 1.0
+    ):
+        """
+        :param initial_limit: Начальный лимит одновременных запросов
+        :param min_limit: Нижняя граница лимита
+        :param max_limit: Верхняя граница лимита
+        :param backoff_ratio: Множитель лимита при перегрузке
+        :param latency_tolerance: Во сколько раз задержка может превысить базовую до снижения лимита
+        :param cooldown: Минимальный интервал (сек) между снижениями лимита
+        :param rate_limit: Максимальная частота запросов в секунду (None - без ограничения)
+        :param min_rate: Нижняя граница частоты запросов
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.max_rate = rate_limit
+        self.min_rate = min(min_rate, rate_limit) if rate_limit else min_rate
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._bucket = TokenBucket(rate_limit) if rate_limit else None
+        self._base_latency: Optional[float] = None
+        self._recent_latency: Optional[float] = None
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Текущий лимит одновременных запросов"""
+        return int(self._limit)
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Текущая частота запросов в секунду (None - без ограничения)"""
+        return self._bucket.rate if self._bucket else None
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        if self._bucket:
+            try:
+                await self._bucket.acquire()
+            except BaseException:
+                await self.release()
+                raise
+
+    async def release(self):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+    def on_success(self, latency: float):
+        """Учитывает успешный ответ и его задержку"""
+        self._recent_latency = latency if self._recent_latency is None else 0.8 * self._recent_latency + 0.2 * latency
+        if self._base_latency is None or latency < self._base_latency:
+            self._base_latency = latency
+        else:
+            # Базовая задержка медленно "забывается", чтобы следовать за сменой условий
+            self._base_latency += (latency - self._base_latency) * 0.01
+
+        if self._recent_latency > self._base_latency * self.latency_tolerance:
+            self._decrease()
+            return
+
+        self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        if self._bucket and self.max_rate:
+            self._bucket.set_rate(min(self.max_rate, self._bucket.rate + 1 / self._limit))
+
+    def on_overload(self):
+        """Учитывает признак перегрузки: 429/5xx, таймаут или непрошедшую валидацию"""
+        self._decrease()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        if self._bucket:
+            self._bucket.set_rate(max(self.min_rate, self._bucket.rate * self.backoff_ratio))
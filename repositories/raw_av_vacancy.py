@@ -1,25 +1,65 @@
+import io
 import logging
-from typing import Dict, List, Optional
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
+from sqlalchemy import select, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from db import DatabaseManager
-from models.raw_av_vacancy import RawAvVacancy
+from models.dict_city_vacancy import DictCityVacancy
+from models.raw_av_vacancy import RawAvVacancy, RawAvVacancyId
+from models.vacancy_daily_stats import VacancyDailyStats
+from repositories.vacancy_batch import VacancyBatch
 
 logger = logging.getLogger(__name__)
 
+COPY_COLUMNS = ('vacancy_id', 'vacancy_name', 'vacancy_url', 'created_at', 'city_vacancyname_key', 'run_id')
+LEGACY_SUFFIX = '_legacy'
+
+
+def _table_name(model) -> str:
+    return f"{model.__table__.schema}.{model.__tablename__}"
+
+
+def _month_start(moment: Union[date, datetime]) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _copy_value(value) -> str:
+    """Экранирует значение для текстового формата COPY"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
 
 class AvVacancyRepository:
-    """Репозиторий для работы с вакансиями"""
+    """
+    Репозиторий для работы с вакансиями Avito.
+
+    Таблицы задаются атрибутами класса, поэтому вакансии другого источника
+    хранятся так же в своих таблицах (см. HhVacancyRepository).
+    """
+    model = RawAvVacancy
+    id_model = RawAvVacancyId
+    stats_model = VacancyDailyStats
+    # Колонка словаря, которая копируется в дневную статистику
+    dict_id_column = 'id_av'
+
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
 
-    def insert_vacancy(self, vacancy_data: Dict) -> Optional[RawAvVacancy]:
+    def insert_vacancy(self, vacancy_data: Dict):
         """Добавление новой вакансии"""
         session: Session = self.db_manager.get_session()
         try:
-            vacancy = RawAvVacancy(**vacancy_data)
+            vacancy = self.model(**vacancy_data)
             session.add(vacancy)
             session.commit()
             session.refresh(vacancy)
@@ -31,16 +71,264 @@ class AvVacancyRepository:
         finally:
             session.close()
 
-    def bulk_insert(self, vacancies: List[Dict]) -> bool:
-        """Массовое добавление вакансий"""
+    def bulk_insert(self, vacancies: List[Dict], run_id: Optional[str] = None) -> bool:
+        """Массовое добавление вакансий (через copy_upsert)"""
+        return self.copy_upsert(self.deduplicate(vacancies), run_id) is not None
+
+    def iter_vacancy_ids(self, batch_size: int = 100_000) -> Iterator[int]:
+        """Потоково отдает все vacancy_id по возрастанию (серверный курсор, без ORM объектов)"""
+        session: Session = self.db_manager.get_session()
+        try:
+            result = session.execute(
+                select(self.id_model.vacancy_id)
+                .order_by(self.id_model.vacancy_id)
+                .execution_options(yield_per=batch_size)
+            )
+            yield from result.scalars()
+        finally:
+            session.close()
+
+    @staticmethod
+    def deduplicate(vacancies: Iterable[Dict]) -> List[Dict]:
+        """Убирает повторы vacancy_id внутри пачки и записи без обязательных полей"""
+        unique: Dict[int, Dict] = {}
+        for vacancy in vacancies:
+            try:
+                vacancy_id = int(vacancy['vacancy_id'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if vacancy_id in unique or not vacancy.get('vacancy_name') or not vacancy.get('vacancy_url'):
+                continue
+            unique[vacancy_id] = {**vacancy, 'vacancy_id': vacancy_id}
+        return list(unique.values())
+
+    def copy_upsert(self, vacancies: Union[VacancyBatch, Iterable[Dict]], run_id: Optional[str] = None) -> Optional[int]:
+        """
+        Массовая загрузка вакансий через COPY во временную таблицу. Одним запросом
+        новые vacancy_id добавляются в таблицу дедупликации, соответствующие строки -
+        в секционированную таблицу вакансий, а их количество - в дневную статистику
+        new_vacancies_count (уже известные vacancy_id в статистику не попадают).
+        Возвращает количество новых строк или None при ошибке
+        """
+        batch = vacancies if isinstance(vacancies, VacancyBatch) else VacancyBatch.from_dicts(vacancies)
+        if not batch:
+            return 0
+
+        created_at = _copy_value(datetime.now())
+        run_id = _copy_value(run_id)
+        url_prefix = _copy_value(batch.url_prefix)
+        buffer = io.StringIO()
+        for vacancy_id, name, url_path, key in zip(batch.ids, batch.names, batch.paths, batch.keys):
+            buffer.write(f"{vacancy_id}\t{_copy_value(name)}\t")
+            if url_path.startswith('/'):
+                buffer.write(url_prefix)
+            buffer.write(f"{_copy_value(url_path)}\t{created_at}\t{_copy_value(key)}\t{run_id}\n")
+        buffer.seek(0)
+
+        columns = ', '.join(COPY_COLUMNS)
+        connection = self.db_manager.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE tmp_raw_av_vacancy ("
+                    "vacancy_id BIGINT, vacancy_name TEXT, vacancy_url TEXT, created_at TIMESTAMP, "
+                    "city_vacancyname_key TEXT, run_id TEXT"
+                    ") ON COMMIT DROP"
+                )
+                cursor.copy_expert(f"COPY tmp_raw_av_vacancy ({columns}) FROM STDIN", buffer)
+                cursor.execute(
+                    f"WITH new_ids AS ("
+                    f"  INSERT INTO {_table_name(self.id_model)} (vacancy_id, first_seen_at) "
+                    f"  SELECT vacancy_id, created_at FROM tmp_raw_av_vacancy "
+                    f"  ON CONFLICT (vacancy_id) DO NOTHING RETURNING vacancy_id"
+                    f"), inserted AS ("
+                    f"  INSERT INTO {_table_name(self.model)} ({columns}) "
+                    f"  SELECT {columns} FROM tmp_raw_av_vacancy JOIN new_ids USING (vacancy_id) "
+                    f"  RETURNING city_vacancyname_key, created_at"
+                    f"), stats AS ("
+                    f"  INSERT INTO {_table_name(self.stats_model)} AS s "
+                    f"  (city_vacancyname_key, day, {self.dict_id_column}, vacancy_name, new_vacancies_count, updated_at) "
+                    f"  SELECT i.city_vacancyname_key, i.created_at::date, d.{self.dict_id_column}, d.vacancy_name, "
+                    f"  count(*), now() "
+                    f"  FROM inserted i LEFT JOIN {_table_name(DictCityVacancy)} d USING (city_vacancyname_key) "
+                    f"  WHERE i.city_vacancyname_key IS NOT NULL "
+                    f"  GROUP BY i.city_vacancyname_key, i.created_at::date, d.{self.dict_id_column}, d.vacancy_name "
+                    f"  ON CONFLICT (city_vacancyname_key, day) DO UPDATE SET "
+                    f"  new_vacancies_count = s.new_vacancies_count + EXCLUDED.new_vacancies_count, "
+                    f"  updated_at = EXCLUDED.updated_at"
+                    f") "
+                    f"SELECT count(*) FROM inserted"
+                )
+                inserted = cursor.fetchone()[0]
+            connection.commit()
+            return inserted
+        except Exception as e:
+            connection.rollback()
+            logger.error(f"Error copying vacancies: {e}")
+            return None
+        finally:
+            connection.close()
+
+    def ensure_storage_layout(self, months_ahead: int = 2):
+        """
+        Создает месячные секции таблицы вакансий с текущего месяца до months_ahead месяцев
+        вперед (и секцию DEFAULT для остальных дат). Вызывается в начале каждого запуска,
+        чтобы строки новых месяцев не копились в секции DEFAULT. Там же колонка дневной
+        статистики получает имя new_vacancies_count, если таблица создана с прежним.
+
+        Таблица прежней схемы (без секций) здесь не переносится: для этого есть явный
+        migrate_legacy_storage (python main.py --migrate-storage).
+        """
+        session: Session = self.db_manager.get_session()
+        try:
+            if not self._is_partitioned(session):
+                raise RuntimeError(
+                    f"Таблица {_table_name(self.model)} прежней схемы (без секций): "
+                    f"выполните python main.py --migrate-storage"
+                )
+            self._create_partitions(session, _month_start(datetime.now()), self._last_month(months_ahead))
+            self._rename_stats_count_column(session)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error creating vacancy table partitions: {e}")
+            raise
+        finally:
+            session.close()
+
+    def migrate_legacy_storage(self, months_ahead: int = 2) -> bool:
+        """
+        Переносит таблицу прежней схемы в секционированную: прежняя таблица переименовывается
+        в *_legacy, ее строки переносятся в новую таблицу, а vacancy_id - в таблицу дедупликации.
+
+        :return: False, если таблица уже секционирована и переносить нечего
+        """
         session: Session = self.db_manager.get_session()
         try:
-            session.bulk_insert_mappings(RawAvVacancy, vacancies)
+            if self._is_partitioned(session):
+                return False
+            first_month = self._migrate_legacy_table(session) or _month_start(datetime.now())
+            self._create_partitions(session, first_month, self._last_month(months_ahead))
             session.commit()
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            logger.error(f"Error bulk inserting vacancies: {e}")
-            return False
+            logger.error(f"Error migrating vacancy table to partitions: {e}")
+            raise
         finally:
             session.close()
+
+    def _rename_stats_count_column(self, session: Session):
+        """Прежнее имя колонки дневной статистики vacancies_count переименовывается в new_vacancies_count"""
+        table = self.stats_model.__table__
+        legacy_column = session.execute(
+            text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = :schema AND table_name = :name AND column_name = 'vacancies_count'"
+            ),
+            {"schema": table.schema, "name": table.name}
+        ).first()
+        if legacy_column is not None:
+            session.execute(text(
+                f"ALTER TABLE {_table_name(self.stats_model)} RENAME COLUMN vacancies_count TO new_vacancies_count"
+            ))
+
+    def deduplicate_vacancies(self) -> int:
+        """
+        Удаляет повторные строки одного vacancy_id, оставляя самую раннюю (по row_id).
+        Дубли могли остаться в строках, перенесенных из таблицы прежней схемы; новые строки
+        дедуплицируются при записи. Удаление необратимо, поэтому вызывается только явно
+        (python main.py --migrate-storage --dedup-vacancies), а не при запуске.
+
+        :return: Количество удаленных строк
+        """
+        table = _table_name(self.model)
+        session: Session = self.db_manager.get_session()
+        try:
+            result = session.execute(text(
+                f"DELETE FROM {table} t USING {table} d "
+                f"WHERE t.vacancy_id = d.vacancy_id AND t.row_id > d.row_id"
+            ))
+            session.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error removing duplicate vacancies: {e}")
+            raise
+        finally:
+            session.close()
+
+    def _is_partitioned(self, session: Session) -> bool:
+        table = self.model.__table__
+        return session.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = :schema AND c.relname = :name"
+            ),
+            {"schema": table.schema, "name": table.name}
+        ).first() is not None
+
+    @staticmethod
+    def _last_month(months_ahead: int) -> date:
+        last_month = _month_start(datetime.now())
+        for _ in range(months_ahead):
+            last_month = _next_month(last_month)
+        return last_month
+
+    def _migrate_legacy_table(self, session: Session) -> Optional[date]:
+        """Переносит несекционированную таблицу; возвращает месяц самой ранней строки"""
+        table = self.model.__table__
+        legacy = f"{table.name}{LEGACY_SUFFIX}"
+        logger.warning(f"Перенос {table.schema}.{table.name} в секционированную таблицу, "
+                       f"прежняя таблица сохраняется как {legacy}")
+        session.execute(text(f"ALTER TABLE {table.schema}.{table.name} RENAME TO {legacy}"))
+        session.execute(text(f"ALTER INDEX IF EXISTS {table.schema}.{table.name}_pkey RENAME TO {legacy}_pkey"))
+        session.execute(text(
+            f"ALTER SEQUENCE IF EXISTS {table.schema}.{table.name}_row_id_seq RENAME TO {legacy}_row_id_seq"
+        ))
+        table.create(bind=session.connection())
+
+        oldest = session.execute(text(f"SELECT min(created_at) FROM {table.schema}.{legacy}")).scalar()
+        first_month = _month_start(oldest) if oldest is not None else None
+        if first_month is not None:
+            self._create_partitions(session, first_month, _month_start(datetime.now()))
+
+        session.execute(text(
+            f"INSERT INTO {_table_name(self.model)} (row_id, vacancy_id, vacancy_name, vacancy_url, created_at) "
+            f"SELECT row_id, vacancy_id, vacancy_name, vacancy_url, created_at FROM {table.schema}.{legacy}"
+        ))
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{_table_name(self.model)}', 'row_id'), "
+            f"(SELECT coalesce(max(row_id), 0) + 1 FROM {_table_name(self.model)}), false)"
+        ))
+        session.execute(text(
+            f"INSERT INTO {_table_name(self.id_model)} (vacancy_id, first_seen_at) "
+            f"SELECT vacancy_id, min(created_at) FROM {table.schema}.{legacy} "
+            f"WHERE vacancy_id IS NOT NULL GROUP BY vacancy_id "
+            f"ON CONFLICT (vacancy_id) DO NOTHING"
+        ))
+        return first_month
+
+    def _create_partitions(self, session: Session, first_month: date, last_month: date):
+        """Создает месячные секции с first_month по last_month включительно и секцию DEFAULT"""
+        table = self.model.__table__
+        month = first_month
+        while month <= last_month:
+            next_month = _next_month(month)
+            # Секция не создастся, если в DEFAULT уже есть строки за этот месяц; это не должно мешать запуску
+            try:
+                with session.begin_nested():
+                    session.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {table.schema}.{table.name}_p{month:%Y%m} "
+                        f"PARTITION OF {table.schema}.{table.name} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+                    ))
+            except SQLAlchemyError as e:
+                logger.error(f"Error creating partition {table.name}_p{month:%Y%m}: {e}")
+            month = next_month
+        session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {table.schema}.{table.name}_default "
+            f"PARTITION OF {table.schema}.{table.name} DEFAULT"
+        ))
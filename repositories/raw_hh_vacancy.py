@@ -0,0 +1,10 @@
+from models.raw_hh_vacancy import HhVacancyDailyStats, RawHhVacancy, RawHhVacancyId
+from repositories.raw_av_vacancy import AvVacancyRepository
+
+
+class HhVacancyRepository(AvVacancyRepository):
+    """Репозиторий вакансий hh.ru: та же загрузка через COPY, дедупликация и статистика в таблицах hh"""
+    model = RawHhVacancy
+    id_model = RawHhVacancyId
+    stats_model = HhVacancyDailyStats
+    dict_id_column = 'id_hh'
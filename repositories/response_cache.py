@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Заголовок файла записи: время истечения (double), затем zlib(JSON)
+_HEADER = struct.Struct('<d')
+
+
+class DiskResponseCache:
+    """
+    Дисковый кэш ответов FaaS с адресацией по содержимому запроса.
+
+    Ключ - sha256 от метода, URL и тела запроса. Ответы хранятся сжатыми zlib,
+    у каждой записи свой TTL; при превышении max_size_bytes вытесняются записи,
+    к которым дольше всего не обращались. Все операции с диском выполняются
+    в отдельных потоках и не блокируют event loop.
+    """
+    def __init__(
+        self,
+        directory: str = '.faas_cache',
+        ttl: float = 24 * 3600,
+        max_size_bytes: int = 1024 ** 3,
+        compress_level: int = 6,
+        io_workers: int = 4
+    ):
+        """
+        :param directory: Каталог для файлов кэша
+        :param ttl: Время жизни записи по умолчанию (сек)
+        :param max_size_bytes: Максимальный суммарный размер файлов кэша
+        :param compress_level: Уровень сжатия zlib
+        :param io_workers: Количество потоков для операций с диском
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._index: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        self._executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='faas-cache')
+        self._loaded: Optional[asyncio.Future] = None
+
+    @staticmethod
+    def make_key(method: str, url: str, payload: Any) -> str:
+        raw = json.dumps([method.upper(), url, payload], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load_index(self):
+        """Восстанавливает LRU-индекс по файлам (порядок - по времени последнего доступа)"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name, stat.st_size))
+
+        with self._lock:
+            for _, key, size in sorted(entries):
+                self._index[key] = size
+                self._size += size
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        if self._loaded is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._loaded = loop.run_in_executor(self._executor, self._load_index)
+        await self._loaded
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _read(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if key not in self._index:
+                return False, None
+            self._index.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                raw = file.read()
+            (expires_at,) = _HEADER.unpack_from(raw)
+            if expires_at < time.time():
+                self._remove(key)
+                return False, None
+            value = json.loads(zlib.decompress(raw[_HEADER.size:]))
+            os.utime(path)
+            return True, value
+        except (OSError, ValueError, zlib.error, struct.error):
+            self._remove(key)
+            return False, None
+
+    def _write(self, key: str, value: Any, ttl: float):
+        raw = _HEADER.pack(time.time() + ttl) + zlib.compress(
+            json.dumps(value, ensure_ascii=False).encode(), self.compress_level
+        )
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(raw)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size += len(raw) - self._index.pop(key, 0)
+            self._index[key] = len(raw)
+        self._evict()
+
+    def _remove(self, key: str):
+        with self._lock:
+            self._size -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._size <= self.max_size_bytes or not self._index:
+                    return
+                key = next(iter(self._index))
+            self._remove(key)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Возвращает (найдено, значение)"""
+        try:
+            found, value = await self._run(self._read, key)
+        except Exception as e:
+            logger.warning(f"Ошибка чтения кэша ответов: {e!r}")
+            found, value = False, None
+
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found, value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Сохраняет ответ. Ключи словаря с префиксом "_" - производные данные
+        (например, кэш разбора страницы) и не сохраняются
+        """
+        if isinstance(value, dict):
+            value = {k: v for k, v in value.items() if not k.startswith('_')}
+        try:
+            await self._run(self._write, key, value, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            logger.warning(f"Ошибка записи в кэш ответов: {e!r}")
+
+    async def delete(self, key: str):
+        """Удаляет запись (например, ответ, который не удалось разобрать)"""
+        try:
+            await self._run(self._remove, key)
+        except Exception as e:
+            logger.warning(f"Ошибка удаления из кэша ответов: {e!r}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "size_bytes": self._size,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
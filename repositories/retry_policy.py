@@ -0,0 +1,200 @@
+import random
+import time
+from typing import Dict, Optional, Union
+
+import httpx
+
+
+class ResponseValidationError(Exception):
+    """Ответ получен, но не прошел валидацию"""
+
+
+class CircuitOpenError(Exception):
+    """FaaS считается недоступным, запрос отклонен без отправки"""
+
+
+class RetryExhaustedError(Exception):
+    """Запрос не удался после всех разрешенных попыток"""
+    def __init__(self, last_error: Exception, attempts: int):
+        super().__init__(f"{type(last_error).__name__} после {attempts} попыток: {last_error}")
+        self.last_error = last_error
+        self.attempts = attempts
+
+
+class ErrorRule:
+    """Правило повторов для класса ошибок"""
+    __slots__ = ('retry', 'max_attempts', 'delay_factor')
+
+    def __init__(self, retry: bool = True, max_attempts: Optional[int] = None, delay_factor: float = 1.0):
+        """
+        :param retry: Повторять ли запрос при такой ошибке
+        :param max_attempts: Собственный лимит попыток (None - общий лимит политики)
+        :param delay_factor: Множитель задержки перед повтором
+        """
+        self.retry = retry
+        self.max_attempts = max_attempts
+        self.delay_factor = delay_factor
+
+
+# Ключ правила - HTTP статус или класс исключения. Статусы без правила:
+# 4xx не повторяются, остальные повторяются по общему правилу.
+DEFAULT_ERROR_RULES: Dict[Union[int, type], ErrorRule] = {
+    408: ErrorRule(),
+    429: ErrorRule(delay_factor=2.0),
+    httpx.TimeoutException: ErrorRule(),
+    httpx.RequestError: ErrorRule(),
+    ResponseValidationError: ErrorRule(),
+}
+
+
+class RetryBudget:
+    """
+    Глобальный бюджет повторов: повторов может быть не больше
+    ratio от числа исходных запросов плюс min_retries
+    """
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+
+    def on_request(self):
+        self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Списывает один повтор, если бюджет позволяет"""
+        if self.retries >= self.min_retries + self.ratio * self.requests:
+            return False
+        self.retries += 1
+        return True
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи для FaaS: после failure_threshold подряд идущих ошибок
+    endpoint считается недоступным на recovery_timeout секунд, затем пропускается
+    один пробный запрос
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 20, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and (
+            not self._probe_in_flight or time.monotonic() - self._probe_started_at >= self.recovery_timeout
+        ):
+            # Новый пробный запрос разрешается и тогда, когда предыдущий так и не вернул результат
+            self._probe_in_flight = True
+            self._probe_started_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self.state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class RetryPolicy:
+    """
+    Политика повторов FaasRequester: экспоненциальная задержка с jitter,
+    правила для классов ошибок, глобальный бюджет повторов и размыкатель цепи
+    """
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        jitter: bool = True,
+        error_rules: Optional[Dict[Union[int, type], ErrorRule]] = None,
+        budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        :param max_attempts: Общий лимит попыток на запрос
+        :param base_delay: Задержка перед первым повтором (сек)
+        :param max_delay: Верхняя граница задержки (сек)
+        :param jitter: Использовать "full jitter" - случайную задержку от 0 до расчетной
+        :param error_rules: Правила для HTTP статусов и классов исключений (дополняют стандартные)
+        :param budget: Глобальный бюджет повторов (None - без ограничения)
+        :param breaker: Размыкатель цепи (None - не используется)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.error_rules = {**DEFAULT_ERROR_RULES, **(error_rules or {})}
+        self.budget = budget
+        self.breaker = breaker
+
+    def get_rule(self, error: Exception) -> ErrorRule:
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status in self.error_rules:
+                return self.error_rules[status]
+            return ErrorRule(retry=not 400 <= status < 500)
+        for error_class in type(error).__mro__:
+            if error_class in self.error_rules:
+                return self.error_rules[error_class]
+        return ErrorRule()
+
+    def backoff(self, attempt: int, delay_factor: float = 1.0) -> float:
+        """Задержка перед повтором после попытки attempt (нумерация с 1)"""
+        delay = min(self.max_delay, self.base_delay * delay_factor * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(self, error: Exception, attempt: int, max_attempts: Optional[int] = None) -> Optional[float]:
+        """
+        Задержка перед следующей попыткой или None, если повторять не нужно
+
+        :param attempt: Сколько попыток с ошибкой этого класса уже сделано
+        :param max_attempts: Лимит попыток для этого вызова (перекрывает правило и политику)
+        """
+        rule = self.get_rule(error)
+        max_attempts = max_attempts or rule.max_attempts or self.max_attempts
+        if not rule.retry or attempt >= max_attempts:
+            return None
+        if self.budget and not self.budget.try_spend():
+            return None
+        return self.backoff(attempt, rule.delay_factor)
+
+    def allow_request(self) -> bool:
+        return self.breaker.allow() if self.breaker else True
+
+    def on_request(self):
+        if self.budget:
+            self.budget.on_request()
+
+    def on_result(self, error: Optional[Exception]):
+        """Передает в размыкатель исход обращения к FaaS"""
+        if not self.breaker:
+            return
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, httpx.RequestError) or (
+            isinstance(error, httpx.HTTPStatusError) and error.response.status_code >= 500
+        ):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+class RecordProgress:
+    """Прогресс одной записи словаря в рамках запуска"""
+    __slots__ = ('pages_count', 'page_url_template', 'persisted_pages')
+
+    def __init__(self, pages_count: Optional[int], page_url_template: Optional[str], persisted_pages: Set[int]):
+        self.pages_count = pages_count
+        self.page_url_template = page_url_template
+        self.persisted_pages = persisted_pages
+
+    @property
+    def is_done(self) -> bool:
+        """Все страницы записи сохранены в БД"""
+        if self.pages_count is None:
+            return False
+        return all(page in self.persisted_pages for page in range(1, self.pages_count + 1))
+
+    def missing_pages(self) -> Iterable[int]:
+        return (page for page in range(1, (self.pages_count or 0) + 1) if page not in self.persisted_pages)
+
+
+class RunJournal:
+    """
+    Журнал запусков скраппера в локальной SQLite базе.
+
+    Хранит для каждого запуска число страниц и шаблон URL страниц каждой записи
+    словаря, а также номера страниц, вакансии которых уже записаны в БД.
+    По журналу прерванный запуск можно продолжить, запросив только несохраненные страницы.
+    """
+    def __init__(self, path: str = 'scrape_journal.sqlite3'):
+        self.path = path
+        self.run_id: Optional[str] = None
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    started_at TEXT NOT NULL,
+                    finished_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS records (
+                    run_id TEXT NOT NULL,
+                    record_key TEXT NOT NULL,
+                    pages_count INTEGER,
+                    page_url_template TEXT,
+                    PRIMARY KEY (run_id, record_key)
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    run_id TEXT NOT NULL,
+                    record_key TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    flushed_at TEXT NOT NULL,
+                    PRIMARY KEY (run_id, record_key, page)
+                );
+            """)
+
+    def start_run(self, resume: bool = False, run_id: Optional[str] = None) -> str:
+        """
+        Начинает новый запуск или продолжает существующий
+
+        :param resume: Продолжить запуск run_id или, если он не задан, последний незавершенный
+        :param run_id: Идентификатор запуска (для нового запуска генерируется, если не задан)
+        """
+        with self._lock:
+            if resume and run_id is None:
+                row = self._connection.execute(
+                    "SELECT run_id FROM runs WHERE finished_at IS NULL ORDER BY started_at DESC LIMIT 1"
+                ).fetchone()
+                run_id = row[0] if row else None
+            self.run_id = run_id or uuid.uuid4().hex
+            self._connection.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)",
+                (self.run_id, datetime.now().isoformat())
+            )
+        return self.run_id
+
+    def finish_run(self):
+        """Отмечает запуск завершенным; постраничный прогресс для продолжения больше не нужен и удаляется"""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._connection.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_id = ?",
+                (datetime.now().isoformat(), self.run_id)
+            )
+            self._connection.execute("DELETE FROM pages WHERE run_id = ?", (self.run_id,))
+            self._connection.execute("COMMIT")
+
+    def set_record_pages(self, record_key: str, pages_count: int, page_url_template: Optional[str]):
+        """Запоминает число страниц записи и шаблон URL страниц после разбора первой страницы"""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO records (run_id, record_key, pages_count, page_url_template) "
+                "VALUES (?, ?, ?, ?)",
+                (self.run_id, record_key, pages_count, page_url_template)
+            )
+
+    def mark_pages_persisted(self, pages: Iterable[Tuple[str, int]]):
+        """Отмечает страницы, вакансии которых записаны в БД"""
+        flushed_at = datetime.now().isoformat()
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO pages (run_id, record_key, page, flushed_at) VALUES (?, ?, ?, ?)",
+                ((self.run_id, record_key, page, flushed_at) for record_key, page in pages)
+            )
+            self._connection.execute("COMMIT")
+
+    def load_progress(self) -> Dict[str, RecordProgress]:
+        """Загружает прогресс текущего запуска по записям словаря"""
+        with self._lock:
+            progress = {
+                record_key: RecordProgress(pages_count, template, set())
+                for record_key, pages_count, template in self._connection.execute(
+                    "SELECT record_key, pages_count, page_url_template FROM records WHERE run_id = ?",
+                    (self.run_id,)
+                )
+            }
+            for record_key, page in self._connection.execute(
+                "SELECT record_key, page FROM pages WHERE run_id = ?", (self.run_id,)
+            ):
+                progress.setdefault(record_key, RecordProgress(None, None, set())).persisted_pages.add(page)
+        return progress
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,309 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import case, func, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from db import DatabaseManager
+from models.scrape_job import ScrapeJob
+from repositories.dict_city_vacancy import DictCityVacancyRepository, DictCityVacancyRow
+from scrappers.scheduler import RecordScheduler
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_CLAIM_SQL = text("""
+    UPDATE public.dict_city_vacancy_scrape_job AS job
+    SET status = 'leased',
+        worker_id = :worker_id,
+        lease_expires_at = now() + make_interval(secs => :lease_seconds),
+        attempts = job.attempts + 1,
+        updated_at = now()
+    FROM (
+        SELECT pass_id, city_vacancyname_key
+        FROM public.dict_city_vacancy_scrape_job
+        WHERE pass_id = :pass_id
+          AND attempts < :max_attempts
+          AND (status = 'pending' OR (status = 'leased' AND lease_expires_at < now()))
+        ORDER BY priority DESC, city_vacancyname_key
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ) AS claimed
+    WHERE job.pass_id = claimed.pass_id AND job.city_vacancyname_key = claimed.city_vacancyname_key
+    RETURNING job.city_vacancyname_key, job.id_av, job.vacancy_name, job.id_hh, job.priority
+""")
+
+# Задания, которые больше не будут выданы (попытки исчерпаны), завершаются со статусом failed
+_FAIL_EXHAUSTED_SQL = text("""
+    UPDATE public.dict_city_vacancy_scrape_job
+    SET status = 'failed', worker_id = NULL, lease_expires_at = NULL, updated_at = now()
+    WHERE pass_id = :pass_id
+      AND attempts >= :max_attempts
+      AND (status = 'pending' OR (status = 'leased' AND lease_expires_at < now()))
+""")
+
+
+class ScrapeJobRepository:
+    """
+    Очередь заданий прохода по словарю в Postgres.
+
+    Воркеры забирают пачки заданий через SELECT ... FOR UPDATE SKIP LOCKED,
+    поэтому несколько процессов на разных хостах не получают одну и ту же запись.
+    Задание арендуется на lease_seconds и продлевается heartbeat; задания с истекшей
+    арендой (воркер упал) снова выдаются другим воркерам.
+    """
+    def __init__(self, db_manager: DatabaseManager, lease_seconds: float = 300, max_attempts: int = 3):
+        """
+        :param lease_seconds: Срок аренды задания без продления
+        :param max_attempts: Сколько раз задание может быть выдано, прежде чем перестанет выдаваться
+        """
+        self.db_manager = db_manager
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def enqueue_pass(
+        self,
+        pass_id: str,
+        client: Optional[str] = None,
+        scraped_before: Optional[datetime] = None,
+        scheduler: Optional[RecordScheduler] = None,
+        id_columns: Sequence[str] = ('id_av',)
+    ) -> int:
+        """
+        Создает задания прохода по записям словаря (повторный вызов не дублирует задания)
+
+        :param scheduler: Планировщик: пропускает недавно собранные маленькие запросы, а приоритет
+            заданий - ожидаемое число страниц (крупные запросы выдаются воркерам первыми)
+        :param id_columns: Колонки идентификаторов сайтов, по которым пойдет проход (см. records_query)
+        """
+        records = DictCityVacancyRepository.records_query(
+            client, scraped_before, with_state=True, id_columns=id_columns
+        ).subquery()
+        source = select(
+            literal(pass_id), records.c.city_vacancyname_key, func.coalesce(records.c.id_av, ''),
+            func.coalesce(records.c.vacancy_name, ''), records.c.id_hh, literal(STATUS_PENDING), literal(0),
+            func.now(),
+            scheduler.sql_expected_pages(records.c.last_main_count, records.c.last_main_source) if scheduler
+            else literal(0)
+        )
+        if scheduler is not None:
+            source = source.where(scheduler.sql_is_due(records.c.last_main_count, records.c.last_scraped_at,
+                                                       source_column=records.c.last_main_source))
+        statement = insert(ScrapeJob).from_select(
+            ['pass_id', 'city_vacancyname_key', 'id_av', 'vacancy_name', 'id_hh', 'status', 'attempts',
+             'updated_at', 'priority'],
+            source
+        ).on_conflict_do_nothing(index_elements=['pass_id', 'city_vacancyname_key'])
+        session: Session = self.db_manager.get_session()
+        try:
+            result = session.execute(statement)
+            session.commit()
+            return result.rowcount
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def claim(self, pass_id: str, worker_id: str, batch_size: int = 100) -> List[DictCityVacancyRow]:
+        """Арендует до batch_size свободных заданий (включая задания с истекшей арендой)"""
+        session: Session = self.db_manager.get_session()
+        try:
+            session.execute(_FAIL_EXHAUSTED_SQL, {"pass_id": pass_id, "max_attempts": self.max_attempts})
+            rows = session.execute(_CLAIM_SQL, {
+                "pass_id": pass_id,
+                "worker_id": worker_id,
+                "lease_seconds": self.lease_seconds,
+                "max_attempts": self.max_attempts,
+                "batch_size": batch_size,
+            }).all()
+            session.commit()
+            # RETURNING не сохраняет порядок подзапроса
+            rows.sort(key=lambda row: (-row.priority, row.city_vacancyname_key))
+            return [DictCityVacancyRow(*row[:4]) for row in rows]
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _set_leased(self, pass_id: str, worker_id: str, keys: Iterable[str], **values) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        session: Session = self.db_manager.get_session()
+        try:
+            result = session.execute(
+                update(ScrapeJob)
+                .where(ScrapeJob.pass_id == pass_id,
+                       ScrapeJob.worker_id == worker_id,
+                       ScrapeJob.status == STATUS_LEASED,
+                       ScrapeJob.city_vacancyname_key.in_(keys))
+                .values(updated_at=func.now(), **values)
+            )
+            session.commit()
+            return result.rowcount
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def heartbeat(self, pass_id: str, worker_id: str, keys: Iterable[str]) -> int:
+        """Продлевает аренду заданий воркера; возвращает число продленных (остальные аренду потеряли)"""
+        return self._set_leased(
+            pass_id, worker_id, keys,
+            lease_expires_at=func.now() + text(f"make_interval(secs => {float(self.lease_seconds)})")
+        )
+
+    def complete(self, pass_id: str, worker_id: str, keys: Iterable[str], status: str = STATUS_DONE) -> int:
+        """Завершает задания воркера со статусом done или failed"""
+        return self._set_leased(pass_id, worker_id, keys, status=status, lease_expires_at=None)
+
+    def _requeue_status(self):
+        """pending для заданий, у которых остались попытки, иначе failed"""
+        return case((ScrapeJob.attempts >= self.max_attempts, STATUS_FAILED), else_=STATUS_PENDING)
+
+    def release(self, pass_id: str, worker_id: str, keys: Iterable[str]) -> int:
+        """Возвращает задания в очередь без ожидания истечения аренды (с исчерпанными попытками - failed)"""
+        return self._set_leased(pass_id, worker_id, keys, status=self._requeue_status(), lease_expires_at=None)
+
+    def ensure_schema(self):
+        """Добавляет в существующую таблицу заданий колонки, появившиеся позже"""
+        table = f"{ScrapeJob.__table__.schema}.{ScrapeJob.__tablename__}"
+        session: Session = self.db_manager.get_session()
+        try:
+            session.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0"))
+            session.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS id_hh BIGINT"))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def requeue_expired(self, pass_id: str) -> int:
+        """Возвращает в очередь задания с истекшей арендой; с исчерпанными попытками завершает как failed"""
+        session: Session = self.db_manager.get_session()
+        try:
+            result = session.execute(
+                update(ScrapeJob)
+                .where(ScrapeJob.pass_id == pass_id,
+                       ScrapeJob.status == STATUS_LEASED,
+                       ScrapeJob.lease_expires_at < func.now())
+                .values(status=self._requeue_status(), worker_id=None, lease_expires_at=None, updated_at=func.now())
+            )
+            session.commit()
+            return result.rowcount
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def pass_stats(self, pass_id: str) -> Dict[str, int]:
+        """Количество заданий прохода по статусам"""
+        session: Session = self.db_manager.get_session()
+        try:
+            rows = session.execute(
+                select(ScrapeJob.status, func.count())
+                .where(ScrapeJob.pass_id == pass_id)
+                .group_by(ScrapeJob.status)
+            ).all()
+            return {status: count for status, count in rows}
+        finally:
+            session.close()
+
+
+class LeasedRecordSource:
+    """
+    Источник записей словаря для VacancyScrapper, выдающий записи из очереди
+    заданий прохода вместо полного чтения словаря.
+
+    Реализует интерфейс iter_batches/mark_scraped репозитория словаря. Пока запуск идет,
+    фоновый поток продлевает аренду выданных и еще не завершенных заданий.
+    Скраппер вызывает mark_scraped, как только все страницы записи записаны в БД, и задание
+    сразу отмечается done; остальные при закрытии возвращаются в очередь (или failed,
+    если попытки исчерпаны).
+    """
+    def __init__(
+        self,
+        job_repo: ScrapeJobRepository,
+        dict_city_repo: DictCityVacancyRepository,
+        pass_id: str,
+        worker_id: str,
+        heartbeat_interval: Optional[float] = None
+    ):
+        """
+        :param heartbeat_interval: Период продления аренды (по умолчанию треть срока аренды)
+        """
+        self.job_repo = job_repo
+        self.dict_city_repo = dict_city_repo
+        self.pass_id = pass_id
+        self.worker_id = worker_id
+        self.heartbeat_interval = heartbeat_interval or job_repo.lease_seconds / 3
+        self._lock = threading.Lock()
+        self._leased: Set[str] = set()
+        self._stopped = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def _heartbeat(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            with self._lock:
+                keys = list(self._leased)
+            if not keys:
+                continue
+            try:
+                renewed = self.job_repo.heartbeat(self.pass_id, self.worker_id, keys)
+                if renewed < len(keys):
+                    logger.warning(f"Воркер {self.worker_id} потерял аренду {len(keys) - renewed} заданий")
+            except Exception as e:
+                logger.warning(f"Ошибка продления аренды заданий: {e!r}")
+
+    def start(self):
+        if self._heartbeat_thread is None:
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat, name=f"lease-heartbeat-{self.worker_id}", daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def iter_batches(self, batch_size: int = 1000, client: Optional[str] = None,
+                     scraped_before: Optional[datetime] = None,
+                     id_columns: Sequence[str] = ('id_av',)) -> Iterator[List[DictCityVacancyRow]]:
+        """Арендует пачки заданий, пока очередь прохода не опустеет (фильтры и id_columns заданы при enqueue_pass)"""
+        self.start()
+        while True:
+            batch = self.job_repo.claim(self.pass_id, self.worker_id, batch_size)
+            if not batch:
+                return
+            with self._lock:
+                self._leased.update(record.city_vacancyname_key for record in batch)
+            yield batch
+
+    def mark_scraped(self, keys: Iterable[str], scraped_at: Optional[datetime] = None,
+                     main_counts: Optional[Dict[str, Optional[int]]] = None,
+                     main_sources: Optional[Dict[str, str]] = None):
+        keys = list(keys)
+        self.dict_city_repo.mark_scraped(keys, scraped_at, main_counts, main_sources)
+        self.job_repo.complete(self.pass_id, self.worker_id, keys)
+        with self._lock:
+            self._leased.difference_update(keys)
+
+    def close(self):
+        """Останавливает heartbeat и возвращает незавершенные задания в очередь"""
+        self._stopped.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+        with self._lock:
+            keys, self._leased = list(self._leased), set()
+        if keys:
+            self.job_repo.release(self.pass_id, self.worker_id, keys)
+            logger.info(f"Воркер {self.worker_id} вернул в очередь {len(keys)} заданий")
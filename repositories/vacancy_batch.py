@@ -0,0 +1,113 @@
+import itertools
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+AVITO_URL_PREFIX = 'https://www.avito.ru'
+DEFAULT_SOURCE = 'avito'
+
+
+class VacancyBatch:
+    """
+    Компактная пачка вакансий от разбора страницы до записи в БД.
+
+    Хранит колонки вместо словаря на вакансию: vacancy_id в array('q'),
+    названия и ключи записей словаря интернированными строками, от URL только urlPath -
+    общий префикс добавляется при записи. Повторы vacancy_id внутри пачки отбрасываются при добавлении.
+    Дополнительные поля вакансий (page_parser.DETAIL_FIELDS) хранятся, только если пачка
+    создана с with_details. source - имя источника вакансий (по нему writer выбирает таблицу).
+    """
+    __slots__ = ('url_prefix', 'source', 'ids', 'names', 'paths', 'keys', 'details', '_seen')
+
+    def __init__(self, url_prefix: str = AVITO_URL_PREFIX, with_details: bool = False,
+                 source: str = DEFAULT_SOURCE):
+        self.url_prefix = url_prefix
+        self.source = source
+        self.ids = array('q')
+        self.names: List[str] = []
+        self.paths: List[str] = []
+        self.keys: List[Optional[str]] = []
+        self.details: Optional[List[Optional[Tuple]]] = [] if with_details else None
+        self._seen: Set[int] = set()
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple], url_prefix: str = AVITO_URL_PREFIX,
+                   details: Optional[Iterable[Tuple]] = None, key: Optional[str] = None,
+                   source: str = DEFAULT_SOURCE) -> 'VacancyBatch':
+        """
+        Пачка из кортежей (id, title, urlPath) разобранной страницы и, если заданы, их item_details
+
+        :param key: Ключ записи словаря, с которой получены вакансии
+        """
+        batch = cls(url_prefix, with_details=details is not None, source=source)
+        for (vacancy_id, title, url_path), item_details in zip(items, details or itertools.repeat(None)):
+            batch.add(vacancy_id, title, url_path, key, item_details)
+        return batch
+
+    @classmethod
+    def from_dicts(cls, vacancies: Iterable[Dict], url_prefix: str = AVITO_URL_PREFIX) -> 'VacancyBatch':
+        """Пачка из словарей vacancy_id/vacancy_name/vacancy_url (и необязательного city_vacancyname_key)"""
+        batch = cls(url_prefix)
+        for vacancy in vacancies:
+            url = vacancy.get('vacancy_url')
+            if url and url.startswith(url_prefix):
+                url = url[len(url_prefix):]
+            batch.add(vacancy.get('vacancy_id'), vacancy.get('vacancy_name'), url, vacancy.get('city_vacancyname_key'))
+        return batch
+
+    def add(self, vacancy_id, name: Optional[str], url_path: Optional[str], key: Optional[str] = None,
+            details: Optional[Tuple] = None) -> bool:
+        """Добавляет вакансию; возвращает False для повтора или записи без обязательных полей"""
+        try:
+            vacancy_id = int(vacancy_id)
+        except (TypeError, ValueError):
+            return False
+        if not name or not url_path or vacancy_id in self._seen:
+            return False
+        self._seen.add(vacancy_id)
+        self.ids.append(vacancy_id)
+        self.names.append(sys.intern(name))
+        self.paths.append(url_path)
+        self.keys.append(sys.intern(key) if key else None)
+        if self.details is not None:
+            self.details.append(details)
+        return True
+
+    def extend(self, other: 'VacancyBatch', key: Optional[str] = None):
+        """Добавляет вакансии другой пачки; key, если задан, заменяет их ключи записи словаря"""
+        key = sys.intern(key) if key else None
+        other_details = other.details if other.details is not None else itertools.repeat(None)
+        for vacancy_id, name, url_path, other_key, details in zip(
+            other.ids, other.names, other.paths, other.keys, other_details
+        ):
+            if vacancy_id not in self._seen:
+                self._seen.add(vacancy_id)
+                self.ids.append(vacancy_id)
+                self.names.append(name)
+                self.paths.append(self._relative_path(other, url_path))
+                self.keys.append(key or other_key)
+                if self.details is not None:
+                    self.details.append(details)
+
+    def _relative_path(self, other: 'VacancyBatch', url_path: str) -> str:
+        if other.url_prefix == self.url_prefix or not url_path.startswith('/'):
+            return url_path
+        return other.url_prefix + url_path
+
+    def url(self, url_path: str) -> str:
+        """Полный URL; абсолютные адреса хранятся как есть"""
+        return self.url_prefix + url_path if url_path.startswith('/') else url_path
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Tuple[int, str, str]]:
+        """Кортежи (vacancy_id, vacancy_name, vacancy_url)"""
+        for vacancy_id, name, url_path in zip(self.ids, self.names, self.paths):
+            yield vacancy_id, name, self.url(url_path)
+
+    def to_dicts(self) -> List[Dict]:
+        return [
+            {"vacancy_id": vacancy_id, "vacancy_name": name, "vacancy_url": url, "city_vacancyname_key": key}
+            for (vacancy_id, name, url), key in zip(self, self.keys)
+        ]
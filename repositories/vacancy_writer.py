@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from metrics import REGISTRY, MetricsRegistry
+from repositories.raw_av_vacancy import AvVacancyRepository
+from repositories.vacancy_batch import DEFAULT_SOURCE, VacancyBatch
+
+if TYPE_CHECKING:
+    from repositories.parquet_archive import ParquetVacancyArchive
+
+logger = logging.getLogger(__name__)
+
+
+class VacancyWriteError(Exception):
+    """Пачка вакансий не записана в БД"""
+
+
+class AsyncVacancyWriter:
+    """
+    Асинхронный буферизующий writer вакансий.
+
+    Принимает вакансии из корутин скраппера, копит их и сбрасывает в БД пачками
+    по размеру или по времени через COPY с дедупликацией по vacancy_id.
+    Вакансии разных источников (VacancyBatch.source) копятся отдельно и пишутся
+    каждая в репозиторий своего источника.
+    Синхронные вызовы выполняются в отдельном потоке, поэтому не блокируют
+    event loop. Очередь ограничена: если запись не успевает, put() ждет
+    освобождения места.
+    """
+    def __init__(
+        self,
+        vacancy_repo: AvVacancyRepository,
+        batch_size: int = 1000,
+        flush_interval: float = 5.0,
+        queue_size: int = 100,
+        on_flush: Optional[Callable[[List[Tuple[str, int]]], None]] = None,
+        on_failed: Optional[Callable[[List[Tuple[str, int]], Exception], None]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        run_id: Optional[str] = None,
+        archive: Optional['ParquetVacancyArchive'] = None,
+        source_repos: Optional[Dict[str, AvVacancyRepository]] = None
+    ):
+        """
+        :param batch_size: Количество вакансий, после которого буфер сбрасывается в БД
+        :param flush_interval: Максимальное время (сек) хранения вакансий в буфере
+        :param queue_size: Сколько пачек может ожидать записи, прежде чем put() начнет ждать
+        :param on_flush: Вызывается в потоке записи со списком (record_key, page) успешно записанных страниц
+        :param on_failed: Вызывается в event loop со списком (record_key, page) страниц неудачного сброса
+            и ошибкой, чтобы вызывающий мог загрузить их повторно
+        :param metrics: Реестр метрик (по умолчанию общий metrics.REGISTRY)
+        :param run_id: Идентификатор запуска, сохраняется в строках вакансий
+        :param archive: Архив Parquet, в который дополнительно пишется каждая пачка
+            (ошибки архива не влияют на запись в БД)
+        :param source_repos: Репозитории вакансий других источников по имени; vacancy_repo - для Avito
+        """
+        self.vacancy_repo = vacancy_repo
+        self.repositories = {DEFAULT_SOURCE: vacancy_repo, **(source_repos or {})}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.on_failed = on_failed
+        self.run_id = run_id
+        self.archive = archive
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vacancy-writer')
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_count = 0
+        self.inserted_count = 0
+        self.failed_count = 0
+
+        metrics = metrics or REGISTRY
+        self._flush_seconds = metrics.histogram('db_flush_seconds', "Длительность сброса пачки вакансий в БД")
+        self._vacancies_total = metrics.counter('db_vacancies_total', "Вакансии, переданные в БД, по итогу записи")
+
+    async def start(self):
+        """Запускает фоновую задачу записи"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, record_key: str, page: int, vacancies: VacancyBatch):
+        """
+        Добавляет вакансии страницы (возможно, пустые) в буфер, ожидая при заполненной очереди
+
+        :param record_key: Ключ страницы для on_flush и on_failed (ключ записи в журнале запуска)
+        """
+        if self._task is None:
+            raise RuntimeError("AsyncVacancyWriter не запущен")
+        if self._task.done():
+            self._task.result()
+            raise RuntimeError("AsyncVacancyWriter уже остановлен")
+        await self._queue.put((record_key, page, vacancies))
+
+    async def close(self):
+        """Сбрасывает остаток буфера и останавливает запись"""
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.put(None)
+            await self._task
+            self._task = None
+            if self.archive is not None:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self._close_archive)
+        self._executor.shutdown(wait=True)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        buffers: Dict[str, VacancyBatch] = {}
+        pages: List[Tuple[str, int]] = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                await self._flush(buffers, pages)
+                buffers, pages, deadline = {}, [], None
+                continue
+
+            if item is None:
+                break
+
+            if not pages:
+                deadline = loop.time() + self.flush_interval
+            pages.append((item[0], item[1]))
+            vacancies = item[2]
+            buffer = buffers.get(vacancies.source)
+            if buffer is None:
+                buffer = buffers[vacancies.source] = self._new_buffer(vacancies)
+            buffer.extend(vacancies)
+
+            if sum(len(buffer) for buffer in buffers.values()) >= self.batch_size:
+                await self._flush(buffers, pages)
+                buffers, pages, deadline = {}, [], None
+
+        if pages:
+            await self._flush(buffers, pages)
+
+    def _new_buffer(self, vacancies: VacancyBatch) -> VacancyBatch:
+        return VacancyBatch(vacancies.url_prefix, with_details=self.archive is not None, source=vacancies.source)
+
+    def _write_archive(self, batch: VacancyBatch):
+        try:
+            self.archive.write(batch)
+        except Exception as e:
+            logger.error(f"Ошибка записи {len(batch)} вакансий в архив Parquet: {e!r}")
+
+    def _close_archive(self):
+        try:
+            self.archive.close()
+        except Exception as e:
+            logger.error(f"Ошибка закрытия архива Parquet: {e!r}")
+
+    def _write(self, buffers: Dict[str, VacancyBatch], pages: List[Tuple[str, int]]) -> Optional[int]:
+        """Пишет пачки всех источников; при ошибке любого из них сброс считается неудачным"""
+        inserted_total, failed = 0, False
+        for source, batch in buffers.items():
+            if not batch:
+                continue
+            if self.archive is not None:
+                self._write_archive(batch)
+            inserted = self.repositories[source].copy_upsert(batch, self.run_id)
+            if inserted is None:
+                failed = True
+            else:
+                inserted_total += inserted
+        if failed:
+            return None
+        if self.on_flush is not None:
+            self.on_flush(pages)
+        return inserted_total
+
+    async def _flush(self, buffers: Dict[str, VacancyBatch], pages: List[Tuple[str, int]]):
+        loop = asyncio.get_running_loop()
+        size = sum(len(batch) for batch in buffers.values())
+        error: Optional[Exception] = None
+        try:
+            with self._flush_seconds.time():
+                inserted = await loop.run_in_executor(self._executor, self._write, buffers, pages)
+        except Exception as e:
+            logger.error(f"Ошибка записи пачки из {size} вакансий: {e!r}")
+            inserted, error = None, e
+
+        if inserted is None:
+            self.failed_count += size
+            self._vacancies_total.inc(size, result='failed')
+            if self.on_failed is not None:
+                self.on_failed(pages, error or VacancyWriteError(f"Не записана пачка из {size} вакансий"))
+        else:
+            self.flushed_count += size
+            self.inserted_count += inserted
+            self._vacancies_total.inc(inserted, result='inserted')
+            self._vacancies_total.inc(size - inserted, result='duplicate')
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,49 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Set
+
+
+class KnownVacancyIndex:
+    """
+    Компактный индекс известных vacancy_id.
+
+    Идентификаторы из БД хранятся в отсортированном массиве int64 (8 байт на id),
+    поиск - бинарный. Идентификаторы, найденные за текущий запуск, добавляются
+    в обычное множество, чтобы не пересобирать массив.
+    """
+    def __init__(self, sorted_ids: array = None):
+        """
+        :param sorted_ids: Массив array('q') уникальных идентификаторов по возрастанию
+        """
+        self._sorted = sorted_ids if sorted_ids is not None else array('q')
+        self._added: Set[int] = set()
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int], presorted: bool = False) -> 'KnownVacancyIndex':
+        """
+        Собирает индекс из идентификаторов
+
+        :param presorted: Идентификаторы уже отсортированы по возрастанию (например, ORDER BY в БД)
+        """
+        if presorted:
+            return cls(array('q', ids))
+        return cls(array('q', sorted(set(ids))))
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._added)
+
+    def __contains__(self, vacancy_id: int) -> bool:
+        if vacancy_id in self._added:
+            return True
+        position = bisect_left(self._sorted, vacancy_id)
+        return position < len(self._sorted) and self._sorted[position] == vacancy_id
+
+    def add_many(self, ids: Iterable[int]):
+        self._added.update(ids)
+
+    def known_ratio(self, ids: Iterable[int]) -> float:
+        """Доля уже известных идентификаторов среди ids (0.0 для пустого списка)"""
+        ids = list(ids)
+        if not ids:
+            return 0.0
+        return sum(1 for vacancy_id in ids if vacancy_id in self) / len(ids)
@@ -0,0 +1,72 @@
+import json
+import re
+from typing import Optional, Tuple
+
+MFE_STATE_ATTR = 'data-mfe-state'
+MFE_STATE_CACHE_KEY = '_mfe_state'
+MFE_STATE_BLOB_CACHE_KEY = '_mfe_state_blob'
+
+_SCRIPT_OPEN_RE = re.compile(
+    r'<script\b[^>]*?\bdata-mfe-state\s*=\s*(?:"true"|\'true\'|true\b)[^>]*>',
+    re.IGNORECASE
+)
+_SCRIPT_CLOSE_RE = re.compile(r'</script\s*>', re.IGNORECASE)
+
+
+def find_mfe_state(text: str) -> Optional[Tuple[int, int]]:
+    """Находит границы содержимого <script data-mfe-state="true"> без построения DOM"""
+    pos = text.find(MFE_STATE_ATTR)
+    while pos != -1:
+        tag_start = text.rfind('<', 0, pos)
+        match = _SCRIPT_OPEN_RE.match(text, tag_start) if tag_start != -1 else None
+        if match:
+            close = _SCRIPT_CLOSE_RE.search(text, match.end())
+            if close is None:
+                return None
+            return match.end(), close.start()
+        pos = text.find(MFE_STATE_ATTR, pos + len(MFE_STATE_ATTR))
+    return None
+
+
+def decode_mfe_state(blob: str) -> dict:
+    """Декодирует содержимое блока data-mfe-state, пустой словарь при ошибке"""
+    if not blob:
+        return {}
+    try:
+        data = json.loads(blob.replace('&quot;', '"'))
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def extract_mfe_state_blob(text: str) -> str:
+    """Возвращает сырое содержимое блока data-mfe-state или пустую строку"""
+    span = find_mfe_state(text)
+    return text[span[0]:span[1]] if span else ''
+
+
+def extract_mfe_state(text: str) -> dict:
+    """Возвращает декодированный JSON из блока data-mfe-state или пустой словарь"""
+    return decode_mfe_state(extract_mfe_state_blob(text))
+
+
+def get_mfe_state_blob(response: dict) -> str:
+    """Находит сырой блок состояния в ответе FaaS и кэширует его в самом ответе"""
+    cached = response.get(MFE_STATE_BLOB_CACHE_KEY)
+    if cached is None:
+        text = response.get('text')
+        cached = extract_mfe_state_blob(text) if isinstance(text, str) else ''
+        response[MFE_STATE_BLOB_CACHE_KEY] = cached
+    return cached
+
+
+def get_mfe_state(response: dict) -> dict:
+    """
+    Извлекает состояние страницы из ответа FaaS и кэширует его в самом ответе,
+    чтобы валидатор и парсер выполняли разбор один раз
+    """
+    cached = response.get(MFE_STATE_CACHE_KEY)
+    if cached is None:
+        cached = decode_mfe_state(get_mfe_state_blob(response))
+        response[MFE_STATE_CACHE_KEY] = cached
+    return cached
@@ -0,0 +1,69 @@
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from scrappers.mfe_state import decode_mfe_state
+
+# Avito отдает не больше 100 страниц выдачи по 50 вакансий
+ITEMS_PER_PAGE = 50
+MAX_ITEMS = 5000
+MAX_PAGES = 100
+
+# Дополнительные поля вакансии из выдачи, порядок значений в item_details
+DETAIL_FIELDS = ('price_value', 'price_text', 'location_name', 'sort_timestamp', 'description')
+
+
+class StateDecodeError(ValueError):
+    """Блок состояния страницы найден, но не декодируется (например, обрезан)"""
+
+
+class ParsedPage(NamedTuple):
+    """Компактный результат разбора страницы выдачи"""
+    main_count: int
+    pager_last: Optional[str]
+    items: List[Tuple[Any, Optional[str], Optional[str]]]
+    details: Optional[List[Tuple]] = None
+
+
+def item_details(item: dict) -> Tuple:
+    """Значения DETAIL_FIELDS вакансии: зарплата, ее текст, город, время публикации (мс), описание"""
+    price = item.get('priceDetailed') or {}
+    location = item.get('location') or {}
+    return (
+        price.get('value'),
+        price.get('string') or price.get('postfix'),
+        location.get('name'),
+        item.get('sortTimeStamp'),
+        item.get('description'),
+    )
+
+
+def parse_state(data: dict, with_details: bool = False) -> ParsedPage:
+    """
+    Достает из состояния страницы счетчик, ссылку на последнюю страницу и вакансии (id, title, urlPath)
+
+    :param with_details: Также собрать item_details каждой вакансии
+    """
+    page_data = data.get('data', {})
+    catalog = page_data.get('catalog', {})
+    pager = catalog.get('pager') or {}
+    items = catalog.get('items', [])[1:]
+    return ParsedPage(
+        main_count=page_data.get('mainCount', 0) or 0,
+        pager_last=pager.get('last'),
+        items=[(item.get('id'), item.get('title'), item.get('urlPath')) for item in items],
+        details=[item_details(item) for item in items] if with_details else None
+    )
+
+
+def parse_state_blob(blob: str, with_details: bool = False) -> ParsedPage:
+    """
+    Декодирует сырой блок data-mfe-state и разбирает его.
+    Функция верхнего уровня, чтобы ее можно было выполнять в ProcessPoolExecutor:
+    в процесс передается только блок состояния, а не вся страница.
+
+    Валидатор в режиме процессов только находит блок, поэтому ошибка декодирования
+    (StateDecodeError) обнаруживается здесь, а не принимается за пустую выдачу
+    """
+    data = decode_mfe_state(blob)
+    if not data:
+        raise StateDecodeError(f"Не удалось декодировать блок data-mfe-state ({len(blob or '')} символов)")
+    return parse_state(data, with_details)
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import case, func, literal, or_
+
+from scrappers.sources import AvitoSource, VacancySource
+
+
+class RecordScheduler:
+    """
+    Порядок обхода записей словаря по результатам прошлых сборов.
+
+    Записи с большим ожидаемым числом страниц (по последнему mainCount) идут первыми
+    (longest processing time first), чтобы крупные запросы не растягивали хвост прохода;
+    при равном числе страниц - давно не собиравшиеся. Маленькие запросы, собранные
+    недавно, пропускаются до истечения small_query_interval.
+
+    Число страниц считается по правилам источника, чей mainCount сохранен (last_main_source);
+    для записей без источника - по первому из sources.
+    """
+    def __init__(
+        self,
+        small_query_pages: int = 1,
+        small_query_interval: timedelta = timedelta(days=3),
+        unknown_pages: Optional[int] = None,
+        sources: Optional[Sequence[VacancySource]] = None
+    ):
+        """
+        :param small_query_pages: Запросы с ожидаемым числом страниц не больше этого считаются маленькими
+        :param small_query_interval: Как часто собирать маленькие запросы
+        :param unknown_pages: Ожидаемое число страниц для записей, которые еще не собирались
+            (по умолчанию максимум страниц первого источника)
+        :param sources: Источники сбора (по умолчанию только Avito)
+        """
+        sources = sources or [AvitoSource()]
+        self.default_source = sources[0]
+        self.sources: Dict[str, VacancySource] = {source.name: source for source in sources}
+        self.small_query_pages = small_query_pages
+        self.small_query_interval = small_query_interval
+        self.unknown_pages = self.default_source.max_pages if unknown_pages is None else unknown_pages
+
+    def expected_pages(self, main_count: Optional[int], source_name: Optional[str] = None) -> int:
+        if main_count is None:
+            return self.unknown_pages
+        return self.sources.get(source_name, self.default_source).pages_for_count(main_count)
+
+    def is_due(self, main_count: Optional[int], last_scraped_at: Optional[datetime], now: datetime,
+               source_name: Optional[str] = None) -> bool:
+        if last_scraped_at is None or self.expected_pages(main_count, source_name) > self.small_query_pages:
+            return True
+        return last_scraped_at <= now - self.small_query_interval
+
+    def order(self, states: Iterable, now: Optional[datetime] = None) -> List:
+        """
+        Отбирает записи, которые пора собирать, и сортирует их
+
+        :param states: Записи с полями last_main_count, last_scraped_at и last_main_source (DictCityVacancyState)
+        """
+        now = now or datetime.now()
+        due = [
+            state for state in states
+            if self.is_due(state.last_main_count, state.last_scraped_at, now, state.last_main_source)
+        ]
+        due.sort(key=lambda state: (-self.expected_pages(state.last_main_count, state.last_main_source),
+                                    state.last_scraped_at or datetime.min))
+        return due
+
+    @staticmethod
+    def _sql_pages(main_count_column, source: VacancySource):
+        return func.least(
+            func.ceil(func.least(main_count_column, source.max_items) / float(source.items_per_page)),
+            source.max_pages
+        )
+
+    def sql_expected_pages(self, main_count_column, source_column=None):
+        """SQL выражение ожидаемого числа страниц (для сортировки очереди заданий в БД)"""
+        whens = [(main_count_column.is_(None), literal(self.unknown_pages))]
+        if source_column is not None:
+            whens += [(source_column == name, self._sql_pages(main_count_column, source))
+                      for name, source in self.sources.items() if source is not self.default_source]
+        return case(*whens, else_=self._sql_pages(main_count_column, self.default_source))
+
+    def sql_is_due(self, main_count_column, last_scraped_at_column, now: Optional[datetime] = None,
+                   source_column=None):
+        """SQL условие is_due"""
+        now = now or datetime.now()
+        return or_(
+            last_scraped_at_column.is_(None),
+            self.sql_expected_pages(main_count_column, source_column) > self.small_query_pages,
+            last_scraped_at_column <= now - self.small_query_interval
+        )
@@ -0,0 +1,256 @@
+import json
+import math
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from repositories.vacancy_batch import AVITO_URL_PREFIX
+from scrappers.mfe_state import get_mfe_state, get_mfe_state_blob
+from scrappers.page_parser import (ITEMS_PER_PAGE, MAX_ITEMS, MAX_PAGES, ParsedPage, StateDecodeError, parse_state,
+                                   parse_state_blob)
+
+HH_API_URL = 'https://api.hh.ru/vacancies'
+HH_URL_PREFIX = 'https://hh.ru'
+# API hh.ru отдает не больше 2000 вакансий на запрос, по 100 на страницу
+HH_PER_PAGE = 100
+HH_MAX_ITEMS = 2000
+HH_JSON_CACHE_KEY = '_hh_json'
+
+
+class VacancySource:
+    """
+    Источник вакансий для VacancyScrapper: как по записи словаря построить URL выдачи,
+    проверить и разобрать ответ FaaS и пролистать остальные страницы.
+
+    Страницы в конвейере нумеруются с 1; перевод в нумерацию сайта - в page_url.
+    """
+    name: str = ''
+    # Префикс ссылок на вакансии (общая часть URL в VacancyBatch)
+    url_prefix: str = ''
+    # Префикс URL выдачи: по нему неудачная страница из dead letter сопоставляется с источником
+    request_prefix: str = ''
+    # Колонка словаря с идентификатором города на сайте
+    dict_id_column: str = ''
+    # Вакансий на странице выдачи и сколько всего вакансий сайт отдает по одному запросу
+    items_per_page: int = ITEMS_PER_PAGE
+    max_items: int = MAX_ITEMS
+    max_pages: int = MAX_PAGES
+    # Функция верхнего уровня (payload, with_details) -> ParsedPage для разбора в ProcessPoolExecutor;
+    # если payload не декодируется, бросает StateDecodeError
+    parse_payload: Callable[[str, bool], ParsedPage]
+
+    def first_page_url(self, record) -> Optional[str]:
+        """URL первой страницы выдачи или None, если у записи словаря нет идентификатора этого сайта"""
+        raise NotImplementedError
+
+    def is_valid_response(self, result, in_parse_pool: bool = False) -> bool:
+        """
+        :param in_parse_pool: Разбор выполняется в процессе-парсере, проверка должна быть дешевой
+        """
+        raise NotImplementedError
+
+    def parse_response(self, result: dict, with_details: bool = False) -> ParsedPage:
+        raise NotImplementedError
+
+    def extract_payload(self, result: dict) -> str:
+        """Часть ответа, которая передается в процесс-парсер (parse_payload)"""
+        raise NotImplementedError
+
+    def pages_count(self, parsed: ParsedPage) -> int:
+        return self.pages_for_count(parsed.main_count)
+
+    def pages_for_count(self, main_count: Optional[int]) -> int:
+        """Сколько страниц выдачи нужно пролистать при mainCount (также для планировщика)"""
+        if not main_count:
+            return 0
+        return min(math.ceil(min(main_count, self.max_items) / self.items_per_page), self.max_pages)
+
+    def page_url_template(self, parsed: ParsedPage, first_url: str) -> Optional[str]:
+        """Шаблон URL страницы выдачи с местом для номера (str.format); None - листать нельзя"""
+        raise NotImplementedError
+
+    def page_url(self, template: str, page: int) -> str:
+        return template.format(page)
+
+    def page_urls(self, template: Optional[str], pages_count: int) -> List[Tuple[int, str]]:
+        """URL страниц со второй по pages_count"""
+        if pages_count <= 1 or not template:
+            return []
+        return [(page, self.page_url(template, page)) for page in range(2, min(pages_count, self.max_pages) + 1)]
+
+    def journal_key(self, record_key: str) -> str:
+        """Ключ записи в журнале запуска: одна запись словаря листается каждым источником отдельно"""
+        return f"{self.name}:{record_key}"
+
+    def owns_url(self, url: str) -> bool:
+        return url.startswith(self.request_prefix)
+
+
+class AvitoSource(VacancySource):
+    """Выдача вакансий Avito: состояние страницы в блоке data-mfe-state, до 100 страниц по 50 вакансий"""
+    name = 'avito'
+    url_prefix = AVITO_URL_PREFIX
+    request_prefix = AVITO_URL_PREFIX
+    dict_id_column = 'id_av'
+    items_per_page = ITEMS_PER_PAGE
+    max_items = MAX_ITEMS
+    max_pages = MAX_PAGES
+    parse_payload = staticmethod(parse_state_blob)
+
+    def first_page_url(self, record) -> Optional[str]:
+        if not record.id_av:
+            return None
+        return f'{self.url_prefix}/{record.id_av}/vakansii?cd=1&q={record.vacancy_name}&s=104'
+
+    def is_valid_response(self, result, in_parse_pool: bool = False) -> bool:
+        if not isinstance(result, dict):
+            return False
+        if in_parse_pool:
+            # JSON декодируется в процессе-парсере, здесь достаточно найти блок состояния
+            return bool(get_mfe_state_blob(result))
+        return bool(get_mfe_state(result))
+
+    def parse_response(self, result: dict, with_details: bool = False) -> ParsedPage:
+        return parse_state(get_mfe_state(result) if isinstance(result, dict) else {}, with_details)
+
+    def extract_payload(self, result: dict) -> str:
+        return get_mfe_state_blob(result)
+
+    def page_url_template(self, parsed: ParsedPage, first_url: str) -> Optional[str]:
+        if not parsed.pager_last:
+            return None
+
+        last_page = self.url_prefix + parsed.pager_last.replace('amp;', '')
+        start_index = last_page.find('p=') + 2
+        end_index = last_page.find('&', start_index)
+        return last_page[:start_index] + '{}' + last_page[end_index:]
+
+    def journal_key(self, record_key: str) -> str:
+        # Без префикса: журналы запусков, начатых до появления источников, продолжают работать
+        return record_key
+
+
+def _hh_timestamp(value: Optional[str]) -> Optional[int]:
+    """published_at hh.ru (2024-01-31T10:00:00+0300) в миллисекундах"""
+    if not value:
+        return None
+    try:
+        return int(datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z').timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def _hh_details(item: dict) -> Tuple:
+    """Значения page_parser.DETAIL_FIELDS для вакансии hh.ru"""
+    salary = item.get('salary') or {}
+    salary_from, salary_to = salary.get('from'), salary.get('to')
+    price_text = None
+    if salary_from or salary_to:
+        bounds = '-'.join(str(value) for value in (salary_from, salary_to) if value)
+        price_text = f"{bounds} {salary.get('currency') or ''}".strip()
+    snippet = item.get('snippet') or {}
+    description = ' '.join(part for part in (snippet.get('requirement'), snippet.get('responsibility')) if part)
+    return (
+        salary_from or salary_to,
+        price_text,
+        (item.get('area') or {}).get('name'),
+        _hh_timestamp(item.get('published_at')),
+        description or None,
+    )
+
+
+def parse_hh_response(data: dict, with_details: bool = False) -> ParsedPage:
+    """Разбирает ответ API hh.ru /vacancies: found и вакансии (id, name, путь alternate_url)"""
+    items = data.get('items') or []
+    parsed_items = []
+    for item in items:
+        url = item.get('alternate_url') or ''
+        path = url[len(HH_URL_PREFIX):] if url.startswith(HH_URL_PREFIX + '/') else url
+        parsed_items.append((item.get('id'), item.get('name'), path or None))
+    return ParsedPage(
+        main_count=data.get('found', 0) or 0,
+        pager_last=None,
+        items=parsed_items,
+        details=[_hh_details(item) for item in items] if with_details else None
+    )
+
+
+def _decode_hh_json(text) -> dict:
+    if not isinstance(text, str):
+        return {}
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) and isinstance(data.get('items'), list) else {}
+
+
+def parse_hh_payload(text: str, with_details: bool = False) -> ParsedPage:
+    """Разбор тела ответа API hh.ru в процессе-парсере (тело, которое не декодируется, - StateDecodeError)"""
+    data = _decode_hh_json(text)
+    if not data:
+        raise StateDecodeError(f"Не удалось декодировать ответ API hh.ru ({len(text or '')} символов)")
+    return parse_hh_response(data, with_details)
+
+
+class HhSource(VacancySource):
+    """
+    Вакансии hh.ru через публичный API (https://api.hh.ru/vacancies), загружаемый через FaaS.
+
+    Город - колонка словаря id_hh (area), сортировка по дате публикации, чтобы
+    инкрементальный режим останавливался на уже известных вакансиях, как для Avito.
+    """
+    name = 'hh'
+    url_prefix = HH_URL_PREFIX
+    request_prefix = HH_API_URL
+    dict_id_column = 'id_hh'
+    items_per_page = HH_PER_PAGE
+    max_items = HH_MAX_ITEMS
+    max_pages = HH_MAX_ITEMS // HH_PER_PAGE
+    parse_payload = staticmethod(parse_hh_payload)
+
+    def first_page_url(self, record) -> Optional[str]:
+        id_hh = getattr(record, 'id_hh', None)
+        if id_hh is None or not record.vacancy_name:
+            return None
+        return (f"{HH_API_URL}?area={id_hh}&text={quote(record.vacancy_name)}"
+                f"&order_by=publication_time&per_page={HH_PER_PAGE}&page=0")
+
+    def _get_json(self, result: dict) -> dict:
+        cached = result.get(HH_JSON_CACHE_KEY)
+        if cached is None:
+            cached = _decode_hh_json(result.get('text'))
+            result[HH_JSON_CACHE_KEY] = cached
+        return cached
+
+    def is_valid_response(self, result, in_parse_pool: bool = False) -> bool:
+        if not isinstance(result, dict):
+            return False
+        if in_parse_pool:
+            text = result.get('text')
+            return isinstance(text, str) and text.lstrip().startswith('{') and '"items"' in text
+        return bool(self._get_json(result))
+
+    def parse_response(self, result: dict, with_details: bool = False) -> ParsedPage:
+        return parse_hh_response(self._get_json(result) if isinstance(result, dict) else {}, with_details)
+
+    def extract_payload(self, result: dict) -> str:
+        return result.get('text') or ''
+
+    def page_url_template(self, parsed: ParsedPage, first_url: str) -> Optional[str]:
+        return first_url.rsplit('page=', 1)[0] + 'page={}'
+
+    def page_url(self, template: str, page: int) -> str:
+        # Страницы API нумеруются с 0
+        return template.format(page - 1)
+
+
+SOURCES = {source.name: source for source in (AvitoSource, HhSource)}
+
+
+def get_sources(names: Sequence[str]) -> List[VacancySource]:
+    """Источники по именам (avito, hh)"""
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        raise ValueError(f"Неизвестные источники: {', '.join(unknown)}; доступны: {', '.join(SOURCES)}")
+    return [SOURCES[name]() for name in names]
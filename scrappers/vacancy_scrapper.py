@@ -1,151 +1,621 @@
 import asyncio
-import json
-import math
-from contextlib import suppress
+import itertools
+import logging
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
-
-from repositories.dict_city_vacancy import DictCityVacancyRepository
+from metrics import DEFAULT_COUNT_BUCKETS, REGISTRY, MetricsRegistry
+from repositories.dead_letter import DeadLetter, DeadLetterRepository
+from repositories.dict_city_vacancy import DictCityVacancyRepository, DictCityVacancyRow, DictCityVacancyState
 from repositories.faas_requester import FaasRequester
 from repositories.raw_av_vacancy import AvVacancyRepository
+from repositories.run_journal import RecordProgress, RunJournal
+from repositories.vacancy_batch import DEFAULT_SOURCE, VacancyBatch
+from repositories.vacancy_writer import AsyncVacancyWriter
+from scrappers.known_ids import KnownVacancyIndex
+from scrappers.page_parser import ParsedPage, StateDecodeError
+from scrappers.scheduler import RecordScheduler
+from scrappers.sources import AvitoSource, VacancySource
+
+if TYPE_CHECKING:
+    from repositories.parquet_archive import ParquetVacancyArchive
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты очереди заданий: страницы уже начатых запросов обрабатываются раньше
+# первых страниц новых, чтобы записи словаря завершались и освобождали память.
+PAGE_PRIORITY = 0
+FIRST_PAGE_PRIORITY = 1
+LAST_PRIORITY = 2
+
+# Сколько неудачных страниц копится перед записью в хранилище
+DEAD_LETTER_FLUSH_SIZE = 100
+# Сколько собранных записей словаря копится перед отметкой mark_scraped
+SCRAPED_FLUSH_SIZE = 100
+
+
+class _KeyState:
+    """Запись словаря, которую листают несколько источников: собрана, когда завершены все"""
+    __slots__ = ('remaining', 'failed', 'main_count', 'main_source')
+
+    def __init__(self, remaining: int):
+        self.remaining = remaining
+        self.failed = False
+        self.main_count: Optional[int] = None
+        # Источник, чей mainCount сохраняется для планировщика
+        self.main_source: Optional[VacancySource] = None
+
+
+class _RecordState:
+    """Состояние обработки одной записи словаря одним источником внутри конвейера"""
+    __slots__ = ('key', 'source', 'journal_key', 'pending', 'unpersisted', 'failed', 'skip_pages', 'pages_count',
+                 'page_url_template', 'main_count', 'key_state')
+
+    def __init__(self, key: str, source: VacancySource, skip_pages: Iterable[int] = (),
+                 key_state: Optional[_KeyState] = None):
+        """
+        :param key_state: Общее состояние записи словаря (None - запись не отмечается собранной, как в redrive)
+        """
+        self.key = key
+        self.source = source
+        self.journal_key = source.journal_key(key)
+        self.pending = 0
+        # Страницы (номер -> URL), переданные в writer и еще не записанные в БД
+        self.unpersisted: Dict[int, str] = {}
+        self.failed = False
+        self.skip_pages = frozenset(skip_pages)
+        self.pages_count = 0
+        self.page_url_template: Optional[str] = None
+        self.main_count: Optional[int] = None
+        self.key_state = key_state
+
+
+class _PageJob:
+    """Задание на загрузку одной страницы выдачи"""
+    __slots__ = ('record', 'page', 'url')
+
+    def __init__(self, record: _RecordState, page: int, url: str):
+        self.record = record
+        self.page = page
+        self.url = url
 
+    def to_request(self) -> dict:
+        return {
+            "json": {"url": self.url},
+            "target_url": self.url,
+        }
 
-class AvitoVacancyScrapper:
+
+class VacancyScrapper:
+    """
+    Сборщик вакансий по словарю городов и запросов.
+
+    Каждая запись словаря листается всеми источниками (sources), у которых для нее есть
+    идентификатор города; страницы всех источников идут через общую очередь и FaaS,
+    а вакансии пишутся в репозиторий своего источника.
+    """
     def __init__(
         self,
         requester: FaasRequester,
         dict_city_repo: DictCityVacancyRepository,
         vacancy_repo: AvVacancyRepository,
         chunk_size: int = 10,
-        verify_retry: int = 5
+        verify_retry: int = 5,
+        workers: Optional[int] = None,
+        queue_size: int = 100,
+        flush_size: int = 1000,
+        flush_interval: float = 5.0,
+        parse_workers: int = 0,
+        journal: Optional[RunJournal] = None,
+        incremental: bool = False,
+        known_ratio_threshold: float = 0.8,
+        known_ids: Optional[KnownVacancyIndex] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        client: Optional[str] = None,
+        scraped_before: Optional[datetime] = None,
+        read_batch_size: int = 1000,
+        batch_size: int = 1,
+        scheduler: Optional[RecordScheduler] = None,
+        dead_letters: Optional[DeadLetterRepository] = None,
+        limit: Optional[int] = None,
+        archive: Optional['ParquetVacancyArchive'] = None,
+        run_id: Optional[str] = None,
+        sources: Optional[List[VacancySource]] = None,
+        source_repos: Optional[Dict[str, AvVacancyRepository]] = None
     ):
+        """
+        :param chunk_size: Сколько записей словаря может находиться в обработке одновременно
+        :param verify_retry: Количество циклов повторных попыток при неудачной валидации
+        :param workers: Сколько страниц загружается одновременно (по умолчанию 2 * requester.max_in_flight)
+        :param queue_size: Размер очереди между загрузкой и записью в БД
+        :param flush_size: Количество вакансий, после которого буфер сбрасывается в БД
+        :param flush_interval: Максимальное время (сек) между сбросами буфера в БД
+        :param parse_workers: Количество процессов для разбора страниц (0 - разбор в event loop)
+        :param journal: Журнал запуска для продолжения после сбоя (запуск должен быть начат через start_run)
+        :param incremental: Листать выдачу последовательно и останавливаться на уже известных вакансиях
+        :param known_ratio_threshold: Доля известных vacancy_id на странице, при которой листание прекращается
+        :param known_ids: Индекс известных vacancy_id Avito (по умолчанию загружается из vacancy_repo;
+            для других источников - из их репозиториев)
+        :param metrics: Реестр метрик (по умолчанию общий metrics.REGISTRY)
+        :param client: Собирать только записи словаря указанного клиента
+        :param scraped_before: Собирать только записи, не собиравшиеся с этого момента
+        :param read_batch_size: Размер пачки при потоковом чтении словаря
+        :param batch_size: Сколько страниц отправлять в FaaS одним пакетным запросом (1 - без пакетов)
+        :param scheduler: Планировщик порядка записей по прошлым сборам (словарь читается целиком);
+            без него записи обходятся в порядке ключа
+        :param dead_letters: Хранилище неудачных страниц для последующего redrive
+        :param limit: Обработать не больше limit записей словаря (например, для профилирования)
+        :param archive: Архив Parquet для всех вакансий запуска с дополнительными полями выдачи
+        :param run_id: Идентификатор запуска для строк вакансий, если запуск идет без журнала
+        :param sources: Источники вакансий (по умолчанию только Avito); для планировщика сохраняется
+            mainCount первого по порядку источника, листавшего запись
+        :param source_repos: Репозитории вакансий источников кроме Avito по имени источника
+        """
+        self.sources = sources or [AvitoSource()]
+        self.source_repos = source_repos or {}
+        missing = [source.name for source in self.sources
+                   if source.name != DEFAULT_SOURCE and source.name not in self.source_repos]
+        if missing:
+            raise ValueError(f"Не заданы репозитории вакансий источников: {', '.join(missing)}")
         self.requester = requester
         self.dict_city_repo = dict_city_repo
         self.vacancy_repo = vacancy_repo
         self.chunk_size = chunk_size
         self.verify_retry = verify_retry
+        self.workers = workers or requester.max_in_flight * 2
+        self.queue_size = queue_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.parse_workers = parse_workers
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self.journal = journal
+        self._progress: Dict[str, RecordProgress] = {}
+        self.incremental = incremental
+        self.known_ratio_threshold = known_ratio_threshold
+        self._known_ids: Dict[str, KnownVacancyIndex] = {DEFAULT_SOURCE: known_ids} if known_ids else {}
+        self.metrics = metrics or REGISTRY
+        self._pages_total = self.metrics.counter(
+            'scraper_pages_total', "Обработанные страницы выдачи по источнику и статусу")
+        self._parse_seconds = self.metrics.histogram('scraper_parse_seconds', "Время разбора одной страницы")
+        self._items_per_page = self.metrics.histogram(
+            'scraper_items_per_page', "Количество вакансий на странице", DEFAULT_COUNT_BUCKETS)
+        self.client = client
+        self.scraped_before = scraped_before
+        self.read_batch_size = read_batch_size
+        self.batch_size = batch_size
+        self.scheduler = scheduler
+        self.run_id = run_id
+        # Записи, которые листаются сейчас или ждут записи страниц в БД, по ключу журнала
+        self._records: Dict[str, _RecordState] = {}
+        # Собранные записи словаря: mainCount и источник, которому он принадлежит
+        self._scraped: Dict[str, Tuple[Optional[int], Optional[str]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dead_letters = dead_letters
+        self.limit = limit
+        self.archive = archive
+        self._failed: List[DeadLetter] = []
+        self._resolved: List[str] = []
+        self._redrive = False
+        self._sequence = itertools.count()
 
-    def _chunked(self, lst, size: int = None):
-        if size:
-            return [lst[i:i + size] for i in range(0, len(lst), size)]
-        return [lst[i:i + self.chunk_size] for i in range(0, len(lst), self.chunk_size)]
+    def _is_valid_response(self, result: dict | Exception) -> bool:
+        """Ответ FaaS не несет URL запроса, поэтому подходит ответ любого из источников"""
+        in_parse_pool = self._parse_pool is not None
+        return any(source.is_valid_response(result, in_parse_pool) for source in self.sources)
 
-    def _get_av_url(self, area, vacancy_name):
-        return f'https://www.avito.ru/{area}/vakansii?cd=1&q={vacancy_name}&s=104'
+    def _source_for_url(self, url: str) -> Optional[VacancySource]:
+        return next((source for source in self.sources if source.owns_url(url)), None)
 
-    def _is_valid_response(self, result: dict | Exception):
-        if isinstance(result, Exception):
-            return False
-        with suppress(Exception):
-            soup = BeautifulSoup(result['text'], 'html.parser')
-            return bool(soup.find('script', {'data-mfe-state': 'true'}))
-        return False
+    def _get_repository(self, source: VacancySource) -> AvVacancyRepository:
+        return self.vacancy_repo if source.name == DEFAULT_SOURCE else self.source_repos[source.name]
 
-    def _get_json_page(self, soup):
-        with suppress(Exception):
-            script = soup.find('script', {'data-mfe-state': 'true'})
-            if script and script.string:
-                return json.loads(script.string.replace('&quot;', '"'))
-        return {}
-
-    def _get_pages_count(self, soup: BeautifulSoup):
-        data = self._get_json_page(soup)
-        count_vacancies = data.get('data', {}).get('mainCount', 0)
-        return math.ceil(min(count_vacancies, 5000) / 50) if count_vacancies else 0
-
-    def _get_page_urls(self, data, pages_count: int):
-        if pages_count <= 1:
-            return []
-
-        pager = data.get('data', {}).get('catalog', {}).get('pager', {})
-        if not pager or 'last' not in pager:
-            return []
-
-        last_page = 'https://www.avito.ru' + pager['last'].replace('amp;', '')
-        start_index = last_page.find('p=') + 2
-        end_index = last_page.find('&', start_index)
-        base_url = last_page[:start_index] + '{}' + last_page[end_index:]
-
-        return [base_url.format(page) for page in range(2, min(pages_count, 100) + 1)]
-
-    async def _parse_pages(self, soup: BeautifulSoup, pages_count: int):
-        data = self._get_json_page(soup)
-        items = data.get('data', {}).get('catalog', {}).get('items', [])
-        vacancies = self._get_vacancies_info(items)
-
-        page_urls = self._get_page_urls(data, pages_count)
-        for url_chunk in self._chunked(page_urls):
-            tasks = [
-                {
-                    "json": {"url": url},
-                    "target_url": url,
-                }
-                for url in url_chunk
-            ]
-
-            results = await self.requester.execute_concurrently(
-                requests=tasks,
-                request_method="POST",
-                response_validator=self._is_valid_response
+    def _get_vacancies_info(self, record: _RecordState, parsed: ParsedPage) -> VacancyBatch:
+        return VacancyBatch.from_items(
+            parsed.items, record.source.url_prefix, parsed.details, record.key, record.source.name
+        )
+
+    async def _should_continue_paging(self, job: _PageJob, vacancies: VacancyBatch) -> bool:
+        """В инкрементальном режиме решает, нужна ли следующая страница, и пополняет индекс"""
+        ids = vacancies.ids
+        known_ids = self._known_ids[job.record.source.name]
+        known_ratio = known_ids.known_ratio(ids)
+        known_ids.add_many(ids)
+
+        if job.page < job.record.pages_count and known_ratio < self.known_ratio_threshold:
+            return True
+        if job.page < job.record.pages_count and self.journal is not None:
+            # Дальше только известные вакансии: для журнала запись завершена на этой странице
+            await asyncio.to_thread(
+                self.journal.set_record_pages, job.record.journal_key, job.page, job.record.page_url_template
             )
+        return False
+
+    async def _parse(self, result: dict, source: VacancySource) -> ParsedPage:
+        if self._parse_pool is None:
+            return source.parse_response(result, self.archive is not None)
+
+        payload = source.extract_payload(result)
+        # Страница больше не нужна: в процесс уходит только нужная для разбора часть
+        result.clear()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._parse_pool, source.parse_payload, payload, self.archive is not None
+        )
+
+    def _put_job(self, jobs: asyncio.PriorityQueue, priority: int, job: _PageJob):
+        job.record.pending += 1
+        jobs.put_nowait((priority, next(self._sequence), job))
+
+    @property
+    def _id_columns(self) -> List[str]:
+        return [source.dict_id_column for source in self.sources]
+
+    def _load_scheduled(self) -> List[DictCityVacancyState]:
+        batches = self.dict_city_repo.iter_batches(
+            self.read_batch_size, self.client, self.scraped_before, with_state=True, id_columns=self._id_columns
+        )
+        states = [state for batch in batches for state in batch]
+        scheduled = self.scheduler.order(states)[:self.limit]
+        logger.info(f"Запланировано {len(scheduled)} записей словаря из {len(states)}, "
+                    f"остальные недавно собраны и малы")
+        return scheduled
+
+    async def _iter_records(self) -> AsyncIterator[DictCityVacancyRow]:
+        """Потоково читает словарь пачками, не блокируя event loop"""
+        if self.scheduler is not None:
+            for record in await asyncio.to_thread(self._load_scheduled):
+                yield record
+            return
 
-            verify_results = [(result, _) for result, _ in results if not isinstance(result, Exception)]
+        read_batch_size = min(self.read_batch_size, self.limit) if self.limit else self.read_batch_size
+        batches = self.dict_city_repo.iter_batches(
+            read_batch_size, self.client, self.scraped_before, id_columns=self._id_columns
+        )
+        remaining = self.limit
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                return
+            if remaining is not None:
+                batch, remaining = batch[:remaining], remaining - len(batch[:remaining])
+            for record in batch:
+                yield record
+            if remaining == 0:
+                return
 
-            if len(results) != len(verify_results):
-                # Тут можно придумать логику обработки отладки
-                print(f"Успешно {len(verify_results)}/{len(results)} запросов")
+    async def _produce(self, records: AsyncIterator[DictCityVacancyRow], jobs: asyncio.PriorityQueue,
+                       records_slots: asyncio.Semaphore):
+        """
+        Ставит первые страницы записей словаря в очередь, пока есть свободные слоты.
+        Запись листается каждым источником отдельно и занимает слот на каждый источник
+        """
+        skipped = 0
+        async for record in records:
+            targets = []
+            for source in self.sources:
+                url = source.first_page_url(record)
+                if url is None:
+                    continue
+                progress = self._progress.get(source.journal_key(record.city_vacancyname_key))
+                if progress is not None and progress.is_done:
+                    skipped += 1
+                    continue
+                targets.append((source, url, progress))
+
+            # Общее состояние создается до ожидания слотов: первый источник может завершиться раньше,
+            # чем будут поставлены остальные
+            key_state = _KeyState(len(targets))
+            for source, url, progress in targets:
+                await records_slots.acquire()
+                state = _RecordState(record.city_vacancyname_key, source,
+                                     progress.persisted_pages if progress else (), key_state)
+                self._records[state.journal_key] = state
+
+                if progress is not None and progress.page_url_template and 1 in progress.persisted_pages:
+                    # Первая страница уже сохранена: запрашиваем только недостающие
+                    for page in progress.missing_pages():
+                        page_url = source.page_url(progress.page_url_template, page)
+                        self._put_job(jobs, FIRST_PAGE_PRIORITY, _PageJob(state, page, page_url))
+                else:
+                    self._put_job(jobs, FIRST_PAGE_PRIORITY, _PageJob(state, 1, url))
+
+        if skipped:
+            logger.info(f"Пропущено {skipped} записей, полностью сохраненных в запуске {self.journal.run_id}")
+
+    async def _produce_dead_letters(self, entries: List[DeadLetter], jobs: asyncio.PriorityQueue,
+                                    records_slots: asyncio.Semaphore):
+        """Ставит в очередь неудачные страницы, сгруппированные по источникам и записям словаря"""
+        groups: Dict[Tuple[VacancySource, str], List[DeadLetter]] = defaultdict(list)
+        for entry in entries:
+            source = self._source_for_url(entry.target_url)
+            if source is None:
+                logger.warning(f"Страница {entry.target_url} не относится ни к одному из источников, пропущена")
+                continue
+            groups[(source, entry.city_vacancyname_key)].append(entry)
+
+        for (source, key), group in groups.items():
+            await records_slots.acquire()
+            # Если не удалась первая страница, после нее добавятся остальные страницы записи, кроме уже поставленных
+            state = _RecordState(key, source, (entry.page for entry in group))
+            for entry in group:
+                self._put_job(jobs, FIRST_PAGE_PRIORITY, _PageJob(state, entry.page, entry.target_url))
+
+    def _buffer_dead_letter(self, record: _RecordState, page: int, url: str, error: BaseException):
+        record.failed = True
+        if self.dead_letters is not None:
+            self._failed.append(DeadLetter.from_error(url, record.key, page, error))
+
+    async def _add_dead_letter(self, job: _PageJob, error: BaseException):
+        self._buffer_dead_letter(job.record, job.page, job.url, error)
+        if len(self._failed) >= DEAD_LETTER_FLUSH_SIZE:
+            await self._flush_dead_letters()
+
+    async def _flush_dead_letters(self):
+        if self.dead_letters is None or not self._failed:
+            return
+        failed, self._failed = self._failed, []
+        run_id = self.journal.run_id if self.journal is not None else None
+        await asyncio.to_thread(self.dead_letters.add_many, failed, run_id, self._redrive)
+
+    def _record_finished(self, record: _RecordState):
+        """
+        Источник закончил запись, если все ее страницы обработаны и записаны в БД.
+        Запись словаря собрана, когда закончили все источники и ни у одного нет неудачных страниц
+        """
+        if record.key_state is None or record.pending or record.unpersisted:
+            return
+        if self._records.pop(record.journal_key, None) is not record:
+            return
+        key_state = record.key_state
+        key_state.remaining -= 1
+        key_state.failed = key_state.failed or record.failed
+        if record.main_count is not None and (
+            key_state.main_source is None
+            or self.sources.index(record.source) < self.sources.index(key_state.main_source)
+        ):
+            key_state.main_count, key_state.main_source = record.main_count, record.source
+        if not key_state.remaining and not key_state.failed:
+            main_source = key_state.main_source.name if key_state.main_source is not None else None
+            self._scraped[record.key] = (key_state.main_count, main_source)
+
+    def _pages_persisted(self, pages: List[Tuple[str, int]]):
+        for journal_key, page in pages:
+            record = self._records.get(journal_key)
+            if record is not None:
+                record.unpersisted.pop(page, None)
+                self._record_finished(record)
+
+    def _pages_failed(self, pages: List[Tuple[str, int]], error: Exception):
+        """Вызывается writer после неудачного сброса: страницы пачки уходят в dead_letters"""
+        for journal_key, page in pages:
+            record = self._records.get(journal_key)
+            url = record.unpersisted.pop(page, None) if record is not None else None
+            if url is None:
+                continue
+            self._buffer_dead_letter(record, page, url, error)
+            self._record_finished(record)
+
+    def _on_flush(self, pages: List[Tuple[str, int]]):
+        """Вызывается в потоке записи после успешного сброса пачки"""
+        if self.journal is not None:
+            self.journal.mark_pages_persisted(pages)
+        self._loop.call_soon_threadsafe(self._pages_persisted, pages)
 
-            for result, _ in verify_results:
-                page_soup = BeautifulSoup(result['text'], 'html.parser')
-                page_data = self._get_json_page(page_soup)
-                page_items = page_data.get('data', {}).get('catalog', {}).get('items', [])
-                vacancies.extend(self._get_vacancies_info(page_items))
+    async def _flush_scraped(self):
+        """Отмечает собранными записи, все страницы которых записаны в БД (LeasedRecordSource завершает задания)"""
+        if not self._scraped:
+            return
+        scraped, self._scraped = self._scraped, {}
+        main_counts = {key: main_count for key, (main_count, _) in scraped.items()}
+        main_sources = {key: source for key, (main_count, source) in scraped.items() if main_count is not None}
+        await asyncio.to_thread(self.dict_city_repo.mark_scraped, list(scraped), None, main_counts, main_sources)
 
-        return vacancies
+    async def _close_when_done(self, producer: asyncio.Task, jobs: asyncio.PriorityQueue):
+        """
+        Завершает очередь заданий, когда записи закончились и все задания обработаны.
+        Если чтение записей упало, очередь завершается после уже поставленных заданий,
+        а ошибка producer пробрасывается из этой задачи
+        """
+        try:
+            await producer
+            await jobs.join()
+        finally:
+            jobs.put_nowait((LAST_PRIORITY, next(self._sequence), None))
 
-    def _get_vacancies_info(self, items):
-        return [
-            {
-                "vacancy_id": item.get('id'),
-                "vacancy_name": item.get('title'),
-                "vacancy_url": f"https://www.avito.ru{item.get('urlPath')}" if item.get('urlPath') else None
-            }
-            for item in items[1:]
-        ]
+    async def _iter_requests(self, jobs: asyncio.PriorityQueue, in_flight: Dict[str, List[_PageJob]]):
+        """
+        Источник запросов для requester.iter_concurrently. В пакетном режиме к первому
+        заданию добавляются уже стоящие в очереди (обычно - остальные страницы той же записи)
+        """
+        while True:
+            _, _, job = await jobs.get()
+            if job is None:
+                return
+            in_flight[job.url].append(job)
+            if self.batch_size <= 1:
+                yield job.to_request()
+                continue
+
+            batch = [job.to_request()]
+            while len(batch) < self.batch_size and not jobs.empty():
+                item = jobs.get_nowait()
+                if item[2] is None:
+                    jobs.put_nowait(item)
+                    jobs.task_done()
+                    break
+                in_flight[item[2].url].append(item[2])
+                batch.append(item[2].to_request())
+            yield batch if len(batch) > 1 else batch[0]
+
+    async def _handle_result(self, job: _PageJob, result, jobs: asyncio.PriorityQueue, writer: AsyncVacancyWriter):
+        source = job.record.source
+        if isinstance(result, Exception):
+            self._pages_total.inc(source=source.name, status='failed')
+            logger.warning(f"Не удалось загрузить страницу {job.page} ({job.url}): {result!r}")
+            await self._add_dead_letter(job, result)
+            return
+
+        try:
+            with self._parse_seconds.time():
+                parsed = await self._parse(result, source)
+        except StateDecodeError as e:
+            # Страница прошла быструю проверку в режиме процессов, но не разобралась: не считаем ее пустой
+            # и убираем из кэша ответов, чтобы повторная загрузка не получила ее снова
+            self._pages_total.inc(source=source.name, status='failed')
+            logger.warning(f"Не удалось разобрать страницу {job.page} ({job.url}): {e!r}")
+            await self.requester.evict_cached(job.to_request())
+            await self._add_dead_letter(job, e)
+            return
+        self._pages_total.inc(source=source.name, status='ok')
+        self._items_per_page.observe(len(parsed.items))
+
+        if job.page == 1:
+            pages_count = source.pages_count(parsed)
+            page_url_template = source.page_url_template(parsed, job.url)
+            if not page_url_template:
+                pages_count = min(pages_count, 1)
+            job.record.pages_count = pages_count
+            job.record.main_count = parsed.main_count
+            job.record.page_url_template = page_url_template
+            if self.journal is not None:
+                # SQLite пишется вне event loop, как и отметки сохраненных страниц в потоке записи
+                await asyncio.to_thread(self.journal.set_record_pages, job.record.journal_key, pages_count,
+                                        page_url_template)
+            if not pages_count:
+                return
+            if not self.incremental:
+                for page, url in source.page_urls(page_url_template, pages_count):
+                    if page not in job.record.skip_pages:
+                        self._put_job(jobs, PAGE_PRIORITY, _PageJob(job.record, page, url))
+
+        vacancies = self._get_vacancies_info(job.record, parsed)
+        if self.incremental and job.record.page_url_template and await self._should_continue_paging(job, vacancies):
+            next_page = job.page + 1
+            url = source.page_url(job.record.page_url_template, next_page)
+            self._put_job(jobs, PAGE_PRIORITY, _PageJob(job.record, next_page, url))
+
+        # Пустые страницы тоже передаются в writer, чтобы журнал отметил их сохраненными
+        job.record.unpersisted[job.page] = job.url
+        await writer.put(job.record.journal_key, job.page, vacancies)
+        if self._redrive:
+            self._resolved.append(job.url)
 
     async def run(self):
-        dict_city_records = self.dict_city_repo.get_all()
-        for chunk in self._chunked(dict_city_records, 1):
-            tasks = [
-                {
-                    "json": {"url": self._get_av_url(record.id_av, record.vacancy_name)},
-                    "target_url": self._get_av_url(record.id_av, record.vacancy_name),
-                }
-                for record in chunk
-            ]
-
-            responses = await self.requester.execute_concurrently(
-                requests=tasks,
-                request_method="POST",
-                response_validator=self._is_valid_response
-            )
+        """Полный проход по словарю"""
+        await self._run(lambda jobs, records_slots: self._produce(self._iter_records(), jobs, records_slots))
 
-            verify_responses = [(response, _) for response, _ in responses if not isinstance(response, Exception)]
+    async def redrive(self, entries: Iterable[DeadLetter]):
+        """
+        Повторно загружает только неудачные страницы (например, DeadLetterRepository.get_pending).
+        Успешно загруженные отмечаются решенными, повторные ошибки снова сохраняются в dead_letters.
+        Журнал и отметки о сборе записей словаря в этом режиме не ведутся
+        """
+        if self.dead_letters is None:
+            raise ValueError("Для повторной загрузки неудачных страниц нужен dead_letters")
+        entries = sorted(entries, key=lambda entry: (entry.city_vacancyname_key, entry.page))
+        self._redrive = True
+        try:
+            await self._run(lambda jobs, records_slots: self._produce_dead_letters(entries, jobs, records_slots))
+        finally:
+            self._redrive = False
 
-            if len(responses) != len(verify_responses):
-                # Тут можно придумать логику обработки отладки
-                print(f"Успешно {len(verify_responses)}/{len(responses)} запросов")
+    async def _run(self, produce: Callable[[asyncio.PriorityQueue, asyncio.Semaphore], Awaitable[None]]):
+        jobs: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        records_slots = asyncio.Semaphore(self.chunk_size)
+        in_flight: Dict[str, List[_PageJob]] = defaultdict(list)
+        self._loop = asyncio.get_running_loop()
+        self._records = {}
+        if self.journal is not None:
+            self._progress = await asyncio.to_thread(self.journal.load_progress)
+        for source in self.sources if self.incremental else ():
+            if source.name not in self._known_ids:
+                self._known_ids[source.name] = await asyncio.to_thread(
+                    KnownVacancyIndex.from_ids, self._get_repository(source).iter_vacancy_ids(), True
+                )
+                logger.info(f"Загружено {len(self._known_ids[source.name])} известных vacancy_id ({source.name})")
 
-            all_vacancies = []
+        writer = AsyncVacancyWriter(
+            self.vacancy_repo,
+            batch_size=self.flush_size,
+            flush_interval=self.flush_interval,
+            queue_size=self.queue_size,
+            on_flush=self._on_flush,
+            on_failed=self._pages_failed,
+            metrics=self.metrics,
+            run_id=self.journal.run_id if self.journal is not None else self.run_id,
+            archive=self.archive,
+            source_repos=self.source_repos
+        )
+        await writer.start()
+        if self.parse_workers:
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        producer = asyncio.create_task(produce(jobs, records_slots))
+        closer = asyncio.create_task(self._close_when_done(producer, jobs))
 
-            for (response, _) in verify_responses:
-                soup = BeautifulSoup(response['text'], 'html.parser')
-                pages_count = self._get_pages_count(soup)
-                if not pages_count:
-                    continue
+        try:
+            results = self.requester.iter_concurrently(
+                self._iter_requests(jobs, in_flight),
+                request_method="POST",
+                response_validator=self._is_valid_response,
+                retry_validator=self.verify_retry,
+                max_in_flight=self.workers,
+                # Неудачная страница могла попасть в кэш ответов: повторная загрузка идет мимо него
+                use_cache=not self._redrive
+            )
+            async for result, target_url in results:
+                job = in_flight[target_url].pop()
+                if not in_flight[target_url]:
+                    del in_flight[target_url]
+                try:
+                    await self._handle_result(job, result, jobs, writer)
+                except Exception as e:
+                    logger.error(f"Ошибка обработки страницы {job.page} ({job.url}): {e!r}")
+                    await self._add_dead_letter(job, e)
+                finally:
+                    job.record.pending -= 1
+                    if not job.record.pending:
+                        records_slots.release()
+                        self._record_finished(job.record)
+                    jobs.task_done()
+                if len(self._scraped) >= SCRAPED_FLUSH_SIZE:
+                    await self._flush_scraped()
+            await closer
+            await writer.close()
+            await self._flush_scraped()
+            if self._resolved and not writer.failed_count:
+                await asyncio.to_thread(self.dead_letters.mark_resolved, self._resolved)
+                self._resolved = []
+            if self.journal is not None and not self._redrive:
+                if writer.failed_count:
+                    # Страницы неудачных пачек остаются в журнале несохраненными и будут загружены при --resume
+                    logger.warning(f"Запуск {self.journal.run_id} не завершен: не записаны "
+                                   f"{writer.failed_count} вакансий")
+                else:
+                    await asyncio.to_thread(self.journal.finish_run)
+        finally:
+            for task in (producer, closer):
+                task.cancel()
+            await asyncio.gather(producer, closer, return_exceptions=True)
+
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown(wait=True)
+                self._parse_pool = None
+            await writer.close()
+            # Записи, полностью сохраненные до сбоя, тоже отмечаются собранными,
+            # а накопленные неудачные страницы сохраняются для повторной загрузки
+            await self._flush_scraped()
+            failed_count = len(self._failed)
+            try:
+                await self._flush_dead_letters()
+            except Exception as e:
+                logger.error(f"Не удалось сохранить {failed_count} неудачных страниц: {e!r}")
+            self._records = {}
 
-                vacancies = await self._parse_pages(soup, pages_count)
-                all_vacancies.extend(vacancies)
 
-            if all_vacancies:
-                self.vacancy_repo.bulk_insert(all_vacancies)
+# Прежнее имя, пока собирались только вакансии Avito
+AvitoVacancyScrapper = VacancyScrapper
@@ -0,0 +1,36 @@
+import logging
+from typing import Optional
+
+import httpx
+import pytest
+
+from benchmarks.fake_faas import FakeFaas
+from metrics import MetricsRegistry
+from repositories.faas_requester import FaasRequester
+from repositories.header_factory import HeaderFactory
+from repositories.retry_policy import RetryPolicy
+
+# Пул заголовков собирается из данных fake_useragent долго, поэтому он общий на все тесты
+HEADER_FACTORY = HeaderFactory(pool_size=2)
+
+
+def make_requester(transport: httpx.AsyncBaseTransport, retry: int = 3, max_concurrent: int = 5,
+                   retry_policy: Optional[RetryPolicy] = None, **kwargs) -> FaasRequester:
+    """FaasRequester без сети и без задержек между повторами"""
+    return FaasRequester(
+        'http://fake-faas',
+        retry=retry,
+        max_concurrent=max_concurrent,
+        log_level=logging.ERROR,
+        retry_policy=retry_policy or RetryPolicy(max_attempts=retry, base_delay=0, jitter=False),
+        metrics=MetricsRegistry(),
+        transport=transport,
+        header_factory=HEADER_FACTORY,
+        **kwargs
+    )
+
+
+@pytest.fixture
+def fake_faas() -> FakeFaas:
+    return FakeFaas(latency=0, batch_item_latency=0, max_count=300, page_size_kb=1, shared_ids_rate=0, seed=1)
+
@@ -0,0 +1,20 @@
+from repositories.dead_letter import DeadLetter, DeadLetterRepository
+from repositories.retry_policy import ResponseValidationError, RetryExhaustedError
+
+
+def test_from_error_keeps_last_error_and_attempts():
+    entry = DeadLetter.from_error('u', 'k', 2, RetryExhaustedError(ResponseValidationError('captcha'), 5))
+    assert entry == DeadLetter('u', 'k', 2, 'ResponseValidationError', 'captcha', 5)
+
+
+def test_repeated_pages_are_merged_into_one_row():
+    rows = DeadLetterRepository._merge_rows([
+        DeadLetter('u1', 'k', 1, 'ReadTimeout', '', 3),
+        DeadLetter('u2', 'k', 2, 'ReadTimeout', '', 1),
+        DeadLetter('u1', 'k', 1, 'StateDecodeError', 'обрезан', 1),
+    ], 'run')
+
+    assert [(row['target_url'], row['error_class'], row['attempts']) for row in rows] == [
+        ('u1', 'StateDecodeError', 4), ('u2', 'ReadTimeout', 1)
+    ]
+    assert {row['run_id'] for row in rows} == {'run'}
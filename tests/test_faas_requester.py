@@ -0,0 +1,171 @@
+import asyncio
+import json
+from collections import Counter
+
+import httpx
+
+from repositories.retry_policy import CircuitBreaker, CircuitOpenError, RetryExhaustedError, RetryPolicy
+from scrappers.mfe_state import get_mfe_state
+from tests.conftest import make_requester
+
+
+def page_requests(count: int):
+    urls = [f"https://www.avito.ru/moskva/vakansii?cd=1&q=q{i}&s=104" for i in range(count)]
+    return [{"json": {"url": url}, "target_url": url} for url in urls]
+
+
+async def collect(requester, requests, **kwargs):
+    try:
+        return await requester.execute_concurrently(requests, "POST", **kwargs)
+    finally:
+        await requester.close()
+
+
+async def stream(requester, requests, **kwargs):
+    try:
+        return [item async for item in requester.iter_concurrently(requests, "POST", **kwargs)]
+    finally:
+        await requester.close()
+
+
+def test_iter_concurrently_returns_every_result(fake_faas):
+    requests = page_requests(30)
+    results = asyncio.run(stream(make_requester(fake_faas.transport()), requests, response_validator=get_mfe_state))
+
+    assert sorted(target for _, target in results) == sorted(request['target_url'] for request in requests)
+    assert all(get_mfe_state(result) for result, _ in results)
+    assert fake_faas.calls == 30
+
+
+def test_iter_concurrently_bounds_in_flight_requests():
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.005)
+        in_flight -= 1
+        return httpx.Response(200, json={"text": 'ok'})
+
+    results = asyncio.run(stream(make_requester(httpx.MockTransport(handler), max_concurrent=3), page_requests(20)))
+    assert len(results) == 20
+    assert peak == 3
+
+
+def test_iter_concurrently_pulls_lazily_from_async_source(fake_faas):
+    pulled = 0
+
+    async def source():
+        nonlocal pulled
+        for request in page_requests(50):
+            pulled += 1
+            yield request
+
+    async def first_result():
+        requester = make_requester(fake_faas.transport())
+        try:
+            async for item in requester.iter_concurrently(source(), "POST", max_in_flight=4):
+                return item
+        finally:
+            await requester.close()
+
+    asyncio.run(first_result())
+    assert pulled <= 5
+
+
+def test_validation_failures_are_retried_then_exhausted():
+    first, second = (request['target_url'] for request in page_requests(2))
+    calls = Counter()
+
+    async def handler(request):
+        url = json.loads(request.content)['url']
+        calls[url] += 1
+        # Первая страница проходит валидацию с третьей попытки, вторая - никогда
+        recovered = url == first and calls[url] >= 3
+        return httpx.Response(200, json={"text": 'valid' if recovered else 'captcha'})
+
+    results = asyncio.run(collect(make_requester(httpx.MockTransport(handler)), page_requests(2),
+                                  response_validator=lambda result: result['text'] == 'valid', retry_validator=3))
+    results = {target: result for result, target in results}
+    assert results[first] == {"text": 'valid'}
+    assert isinstance(results[second], RetryExhaustedError)
+    assert calls == {first: 3, second: 3}
+
+
+def test_client_errors_are_not_retried():
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(404, json={})
+
+    [(result, _)] = asyncio.run(collect(make_requester(httpx.MockTransport(handler), retry=5), page_requests(1)))
+    assert isinstance(result, RetryExhaustedError)
+    assert result.attempts == 1 and calls == 1
+
+
+def test_open_breaker_rejects_requests():
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503, json={})
+
+    async def scenario():
+        policy = RetryPolicy(max_attempts=2, base_delay=0,
+                             breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=60))
+        requester = make_requester(httpx.MockTransport(handler), retry_policy=policy)
+        try:
+            return [await requester.execute_one(request, "POST") for request in page_requests(3)]
+        finally:
+            await requester.close()
+
+    results = [result for result, _ in asyncio.run(scenario())]
+    assert isinstance(results[0], RetryExhaustedError)
+    assert all(isinstance(result, CircuitOpenError) for result in results[1:])
+    # После открытия предохранителя запросы в FaaS не уходят
+    assert calls == 2
+
+
+def test_execute_batch_retries_failed_items_one_by_one(fake_faas):
+    batch_calls = single_calls = 0
+    broken = page_requests(3)[1]['target_url']
+
+    async def handler(request):
+        nonlocal batch_calls, single_calls
+        payload = json.loads(request.content)
+        if 'urls' not in payload:
+            single_calls += 1
+            return await fake_faas.handler(request)
+        batch_calls += 1
+        items = [
+            {"url": url, "error": 'timeout', "status": 504} if url == broken
+            else {"url": url, "text": fake_faas.render_page(url)}
+            for url in payload['urls'][:-1]
+        ]
+        return httpx.Response(200, json={"results": items})
+
+    async def scenario():
+        requester = make_requester(httpx.MockTransport(handler))
+        try:
+            return await requester.execute_batch(page_requests(3), get_mfe_state)
+        finally:
+            await requester.close()
+
+    results = asyncio.run(scenario())
+    assert [target for _, target in results] == [request['target_url'] for request in page_requests(3)]
+    assert all(get_mfe_state(result) for result, _ in results)
+    # Второй URL вернулся с ошибкой, третьего нет в ответе: оба запрошены отдельно
+    assert batch_calls == 1 and single_calls == 2
+
+
+def test_batches_from_iter_concurrently_are_flattened(fake_faas):
+    requests = page_requests(10)
+    batches = [requests[i:i + 4] for i in range(0, 10, 4)]
+    results = asyncio.run(stream(make_requester(fake_faas.transport()), batches, response_validator=get_mfe_state))
+
+    assert len(results) == 10
+    assert fake_faas.batch_calls == 3 and fake_faas.calls == 3
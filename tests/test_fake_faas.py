@@ -0,0 +1,23 @@
+import asyncio
+
+from benchmarks.fake_faas import FakeFaas
+from scrappers.mfe_state import get_mfe_state
+from tests.conftest import make_requester
+
+TARGET_URL = "https://www.avito.ru/ekaterinburg/vakansii/dvoynaya_oplata_na_ispytatelnyy_srok._montazhnik_na_lyubom_avto_7462380113"
+
+
+def test_execute_concurrently_survives_faas_errors():
+    fake = FakeFaas(latency=0, error_rate=0.3, invalid_rate=0.2, page_size_kb=1, seed=7)
+
+    async def main():
+        async with make_requester(fake.transport(), retry=10) as requester:
+            tasks = [{"json": {"url": TARGET_URL}, "target_url": TARGET_URL} for _ in range(10)]
+            return await requester.execute_concurrently(tasks, "POST", response_validator=get_mfe_state)
+
+    results = asyncio.run(main())
+    failed = [result for result, _ in results if isinstance(result, Exception)]
+    assert not failed, failed
+    assert len(results) == 10
+    # Часть ответов пришла с ошибкой или капчей и была запрошена повторно
+    assert fake.calls > 10
@@ -0,0 +1,24 @@
+from scrappers.known_ids import KnownVacancyIndex
+
+
+def test_lookup_in_sorted_ids_and_added():
+    index = KnownVacancyIndex.from_ids([30, 10, 20, 10])
+    assert len(index) == 3
+    assert 10 in index and 30 in index
+    assert 15 not in index and 40 not in index
+
+    index.add_many([40, 5])
+    assert 40 in index and 5 in index
+    assert len(index) == 5
+
+
+def test_presorted_ids_are_used_as_is():
+    index = KnownVacancyIndex.from_ids(iter([1, 2, 3]), presorted=True)
+    assert 2 in index and 4 not in index
+
+
+def test_known_ratio():
+    index = KnownVacancyIndex.from_ids([1, 2, 3])
+    assert index.known_ratio([1, 2, 7, 8]) == 0.5
+    assert index.known_ratio([]) == 0.0
+    assert KnownVacancyIndex().known_ratio([1]) == 0.0
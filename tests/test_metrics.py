@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from metrics import MetricsExporter, MetricsRegistry
+
+
+def test_counter_exposition():
+    registry = MetricsRegistry()
+    counter = registry.counter('pages_total', "Страницы")
+    counter.inc(source='avito', status='ok')
+    counter.inc(2, status='ok', source='avito')
+    counter.inc(status='failed', source='hh')
+
+    assert registry.to_prometheus().splitlines() == [
+        '# HELP pages_total Страницы',
+        '# TYPE pages_total counter',
+        'pages_total{source="avito",status="ok"} 3',
+        'pages_total{source="hh",status="failed"} 1',
+    ]
+
+
+def test_counter_without_labels():
+    registry = MetricsRegistry()
+    registry.counter('runs_total', "Запуски").inc()
+    assert registry.to_prometheus().endswith('runs_total 1\n')
+    assert registry.snapshot()['runs_total'] == {'total': 1}
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('errors_total', "Ошибки").inc(error='say "hi"\\\n')
+    assert 'errors_total{error="say \\"hi\\"\\\\\\n"} 1' in registry.to_prometheus().splitlines()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('flush_seconds', "Сброс", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, source='avito')
+
+    assert registry.to_prometheus().splitlines()[2:] == [
+        'flush_seconds_bucket{source="avito",le="0.1"} 2',
+        'flush_seconds_bucket{source="avito",le="1.0"} 3',
+        'flush_seconds_bucket{source="avito",le="+Inf"} 4',
+        'flush_seconds_sum{source="avito"} 3.65',
+        'flush_seconds_count{source="avito"} 4',
+    ]
+    assert histogram.quantile(0.5, source='avito') == 0.1
+    assert histogram.quantile(0.99, source='avito') == float('inf')
+    assert histogram.quantile(0.5) is None
+
+
+def test_registry_returns_existing_metric():
+    registry = MetricsRegistry()
+    assert registry.counter('a_total', "A") is registry.counter('a_total', "другое описание")
+
+
+def test_exporter_writes_json_snapshot(tmp_path):
+    registry = MetricsRegistry()
+    registry.histogram('parse_seconds', "Разбор").observe(0.02)
+    path = tmp_path / 'metrics.json'
+
+    async def scenario():
+        exporter = MetricsExporter(registry, str(path), interval=60)
+        exporter.start()
+        await exporter.stop()
+
+    asyncio.run(scenario())
+    snapshot = json.loads(path.read_text())
+    assert snapshot['parse_seconds']['total']['count'] == 1
+    assert snapshot['parse_seconds']['total']['p50'] == 0.025
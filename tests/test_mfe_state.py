@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from bs4 import BeautifulSoup
+
+from benchmarks.fake_faas import FakeFaas
+from scrappers.mfe_state import extract_mfe_state, extract_mfe_state_blob, get_mfe_state, get_mfe_state_blob
+from scrappers.page_parser import StateDecodeError, parse_state_blob
+
+
+def bs4_state(text: str) -> dict:
+    """Прежний разбор через BeautifulSoup (до извлечения блока без построения DOM)"""
+    try:
+        script = BeautifulSoup(text, 'html.parser').find('script', {'data-mfe-state': 'true'})
+        if script and script.string:
+            return json.loads(script.string.replace('&quot;', '"'))
+    except Exception:
+        pass
+    return {}
+
+
+STATE = {"data": {"mainCount": 2, "catalog": {"items": [{"id": 1, "title": "Курьер"}]}}}
+BLOB = json.dumps(STATE, ensure_ascii=False).replace('"', '&quot;')
+
+PAGES = [
+    f'<html><body><script type="mime/invalid" data-mfe-state="true">{BLOB}</script></body></html>',
+    f'<script data-mfe-state="true" type="mime/invalid">{BLOB}</script>',
+    f"<script data-mfe-state='true'>{BLOB}</script>",
+    f'<p>data-mfe-state</p><script src="a.js"></script><script data-mfe-state="true">{BLOB}</SCRIPT>',
+    f'<script data-mfe-state="false">{BLOB}</script>',
+    f'<script data-mfe-state="true"></script>',
+    f'<script data-mfe-state="true">{{not json</script>',
+    '<html><body><h1>Доступ ограничен</h1></body></html>',
+    '',
+]
+
+
+@pytest.mark.parametrize('text', PAGES)
+def test_extract_matches_bs4(text):
+    assert extract_mfe_state(text) == bs4_state(text)
+
+
+def test_extract_matches_bs4_on_fake_faas_page():
+    text = FakeFaas(page_size_kb=50).render_page('https://www.avito.ru/moskva/vakansii?cd=1&q=kurier&s=104')
+    state = extract_mfe_state(text)
+    assert state == bs4_state(text)
+    assert state['data']['catalog']['pager']['last']
+
+
+def test_unclosed_script_is_not_found():
+    assert extract_mfe_state_blob(f'<script data-mfe-state="true">{BLOB}') == ''
+
+
+def test_response_caches_blob_and_state():
+    response = {"text": PAGES[0]}
+    assert get_mfe_state(response) == STATE
+    assert get_mfe_state_blob(response) == BLOB
+    response['text'] = ''
+    assert get_mfe_state(response) == STATE
+
+
+def test_parse_state_blob_reports_truncated_blob():
+    assert parse_state_blob(BLOB, False).main_count == 2
+    with pytest.raises(StateDecodeError):
+        parse_state_blob(BLOB[:40], False)
@@ -0,0 +1,70 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('pandas')
+
+from repositories.parquet_archive import ParquetVacancyArchive, read_archive  # noqa: E402
+from repositories.vacancy_batch import VacancyBatch  # noqa: E402
+
+
+def make_batch(first_id: int, count: int, key: str = 'moskva_kurier') -> VacancyBatch:
+    items = [(str(first_id + i), f"Курьер {i}", f"/moskva/vakansii/kurier_{first_id + i}") for i in range(count)]
+    details = [(50000 + i, f"{50000 + i} ₽", 'Москва', 1717236000000, None) for i in range(count)]
+    return VacancyBatch.from_items(items, details=details, key=key)
+
+
+def archive_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root)
+        for directory, _, names in os.walk(root) for name in names
+    )
+
+
+def test_write_and_read_back(tmp_path):
+    root = str(tmp_path)
+    with ParquetVacancyArchive(root, run_id='run1', row_group_size=3) as archive:
+        archive.write(make_batch(100, 5), datetime(2024, 6, 1, 10))
+
+    assert archive.rows_written == 5
+    frame = read_archive(root)
+    assert sorted(frame['vacancy_id']) == list(range(100, 105))
+    assert set(frame['run_id']) == {'run1'}
+    assert set(frame['scraped_date']) == {'2024-06-01'}
+    assert frame['vacancy_url'][0].startswith('https://www.avito.ru/moskva/vakansii/')
+
+    prices = read_archive(root, columns=['vacancy_id', 'price_value'], filters=[('price_value', '>=', 50003)])
+    assert list(prices.columns) == ['vacancy_id', 'price_value']
+    assert sorted(prices['vacancy_id']) == [103, 104]
+
+
+def test_new_file_on_date_change(tmp_path):
+    root = str(tmp_path)
+    archive = ParquetVacancyArchive(root, run_id='run1')
+    archive.write(make_batch(1, 2), datetime(2024, 6, 1, 23, 59))
+    archive.write(make_batch(3, 2), datetime(2024, 6, 2, 0, 1))
+    # Файл первого дня закрыт при смене даты, второй еще пишется
+    assert len(archive.files_written) == 1
+    archive.close()
+
+    files = archive_files(root)
+    assert [path.split(os.sep)[0] for path in files] == ['scraped_date=2024-06-01', 'scraped_date=2024-06-02']
+    assert sorted(read_archive(root, date_from=date(2024, 6, 2))['vacancy_id']) == [3, 4]
+    assert sorted(read_archive(root, date_to=date(2024, 6, 1))['vacancy_id']) == [1, 2]
+
+
+def test_file_in_progress_is_hidden_until_closed(tmp_path):
+    root = str(tmp_path)
+    archive = ParquetVacancyArchive(root, run_id='run1', row_group_size=2)
+    archive.write(make_batch(1, 3), datetime(2024, 6, 1))
+
+    [in_progress] = archive_files(root)
+    assert os.path.basename(in_progress).startswith('_run1-')
+    assert read_archive(root).empty
+
+    archive.close()
+    [closed] = archive_files(root)
+    assert closed == in_progress.replace(f'{os.sep}_run1-', f'{os.sep}run1-')
+    assert len(read_archive(root)) == 3
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import math
+
+import httpx
+import pytest
+
+from benchmarks.bench import InMemoryDictRepository, InMemoryVacancyRepository
+from metrics import MetricsRegistry
+from repositories.dict_city_vacancy import DictCityVacancyRow
+from repositories.response_cache import DiskResponseCache
+from repositories.run_journal import RunJournal
+from scrappers.vacancy_scrapper import VacancyScrapper
+from tests.conftest import make_requester
+
+RECORDS = [DictCityVacancyRow(f"city{i % 3}_q{i}", f"city{i % 3}", f"q{i}") for i in range(12)]
+
+
+class DeadLetters:
+    def __init__(self):
+        self.entries = []
+        self.resolved = []
+
+    def add_many(self, entries, run_id=None, redrive=False):
+        self.entries.extend(entries)
+
+    def mark_resolved(self, target_urls):
+        self.resolved.extend(target_urls)
+
+
+class FailingDictRepository(InMemoryDictRepository):
+    """Словарь, чтение которого обрывается после первой пачки"""
+    def iter_batches(self, batch_size: int = 1000, client=None, scraped_before=None, id_columns=None):
+        yield self.records[:batch_size]
+        raise RuntimeError('db down')
+
+
+class FlakyVacancyRepository(InMemoryVacancyRepository):
+    """Репозиторий вакансий, первая запись в который не удается"""
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def copy_upsert(self, vacancies, run_id=None):
+        if self.failures:
+            self.failures -= 1
+            return None
+        return super().copy_upsert(vacancies, run_id)
+
+
+def pages_count(fake, record) -> int:
+    count = fake.main_count(f"{record.id_av}:{record.vacancy_name}")
+    return math.ceil(min(count, 5000) / 50)
+
+
+def run_scrapper(transport, dict_repo, vacancy_repo, response_cache=None, redrive=None, **kwargs):
+    async def main():
+        requester = make_requester(transport, response_cache=response_cache)
+        try:
+            scrapper = VacancyScrapper(requester, dict_repo, vacancy_repo, verify_retry=2, flush_size=100,
+                                       metrics=MetricsRegistry(), **kwargs)
+            await (scrapper.run() if redrive is None else scrapper.redrive(redrive))
+        finally:
+            await requester.close()
+    asyncio.run(main())
+
+
+def failing_page_handler(fake, url_part: str):
+    """FaaS, который для страниц с url_part всегда отдает капчу"""
+    async def handler(request):
+        if url_part in json.loads(request.content).get('url', ''):
+            return httpx.Response(200, json={"text": fake.render_invalid_page()})
+        return await fake.handler(request)
+    return handler
+
+
+def multi_page_record(fake) -> DictCityVacancyRow:
+    return next(record for record in RECORDS if pages_count(fake, record) >= 2)
+
+
+def test_every_page_is_collected(fake_faas):
+    dict_repo, vacancy_repo = InMemoryDictRepository(RECORDS), InMemoryVacancyRepository()
+    run_scrapper(fake_faas.transport(), dict_repo, vacancy_repo, chunk_size=4)
+
+    assert fake_faas.calls == sum(max(pages_count(fake_faas, record), 1) for record in RECORDS)
+    assert len(vacancy_repo.ids) == sum(
+        fake_faas.main_count(f"{record.id_av}:{record.vacancy_name}") for record in RECORDS
+    )
+    assert set(dict_repo.scraped) == {record.city_vacancyname_key for record in RECORDS}
+
+
+@pytest.mark.parametrize('parse_workers', [0, 1])
+def test_undecodable_state_is_not_an_empty_page(fake_faas, parse_workers, tmp_path):
+    record = multi_page_record(fake_faas)
+
+    async def handler(request):
+        response = await fake_faas.handler(request)
+        if f"q={record.vacancy_name}&" in json.loads(request.content)['url']:
+            text = json.loads(response.content)['text']
+            start = text.index('data-mfe-state')
+            return httpx.Response(200, json={"text": text[:start + 200] + '</script></body></html>'})
+        return response
+
+    dict_repo, dead_letters = InMemoryDictRepository(RECORDS), DeadLetters()
+    response_cache = DiskResponseCache(str(tmp_path))
+    run_scrapper(httpx.MockTransport(handler), dict_repo, InMemoryVacancyRepository(), response_cache,
+                 dead_letters=dead_letters, parse_workers=parse_workers)
+
+    assert [entry.city_vacancyname_key for entry in dead_letters.entries] == [record.city_vacancyname_key]
+    assert record.city_vacancyname_key not in dict_repo.scraped
+    # Остальные страницы записи не запрашивались, а неразобранная первая не осталась в кэше ответов
+    other_pages = sum(max(pages_count(fake_faas, r), 1) for r in RECORDS if r is not record)
+    assert response_cache.stats()['entries'] == other_pages
+
+
+def test_reader_failure_stops_the_run(fake_faas):
+    dict_repo, vacancy_repo = FailingDictRepository(RECORDS), InMemoryVacancyRepository()
+    with pytest.raises(RuntimeError, match='db down'):
+        run_scrapper(fake_faas.transport(), dict_repo, vacancy_repo, read_batch_size=5)
+
+    # Записи первой пачки успели собраться и отмечены
+    assert set(dict_repo.scraped) == {record.city_vacancyname_key for record in RECORDS[:5]}
+
+
+def test_interrupted_run_resumes_from_journal(fake_faas, tmp_path):
+    journal = RunJournal(str(tmp_path / 'journal.sqlite3'))
+    run_id = journal.start_run()
+    with pytest.raises(RuntimeError):
+        run_scrapper(fake_faas.transport(), FailingDictRepository(RECORDS), InMemoryVacancyRepository(),
+                     journal=journal, read_batch_size=5)
+    first_run_calls = fake_faas.calls
+
+    assert journal.start_run(resume=True) == run_id
+    dict_repo = InMemoryDictRepository(RECORDS)
+    run_scrapper(fake_faas.transport(), dict_repo, InMemoryVacancyRepository(), journal=journal)
+
+    assert fake_faas.calls - first_run_calls == sum(max(pages_count(fake_faas, r), 1) for r in RECORDS[5:])
+    assert set(dict_repo.scraped) == {record.city_vacancyname_key for record in RECORDS[5:]}
+    assert journal.start_run(resume=True) != run_id
+    assert not journal.load_progress()
+    journal.close()
+
+
+def test_failed_page_goes_to_dead_letters(fake_faas):
+    record = multi_page_record(fake_faas)
+    dict_repo, dead_letters = InMemoryDictRepository(RECORDS), DeadLetters()
+    handler = failing_page_handler(fake_faas, f"p=2&q={record.vacancy_name}&")
+    run_scrapper(httpx.MockTransport(handler), dict_repo, InMemoryVacancyRepository(), dead_letters=dead_letters)
+
+    assert [(entry.city_vacancyname_key, entry.page) for entry in dead_letters.entries] == [
+        (record.city_vacancyname_key, 2)
+    ]
+    assert set(dict_repo.scraped) == {r.city_vacancyname_key for r in RECORDS} - {record.city_vacancyname_key}
+
+
+def test_run_with_failed_flush_stays_resumable(fake_faas, tmp_path):
+    journal = RunJournal(str(tmp_path / 'journal.sqlite3'))
+    run_id = journal.start_run()
+    run_scrapper(fake_faas.transport(), InMemoryDictRepository(RECORDS), FlakyVacancyRepository(), journal=journal)
+
+    # Запуск не завершен, страницы несохраненной пачки не отмечены в журнале
+    assert journal.start_run(resume=True) == run_id
+    first_run_calls = fake_faas.calls
+    vacancy_repo = InMemoryVacancyRepository()
+    run_scrapper(fake_faas.transport(), InMemoryDictRepository(RECORDS), vacancy_repo, journal=journal)
+
+    # Повторно загружены только страницы неудачной пачки
+    assert 0 < fake_faas.calls - first_run_calls < first_run_calls
+    assert vacancy_repo.ids
+    assert journal.start_run(resume=True) != run_id
+    journal.close()
+
+
+def test_pages_of_failed_flush_go_to_dead_letters(fake_faas):
+    dict_repo, dead_letters = InMemoryDictRepository(RECORDS), DeadLetters()
+    run_scrapper(fake_faas.transport(), dict_repo, FlakyVacancyRepository(), dead_letters=dead_letters)
+
+    failed_keys = {entry.city_vacancyname_key for entry in dead_letters.entries}
+    assert failed_keys
+    assert {entry.error_class for entry in dead_letters.entries} == {'VacancyWriteError'}
+    assert not failed_keys & set(dict_repo.scraped)
+    assert failed_keys | set(dict_repo.scraped) == {record.city_vacancyname_key for record in RECORDS}
+
+
+def test_redrive_bypasses_response_cache(fake_faas, tmp_path):
+    record = multi_page_record(fake_faas)
+    dead_letters = DeadLetters()
+    handler = failing_page_handler(fake_faas, f"p=2&q={record.vacancy_name}&")
+    run_scrapper(httpx.MockTransport(handler), InMemoryDictRepository(RECORDS), InMemoryVacancyRepository(),
+                 dead_letters=dead_letters)
+    [entry] = dead_letters.entries
+
+    # В кэше оказался негодный ответ на неудачную страницу
+    response_cache = DiskResponseCache(str(tmp_path))
+    cache_key = response_cache.make_key('POST', 'http://fake-faas', {"json": {"url": entry.target_url}})
+    asyncio.run(response_cache.set(cache_key, {"text": fake_faas.render_page('')}))
+    calls = fake_faas.calls
+    run_scrapper(fake_faas.transport(), InMemoryDictRepository(RECORDS), InMemoryVacancyRepository(),
+                 response_cache, redrive=[entry], dead_letters=dead_letters)
+
+    assert fake_faas.calls - calls == 1
+    assert dead_letters.resolved == [entry.target_url]
+
+
+def test_redrive_requires_dead_letters(fake_faas):
+    with pytest.raises(ValueError):
+        run_scrapper(fake_faas.transport(), InMemoryDictRepository(RECORDS), InMemoryVacancyRepository(), redrive=[])
+    assert fake_faas.calls == 0
@@ -0,0 +1,60 @@
+import asyncio
+
+from repositories.rate_control import AdaptiveLimiter
+
+
+def test_success_grows_limit_additively():
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=5)
+    for _ in range(4):
+        limiter.on_success(0.1)
+    assert limiter.limit == 4
+    for _ in range(20):
+        limiter.on_success(0.1)
+    assert limiter.limit == 5
+
+
+def test_overload_halves_limit_once_per_cooldown():
+    limiter = AdaptiveLimiter(initial_limit=16, min_limit=2, cooldown=60)
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.limit == 8
+
+    limiter = AdaptiveLimiter(initial_limit=3, min_limit=2, cooldown=0)
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.limit == 2
+
+
+def test_latency_growth_decreases_limit():
+    limiter = AdaptiveLimiter(initial_limit=10, latency_tolerance=2.0, cooldown=0)
+    limiter.on_success(0.1)
+    for _ in range(10):
+        limiter.on_success(1.0)
+    assert limiter.limit < 10
+
+
+def test_rate_follows_limit():
+    limiter = AdaptiveLimiter(initial_limit=10, rate_limit=20, min_rate=5, cooldown=0)
+    assert limiter.rate == 20
+    limiter.on_overload()
+    assert limiter.rate == 10
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.rate == 5
+
+
+def test_acquire_waits_for_limit():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=2)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        return peak, limiter.in_flight
+
+    assert asyncio.run(scenario()) == (2, 0)
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import zlib
+
+import httpx
+
+from repositories.response_cache import _HEADER, DiskResponseCache
+from tests.conftest import make_requester
+
+
+def run_with_cache(cache: DiskResponseCache, scenario):
+    async def main():
+        try:
+            return await scenario(cache)
+        finally:
+            cache.close()
+    return asyncio.run(main())
+
+
+def test_roundtrip_skips_derived_keys(tmp_path):
+    async def scenario(cache):
+        key = cache.make_key('post', 'http://fake-faas', {"json": {"url": 'u'}})
+        assert key == cache.make_key('POST', 'http://fake-faas', {"json": {"url": 'u'}})
+        assert await cache.get(key) == (False, None)
+        await cache.set(key, {"text": 'страница', "_mfe_state": {"data": {}}})
+        return await cache.get(key), cache.stats()
+
+    (found, value), stats = run_with_cache(DiskResponseCache(str(tmp_path)), scenario)
+    assert found and value == {"text": 'страница'}
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+
+
+def test_expired_entry_is_removed(tmp_path):
+    async def scenario(cache):
+        await cache.set('a' * 64, {"text": 'old'}, ttl=0.01)
+        await cache.set('b' * 64, {"text": 'new'})
+        await asyncio.sleep(0.05)
+        return await cache.get('a' * 64), await cache.get('b' * 64), cache.stats()['entries']
+
+    expired, fresh, entries = run_with_cache(DiskResponseCache(str(tmp_path)), scenario)
+    assert expired == (False, None)
+    assert fresh == (True, {"text": 'new'})
+    assert entries == 1
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    value = {"text": 'x' * 1000}
+    entry_size = _HEADER.size + len(zlib.compress(json.dumps(value).encode(), 6))
+
+    async def scenario(cache):
+        await cache.set('a' * 64, value)
+        await cache.set('b' * 64, value)
+        await cache.get('a' * 64)
+        await cache.set('c' * 64, value)
+        return [(await cache.get(key * 64))[0] for key in 'abc'], cache.evictions
+
+    found, evictions = run_with_cache(DiskResponseCache(str(tmp_path), max_size_bytes=entry_size * 2), scenario)
+    assert found == [True, False, True]
+    assert evictions == 1
+
+
+def test_index_is_restored_from_disk(tmp_path):
+    async def fill(cache):
+        await cache.set('a' * 64, {"text": 'сохранено'})
+
+    async def read(cache):
+        return await cache.get('a' * 64)
+
+    run_with_cache(DiskResponseCache(str(tmp_path)), fill)
+    assert run_with_cache(DiskResponseCache(str(tmp_path)), read) == (True, {"text": 'сохранено'})
+
+
+def test_invalid_cached_response_is_fetched_again(tmp_path):
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"text": 'valid'})
+
+    async def scenario(cache):
+        request = {"json": {"url": 'u'}, "target_url": 'u'}
+        requester = make_requester(httpx.MockTransport(handler), response_cache=cache)
+        try:
+            await cache.set(requester._cache_key(request, "POST"), {"text": 'captcha'})
+            result = await requester.execute_one(request, "POST", lambda response: response['text'] == 'valid')
+            cached = await requester.execute_one(request, "POST", lambda response: response['text'] == 'valid')
+            await requester.evict_cached(request)
+            return result, cached, cache.stats()['entries']
+        finally:
+            await requester.client.aclose()
+
+    result, cached, entries = run_with_cache(DiskResponseCache(str(tmp_path)), scenario)
+    assert result == cached == ({"text": 'valid'}, 'u')
+    assert calls == 1
+    assert entries == 0
@@ -0,0 +1,121 @@
+import httpx
+import pytest
+
+from repositories import retry_policy
+from repositories.retry_policy import CircuitBreaker, ErrorRule, ResponseValidationError, RetryBudget, RetryPolicy
+
+
+def status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request('POST', 'http://fake-faas')
+    return httpx.HTTPStatusError('error', request=request, response=httpx.Response(status, request=request))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(retry_policy.time, 'monotonic', clock)
+    return clock
+
+
+def test_backoff_is_exponential_and_capped():
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_jitter_stays_within_backoff():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0)
+    assert all(0 <= policy.backoff(3) <= 4.0 for _ in range(100))
+
+
+def test_client_errors_are_not_retried():
+    policy = RetryPolicy(max_attempts=5, jitter=False)
+    assert policy.next_delay(status_error(404), 1) is None
+    assert policy.next_delay(status_error(503), 1) == policy.base_delay
+    assert policy.next_delay(httpx.ConnectError('down'), 1) == policy.base_delay
+
+
+def test_rate_limit_waits_longer():
+    policy = RetryPolicy(base_delay=1.0, jitter=False)
+    assert policy.next_delay(status_error(429), 1) == 2.0
+    assert policy.next_delay(status_error(408), 1) == 1.0
+
+
+def test_attempt_limits():
+    policy = RetryPolicy(max_attempts=3, jitter=False, error_rules={ResponseValidationError: ErrorRule(max_attempts=2)})
+    assert policy.next_delay(status_error(500), 2) is not None
+    assert policy.next_delay(status_error(500), 3) is None
+    assert policy.next_delay(ResponseValidationError(), 2) is None
+    # Лимит вызова перекрывает правило
+    assert policy.next_delay(ResponseValidationError(), 2, max_attempts=4) is not None
+
+
+def test_budget_limits_retries_to_share_of_requests():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    for _ in range(4):
+        budget.on_request()
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+    budget.on_request()
+    budget.on_request()
+    assert budget.try_spend()
+
+
+def test_exhausted_budget_stops_retries():
+    policy = RetryPolicy(max_attempts=10, budget=RetryBudget(ratio=0, min_retries=1))
+    policy.on_request()
+    assert policy.next_delay(status_error(503), 1) is not None
+    assert policy.next_delay(status_error(503), 1) is None
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_lets_one_probe_after_recovery(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_replaces_lost_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+
+
+def test_only_faas_failures_trip_breaker(clock):
+    policy = RetryPolicy(breaker=CircuitBreaker(failure_threshold=2))
+    policy.on_result(status_error(503))
+    policy.on_result(status_error(404))
+    policy.on_result(ResponseValidationError())
+    policy.on_result(status_error(502))
+    assert policy.allow_request()
+    policy.on_result(httpx.ConnectError('down'))
+    assert not policy.allow_request()
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from repositories.dict_city_vacancy import DictCityVacancyState
+from scrappers.scheduler import RecordScheduler
+from scrappers.sources import AvitoSource, HhSource
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def state(key: str, main_count, scraped_days_ago=None, source=None) -> DictCityVacancyState:
+    scraped_at = NOW - timedelta(days=scraped_days_ago) if scraped_days_ago is not None else None
+    return DictCityVacancyState(key, 'moskva', key, main_count, scraped_at, None, source)
+
+
+@pytest.mark.parametrize('main_count, scraped_days_ago, due', [
+    (None, None, True),   # никогда не собиралась
+    (None, 1, True),      # mainCount неизвестен - считается крупной
+    (5000, 0, True),      # крупный запрос собирается каждый проход
+    (50, 1, False),       # одна страница, собрана недавно
+    (50, 3, True),        # одна страница, интервал истек
+    (0, 1, False),
+])
+def test_is_due(main_count, scraped_days_ago, due):
+    scraped_at = NOW - timedelta(days=scraped_days_ago) if scraped_days_ago is not None else None
+    assert RecordScheduler().is_due(main_count, scraped_at, NOW) is due
+
+
+def test_large_records_go_first_then_stale():
+    states = [
+        state('small_fresh', 10, 1),
+        state('large_fresh', 1000, 0),
+        state('small_stale', 10, 10),
+        state('large_stale', 1000, 5),
+        state('new', None),
+        state('middle', 120, 2),
+    ]
+    ordered = RecordScheduler().order(states, NOW)
+    assert [s.city_vacancyname_key for s in ordered] == ['new', 'large_stale', 'large_fresh', 'middle', 'small_stale']
+
+
+def test_pages_follow_the_source_of_main_count():
+    scheduler = RecordScheduler(sources=[AvitoSource(), HhSource()])
+    assert scheduler.expected_pages(150, 'avito') == 3
+    assert scheduler.expected_pages(150, 'hh') == 2
+    assert scheduler.expected_pages(10 ** 6, 'hh') == 20
+    # Записи без источника (собранные до его сохранения) считаются по первому источнику
+    assert scheduler.expected_pages(150) == 3
+    # Одна страница hh.ru (до 100 вакансий) - маленький запрос, для Avito это две страницы
+    assert not scheduler.is_due(80, NOW - timedelta(days=1), NOW, 'hh')
+    assert scheduler.is_due(80, NOW - timedelta(days=1), NOW, 'avito')
+
+
+def test_unknown_pages_default_to_first_source_maximum():
+    assert RecordScheduler(sources=[HhSource()]).expected_pages(None) == 20
+    assert RecordScheduler().expected_pages(None) == 100
@@ -0,0 +1,69 @@
+import time
+
+from benchmarks.bench import InMemoryDictRepository, InMemoryVacancyRepository
+from repositories.scrape_job import LeasedRecordSource
+from tests.test_pipeline import RECORDS, run_scrapper
+
+
+class StubJobRepository:
+    """Очередь заданий в памяти с интерфейсом ScrapeJobRepository"""
+    lease_seconds = 300
+
+    def __init__(self, records):
+        self.pending = list(records)
+        self.completed = []
+        self.released = []
+        self.heartbeats = []
+
+    def claim(self, pass_id, worker_id, batch_size=100):
+        batch, self.pending = self.pending[:batch_size], self.pending[batch_size:]
+        return batch
+
+    def heartbeat(self, pass_id, worker_id, keys):
+        self.heartbeats.append(sorted(keys))
+        return len(keys)
+
+    def complete(self, pass_id, worker_id, keys, status='done'):
+        self.completed.extend(keys)
+        return len(keys)
+
+    def release(self, pass_id, worker_id, keys):
+        self.released.extend(keys)
+        return len(keys)
+
+
+def test_unfinished_jobs_are_released_on_close():
+    job_repo, dict_repo = StubJobRepository(RECORDS[:5]), InMemoryDictRepository([])
+    source = LeasedRecordSource(job_repo, dict_repo, 'pass', 'w1')
+    batches = list(source.iter_batches(batch_size=2))
+    source.mark_scraped([RECORDS[0].city_vacancyname_key, RECORDS[3].city_vacancyname_key])
+    source.close()
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert job_repo.completed == [RECORDS[0].city_vacancyname_key, RECORDS[3].city_vacancyname_key]
+    assert set(dict_repo.scraped) == set(job_repo.completed)
+    assert sorted(job_repo.released) == sorted(r.city_vacancyname_key for r in (RECORDS[1], RECORDS[2], RECORDS[4]))
+
+
+def test_heartbeat_renews_leased_jobs():
+    job_repo = StubJobRepository(RECORDS[:2])
+    source = LeasedRecordSource(job_repo, InMemoryDictRepository([]), 'pass', 'w1', heartbeat_interval=0.01)
+    list(source.iter_batches())
+    deadline = time.monotonic() + 2
+    while not job_repo.heartbeats and time.monotonic() < deadline:
+        time.sleep(0.01)
+    source.close()
+
+    assert job_repo.heartbeats[0] == sorted(r.city_vacancyname_key for r in RECORDS[:2])
+
+
+def test_scrapper_completes_every_leased_job(fake_faas):
+    job_repo, dict_repo = StubJobRepository(RECORDS), InMemoryDictRepository([])
+    source = LeasedRecordSource(job_repo, dict_repo, 'pass', 'w1')
+    try:
+        run_scrapper(fake_faas.transport(), source, InMemoryVacancyRepository(), read_batch_size=5)
+    finally:
+        source.close()
+
+    assert sorted(job_repo.completed) == sorted(record.city_vacancyname_key for record in RECORDS)
+    assert not job_repo.released
@@ -0,0 +1,48 @@
+from repositories.vacancy_batch import AVITO_URL_PREFIX, VacancyBatch
+from scrappers.sources import HH_URL_PREFIX
+
+
+def test_duplicates_and_incomplete_items_are_dropped():
+    batch = VacancyBatch.from_items([
+        (1, 'Курьер', '/moskva/vakansii/kurier_1'),
+        ('1', 'Курьер', '/moskva/vakansii/kurier_1'),
+        (2, None, '/moskva/vakansii/2'),
+        ('x', 'Повар', '/moskva/vakansii/x'),
+        (3, 'Повар', '/moskva/vakansii/povar_3'),
+    ], key='moskva_kurier')
+    assert list(batch.ids) == [1, 3]
+    assert batch.keys == ['moskva_kurier', 'moskva_kurier']
+    assert batch.add(3, 'Повар', '/x') is False
+
+
+def test_urls_share_prefix():
+    batch = VacancyBatch.from_items([(1, 'Курьер', '/v/1'), (2, 'Повар', 'https://example.com/v/2')])
+    assert batch.paths == ['/v/1', 'https://example.com/v/2']
+    assert [url for _, _, url in batch] == [AVITO_URL_PREFIX + '/v/1', 'https://example.com/v/2']
+
+
+def test_extend_keeps_foreign_prefix_and_dedups():
+    hh = VacancyBatch.from_items([(1, 'Курьер', '/vacancy/1'), (5, 'Повар', '/vacancy/5')],
+                                 url_prefix=HH_URL_PREFIX, source='hh')
+    batch = VacancyBatch.from_items([(1, 'Курьер', '/v/1')], key='a')
+    batch.extend(hh, key='b')
+    assert list(batch.ids) == [1, 5]
+    assert batch.keys == ['a', 'b']
+    assert batch.to_dicts()[1] == {
+        "vacancy_id": 5, "vacancy_name": 'Повар', "vacancy_url": HH_URL_PREFIX + '/vacancy/5', "city_vacancyname_key": 'b'
+    }
+
+
+def test_from_dicts_strips_prefix():
+    batch = VacancyBatch.from_dicts([
+        {"vacancy_id": 7, "vacancy_name": 'Курьер', "vacancy_url": AVITO_URL_PREFIX + '/v/7', "city_vacancyname_key": 'k'},
+    ])
+    assert batch.paths == ['/v/7']
+    assert batch.to_dicts()[0]['vacancy_url'] == AVITO_URL_PREFIX + '/v/7'
+
+
+def test_details_follow_items():
+    batch = VacancyBatch.from_items([(1, 'Курьер', '/v/1'), (1, 'Курьер', '/v/1'), (2, 'Повар', '/v/2')],
+                                    details=[('a',), ('dup',), ('b',)])
+    assert batch.details == [('a',), ('b',)]
+    assert VacancyBatch.from_items([(1, 'Курьер', '/v/1')]).details is None
@@ -0,0 +1,140 @@
+"""
+Распределенный проход по словарю: несколько процессов (на одном или нескольких хостах)
+разбирают общую очередь заданий в Postgres.
+
+    python workers.py enqueue --pass-id 2025-01-31
+    python workers.py run --pass-id 2025-01-31 --processes 4   # на каждом хосте
+    python workers.py status --pass-id 2025-01-31
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from db import DatabaseManager
+from main import (add_requester_arguments, initialize_database, make_requester, make_scheduler, make_source_repos,
+                  parse_sources, run_scrapper, validate_requester_arguments)
+from repositories.dead_letter import DeadLetterRepository
+from repositories.dict_city_vacancy import DictCityVacancyRepository
+from repositories.raw_av_vacancy import AvVacancyRepository
+from repositories.scrape_job import LeasedRecordSource, ScrapeJobRepository
+from scrappers.sources import get_sources
+from scrappers.vacancy_scrapper import VacancyScrapper
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Распределенный сбор вакансий через очередь заданий в Postgres")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = subparsers.add_parser('enqueue', help="Создать задания прохода по словарю")
+    enqueue.add_argument('--pass-id', required=True, help="Идентификатор прохода")
+    enqueue.add_argument('--client', default=None, help="Только записи словаря указанного клиента")
+    enqueue.add_argument('--rescrape-after-hours', type=float, default=None,
+                         help="Пропускать записи словаря, собранные менее указанного числа часов назад")
+    enqueue.add_argument('--schedule', action='store_true',
+                         help="Приоритет заданий по ожидаемому числу страниц, недавно собранные маленькие пропускать")
+    enqueue.add_argument('--small-query-interval-hours', type=float, default=72,
+                         help="Как часто собирать маленькие (одностраничные) запросы в режиме --schedule")
+    enqueue.add_argument('--sources', type=parse_sources, default=['avito'],
+                         help="Источники вакансий через запятую (avito, hh): в проход попадают записи словаря "
+                              "с идентификатором города хотя бы одного из них")
+
+    run = subparsers.add_parser('run', help="Запустить воркеры на этом хосте")
+    add_requester_arguments(run)
+    run.add_argument('--pass-id', required=True)
+    run.add_argument('--processes', type=int, default=1, help="Количество процессов-воркеров")
+    run.add_argument('--claim-size', type=int, default=100, help="Сколько заданий арендуется за раз")
+    run.add_argument('--lease-seconds', type=float, default=300, help="Срок аренды задания без продления")
+    run.add_argument('--max-attempts', type=int, default=3, help="Сколько раз задание может быть выдано")
+    run.add_argument('--chunk-size', type=int, default=10,
+                     help="Сколько записей словаря обрабатывается одновременно в каждом процессе")
+    run.add_argument('--verify-retry', type=int, default=3,
+                     help="Циклов повторных попыток при неудачной валидации ответа")
+    run.add_argument('--sources', type=parse_sources, default=['avito'],
+                     help="Источники вакансий через запятую (avito, hh)")
+
+    status = subparsers.add_parser('status', help="Статистика прохода; возвращает в очередь задания с истекшей арендой")
+    status.add_argument('--pass-id', required=True)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        validate_requester_arguments(run, args)
+    return args
+
+
+def worker_main(args: argparse.Namespace, index: int):
+    """Точка входа процесса-воркера"""
+    load_dotenv()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    logging.getLogger(__name__).warning(f"Воркер {index} ({worker_id}) прохода {args.pass_id} запущен")
+
+    db_manager = DatabaseManager()
+    job_repo = ScrapeJobRepository(db_manager, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    source = LeasedRecordSource(job_repo, DictCityVacancyRepository(db_manager), args.pass_id, worker_id)
+    scrapper = VacancyScrapper(
+        make_requester(args, args.max_concurrent),
+        source,
+        AvVacancyRepository(db_manager),
+        chunk_size=args.chunk_size,
+        verify_retry=args.verify_retry,
+        read_batch_size=args.claim_size,
+        dead_letters=DeadLetterRepository(db_manager),
+        # Строки вакансий воркеров помечаются идентификатором прохода
+        run_id=args.pass_id,
+        sources=get_sources(args.sources),
+        source_repos=make_source_repos(db_manager, args.sources)
+    )
+    try:
+        asyncio.run(run_scrapper(scrapper))
+    finally:
+        source.close()
+
+
+def run_workers(args: argparse.Namespace) -> int:
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=worker_main, args=(args, index), name=f"scrape-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    failed = [process.name for process in processes if process.exitcode]
+    if failed:
+        logger.error(f"Завершились с ошибкой: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    arguments = parse_args()
+
+    if arguments.command == 'run':
+        # Секции на новые месяцы создаются один раз до запуска процессов-воркеров
+        initialize_database()
+        raise SystemExit(run_workers(arguments))
+
+    job_repository = ScrapeJobRepository(initialize_database())
+    if arguments.command == 'enqueue':
+        scraped_before = None
+        if arguments.rescrape_after_hours is not None:
+            scraped_before = datetime.now() - timedelta(hours=arguments.rescrape_after_hours)
+        created = job_repository.enqueue_pass(
+            arguments.pass_id, arguments.client, scraped_before, make_scheduler(arguments),
+            id_columns=[source.dict_id_column for source in get_sources(arguments.sources)]
+        )
+        print(f"Создано заданий: {created}")
+    else:
+        requeued = job_repository.requeue_expired(arguments.pass_id)
+        print(f"Заданий с истекшей арендой возвращено в очередь или завершено (failed): {requeued}")
+        for status_name, count in sorted(job_repository.pass_stats(arguments.pass_id).items()):
+            print(f"{status_name}: {count}")